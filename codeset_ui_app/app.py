@@ -3,26 +3,57 @@ from typing import Dict, Any
 from pathlib import Path
 import tempfile
 import io
-from collections import defaultdict
+import os
+import threading
+from collections import OrderedDict
 
+import numpy as np
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, send_file, url_for
+from flask import Flask, make_response, render_template, request, jsonify, send_file, url_for
 import json
 from werkzeug.utils import secure_filename
 from werkzeug.routing import BuildError
 try:  # allow running as a package or standalone script
-    from components.file_parser import load_workbook
+    from components.column_plan import ColumnPlan, column_plan
+    from components.column_roles import resolve_columns
+    from components.file_parser import load_formula_workbook, map_sheets, read_columns, read_workbook
+    from components.lazy_workbook import LazySheets
+    from components.multi_compare import MATRIX_STATUSES, compare_workbooks, load_code_tables
     from components.dropdown_logic import extract_dropdown_options
     from components.formula_logic import extract_lookup_mappings
+    from components.sheet_fingerprint import sheet_fingerprint
+    from components.sheet_preparation import (
+        prepare_sheet as _prepare_sheet,
+        prepare_source_sheet as _prepare_source_sheet,
+        source_fingerprint as _source_fingerprint,
+    )
+    from components.workbook_diff import DIFF_KINDS, align_rows, compare_sheets
     from utils.export_excel import export_workbook
     from utils.transformer_xml import build_transformer_xml
+    from utils import repository_index, workbook_cache
+    from utils.json_response import body_etag, compress_response, encode_json, json_response
+    from utils.repository_watcher import RepositoryWatcher
     from validators import validate_workbook
 except ModuleNotFoundError:  # pragma: no cover - fallback for imports when packaged
-    from .components.file_parser import load_workbook
+    from .components.column_plan import ColumnPlan, column_plan
+    from .components.column_roles import resolve_columns
+    from .components.file_parser import load_formula_workbook, map_sheets, read_columns, read_workbook
+    from .components.lazy_workbook import LazySheets
+    from .components.multi_compare import MATRIX_STATUSES, compare_workbooks, load_code_tables
     from .components.dropdown_logic import extract_dropdown_options
     from .components.formula_logic import extract_lookup_mappings
+    from .components.sheet_fingerprint import sheet_fingerprint
+    from .components.sheet_preparation import (
+        prepare_sheet as _prepare_sheet,
+        prepare_source_sheet as _prepare_source_sheet,
+        source_fingerprint as _source_fingerprint,
+    )
+    from .components.workbook_diff import DIFF_KINDS, align_rows, compare_sheets
     from .utils.export_excel import export_workbook
     from .utils.transformer_xml import build_transformer_xml
+    from .utils import repository_index, workbook_cache
+    from .utils.json_response import body_etag, compress_response, encode_json, json_response
+    from .utils.repository_watcher import RepositoryWatcher
     from .validators import validate_workbook
 from openpyxl.workbook.workbook import Workbook
 
@@ -31,6 +62,11 @@ workbook_data: Dict[str, "pd.DataFrame"] = {}
 dropdown_data: Dict[str, Dict[str, list]] = {}
 mapping_data: Dict[str, Dict[str, Any]] = {}
 field_notes: Dict[str, str] = {}
+# Content fingerprint of every sheet in ``workbook_data``, updated on edit.
+sheet_fingerprints: Dict[str, str] = {}
+# Fingerprint of what each prepared sheet was derived from (see
+# ``_source_fingerprint``); dropped when the sheet is edited.
+source_fingerprints: Dict[str, str] = {}
 workbook_obj: Workbook | None = None
 original_filename: str | None = None
 workbook_path: Path | None = None
@@ -41,6 +77,14 @@ pending_import_path: Path | None = None
 pending_import_name: str | None = None
 pending_import_active: bool = False
 pending_import_diff: Dict[str, Any] = {}
+# Parsed sheets, validation source and cache key of the staged import, so
+# confirming it does not parse the file again.
+pending_import_data: Dict[str, "pd.DataFrame"] = {}
+pending_import_source: Any = None
+pending_import_key: str | None = None
+# N-way comparison: the compared workbooks and a code matrix per sheet.
+multi_compare_sources: list[Dict[str, str]] = []
+multi_compare_data: Dict[str, Any] = {}
 
 TRANSFORMER_REQUIRE_MAPPED = {
     "CS_ABNORMAL_FLAG",
@@ -69,6 +113,51 @@ TRANSFORMER_REQUIRE_MAPPED = {
     "CS_VIP_IND",
 }
 
+# Opt-in parallel loading. With more than one worker, workbooks with at least
+# ``PARALLEL_MIN_SHEETS`` sheets are parsed and prepared across a process pool
+# instead of lazily, one sheet at a time, in the request thread.
+PARALLEL_WORKERS = int(os.environ.get("CODESET_PARALLEL_WORKERS", "0"))
+PARALLEL_MIN_SHEETS = int(os.environ.get("CODESET_PARALLEL_MIN_SHEETS", "8"))
+# Opt-in worker processes reading the workbooks of an N-way comparison
+# concurrently; with one worker or fewer they are read serially.
+COMPARE_WORKERS = int(os.environ.get("CODESET_COMPARE_WORKERS", "0"))
+
+# Opt-in watcher keeping ``REPOSITORY_CACHE`` current as workbooks are added,
+# removed or renamed below the repository base. Uses inotify where available
+# and otherwise polls every ``WATCH_INTERVAL`` seconds.
+WATCH_REPOSITORIES = os.environ.get("CODESET_WATCH_REPOSITORIES", "").lower() in ("1", "true", "yes")
+WATCH_INTERVAL = float(os.environ.get("CODESET_WATCH_INTERVAL", "5"))
+
+# Comparison datasets recently loaded by ``_load_comparison_workbook_path``,
+# keyed by path, modification time and size, most recently used last. Entries
+# are evicted once their frames exceed ``COMPARE_CACHE_BYTES`` in total.
+COMPARE_CACHE_BYTES = int(os.environ.get("CODESET_COMPARE_CACHE_BYTES", 64 * 1024 * 1024))
+_comparison_lru: "OrderedDict[tuple, tuple[int, Dict[str, pd.DataFrame]]]" = OrderedDict()
+_comparison_lru_lock = threading.Lock()
+
+# Fingerprints of the sheets as last written to ``workbook_obj``, so exports
+# only rewrite edited sheets, and per-sheet validation and transformer results
+# reused while a sheet's fingerprint is unchanged.
+_exported_fingerprints: Dict[str, str] = {}
+_validation_cache: Dict[str, tuple] = {}
+_transformer_cache: Dict[str, tuple] = {}
+# Aligned comparison rows and combined frames per sheet (see
+# ``_combined_entry``), dropped whenever the workbook or comparison changes.
+_combined_cache: Dict[str, Dict[str, Any]] = {}
+
+# Default and maximum number of rows per page of ``/import/diff/<sheet>/<kind>``
+# and ``/compare/multi/<sheet>``.
+DIFF_PAGE_SIZE = 100
+DIFF_PAGE_MAX = 1000
+
+# Default and maximum number of rows returned by one windowed ``/sheet`` call.
+SHEET_PAGE_SIZE = 500
+SHEET_PAGE_MAX = 5000
+SHEET_WINDOW_ARGS = ("offset", "limit", "sort", "order", "q", "column", "unmapped")
+SHEET_FORMATS = ("records", "rows", "columns")
+# Encoded ``/sheet`` responses kept per sheet, most recently requested last.
+SHEET_RESPONSE_CACHE = 8
+
 # File storing the user's preferred repository base path
 CONFIG_FILE = Path(__file__).resolve().parent / "repo_base.txt"
 
@@ -77,31 +166,56 @@ CONFIG_FILE = Path(__file__).resolve().parent / "repo_base.txt"
 SAMPLES_DIR: Path | None = None
 
 
-def _str_series(df: pd.DataFrame, col: str) -> pd.Series:
+def _densest_column(df: pd.DataFrame, col: str, plan: ColumnPlan | None = None) -> pd.Series:
+    """Return column ``col``, picking the least empty one among duplicates.
+
+    ``plan`` is the :class:`ColumnPlan` of ``df`` when the caller has it.
+    """
+    if plan is None:
+        series = df[col]
+        if not isinstance(series, pd.DataFrame):
+            return series
+        plan = column_plan(df)
+    return plan.column(df, col)
+
+
+def _str_series(df: pd.DataFrame, col: str, plan: ColumnPlan | None = None) -> pd.Series:
     """Return a stripped string Series for ``col`` selecting non-empty dupes."""
-    series = df[col]
-    if isinstance(series, pd.DataFrame):
-        non_empty = series.ne("").sum()
-        series = series.iloc[:, non_empty.values.argmax()]
-    return series.astype(str).str.strip()
+    return _densest_column(df, col, plan).astype(str).str.strip()
+
 
+def _unique_columns(df: pd.DataFrame, plan: ColumnPlan | None = None) -> pd.DataFrame:
+    """Return ``df`` keeping only the densest of any duplicated columns."""
+    if plan is None:
+        if not df.columns.duplicated().any():
+            return df
+        plan = column_plan(df)
+    return plan.unique(df)
 
-def _records(df: pd.DataFrame | None) -> list[dict]:
+
+def _records(df: pd.DataFrame | None, plan: ColumnPlan | None = None) -> list[dict]:
     """Convert ``df`` to record dicts, keeping the densest duplicate column."""
     if df is None:
         return []
-    if df.columns.duplicated().any():
-        cols = []
-        for col in dict.fromkeys(df.columns):
-            part = df.loc[:, df.columns == col]
-            if isinstance(part, pd.Series):
-                cols.append(part)
-            else:
-                non_empty = part.ne("").sum()
-                cols.append(part.iloc[:, non_empty.values.argmax()])
-        df = pd.concat(cols, axis=1)
-        df.columns = list(dict.fromkeys(df.columns))
-    return df.to_dict(orient="records")
+    return _unique_columns(df, plan).to_dict(orient="records")
+
+
+def _table(
+    df: pd.DataFrame | None, orient: str = "rows", plan: ColumnPlan | None = None
+) -> Dict[str, Any]:
+    """Return ``df`` as a header list plus row arrays or column arrays.
+
+    ``orient`` is ``"rows"`` (``{"columns", "rows"}``) or ``"columns"``
+    (``{"columns", "data"}`` with one array per column). Column names are sent
+    once instead of on every row as :func:`_records` does.
+    """
+    if df is None:
+        df = pd.DataFrame()
+    df = _unique_columns(df, plan)
+    columns = df.columns.tolist()
+    if orient == "columns":
+        return {"columns": columns, "data": [df.iloc[:, i].tolist() for i in range(len(columns))]}
+    return {"columns": columns, "rows": df.to_numpy(dtype=object).tolist()}
 
 
 def _clear_pending_import(clear_comparison: bool = True) -> None:
@@ -109,15 +223,20 @@ def _clear_pending_import(clear_comparison: bool = True) -> None:
 
     global pending_import_path, pending_import_name, pending_import_active
     global pending_import_diff, comparison_data, comparison_path
+    global pending_import_data, pending_import_source, pending_import_key
 
     staged_path = pending_import_path
     pending_import_path = None
     pending_import_name = None
     pending_import_diff = {}
+    pending_import_data = {}
+    pending_import_source = None
+    pending_import_key = None
 
     if pending_import_active and clear_comparison:
         comparison_data = {}
         comparison_path = None
+        _combined_cache.clear()
 
     pending_import_active = False
 
@@ -131,24 +250,10 @@ def _clear_pending_import(clear_comparison: bool = True) -> None:
 def _infer_sheet_columns(df: pd.DataFrame | None) -> tuple[str | None, str | None, str | None]:
     """Infer key columns (code, display, mapped) from ``df`` when metadata is missing."""
 
-    code_col = display_col = mapped_col = None
     if df is None:
-        return code_col, display_col, mapped_col
-
-    for col in df.columns:
-        col_key = col.strip().upper().replace(" ", "_")
-        if col_key == "CODE" and not code_col:
-            code_col = col
-        if col_key in {"DISPLAY_VALUE", "DISPLAY"} and not display_col:
-            display_col = col
-        if col_key in {
-            "MAPPED_STD_DESCRIPTION",
-            "MAPPED_STANDARD_DESCRIPTION",
-            "MAPPED_STD_CODE",
-            "MAPPED_STANDARD_CODE",
-        } and not mapped_col:
-            mapped_col = col
-    return code_col, display_col, mapped_col
+        return None, None, None
+    roles = resolve_columns(df.columns)
+    return roles.code, roles.display, roles.mapped
 
 
 def _normalize_diff_dataframe(df: pd.DataFrame | None, columns: list[str]) -> pd.DataFrame:
@@ -160,189 +265,159 @@ def _normalize_diff_dataframe(df: pd.DataFrame | None, columns: list[str]) -> pd
     if df is None or df.empty:
         return pd.DataFrame({col: pd.Series(dtype=str) for col in columns})
 
-    data: Dict[str, pd.Series] = {}
+    plan = column_plan(df)
+    data: Dict[str, list[str]] = {}
     for col in columns:
         if col in df.columns:
-            series = _str_series(df, col)
+            # Plain ``str``/``strip`` calls are several times faster than the
+            # pandas string accessor on large sheets.
+            values = _densest_column(df, col, plan).to_numpy(dtype=object)
+            try:
+                data[col] = list(map(str.strip, values))
+            except TypeError:
+                data[col] = [str(value).strip() for value in values]
         else:
-            series = pd.Series([""] * len(df))
-        data[col] = series.fillna("").astype(str).str.strip()
-    return pd.DataFrame(data).reset_index(drop=True)
-
-
-def _prepare_diff_rows(
-    sheet: str,
-    df: pd.DataFrame | None,
-    columns: list[str],
-    key_column: str | None,
-) -> list[Dict[str, Any]]:
-    """Convert dataframe rows into a diff-friendly structure with unique keys."""
-
-    normalized = _normalize_diff_dataframe(df, columns)
-    rows: list[Dict[str, Any]] = []
-
-    if normalized.empty:
-        return rows
-
-    for idx, record in enumerate(normalized.to_dict(orient="records")):
-        row_number = idx + 2  # account for header row in Excel
-        key_value = record.get(key_column, "") if key_column else ""
-        display_key = key_value or f"Row {row_number}"
-        rows.append(
-            {
-                "values": record,
-                "row": row_number,
-                "key_value": key_value.strip(),
-                "display_key": display_key,
-            }
-        )
+            data[col] = [""] * len(df)
+    return pd.DataFrame(data)
 
-    occurrences: dict[str, int] = defaultdict(int)
-    for row in rows:
-        base_key = row["key_value"] or f"__row_{row['row']}"
-        count = occurrences[base_key]
-        occurrences[base_key] += 1
-        unique_key = base_key if count == 0 else f"{base_key}#{count}"
-        row["unique_key"] = unique_key
 
-    return rows
-
-
-def _compute_workbook_diff(imported: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
-    """Build a diff summary between the active workbook and ``imported`` data."""
-
-    diff: Dict[str, Any] = {"sheets": {}, "summary": {}}
-    sheet_names = sorted(set(workbook_data.keys()) | set(imported.keys()))
+def _sheet_diff(sheet: str, base_df: pd.DataFrame | None, new_df: pd.DataFrame | None):
+    """Return the :class:`SheetDiff` of one sheet or ``None`` when nothing differs."""
+    info = mapping_data.get(sheet, {})
+    base_code, base_display, base_mapped = _infer_sheet_columns(base_df)
+    new_code, new_display, new_mapped = _infer_sheet_columns(new_df)
 
-    total_added = total_removed = total_changed = 0
+    def _pick_column(candidates: list[str | None]) -> str | None:
+        for cand in candidates:
+            if not cand:
+                continue
+            if (base_df is not None and cand in base_df.columns) or (
+                new_df is not None and cand in new_df.columns
+            ):
+                return cand
+        return None
 
-    for sheet in sheet_names:
-        base_df = workbook_data.get(sheet)
-        new_df = imported.get(sheet)
+    code_col = _pick_column([info.get("code_col"), base_code, new_code])
+    display_col = _pick_column([info.get("display_col"), base_display, new_display])
+    mapped_col = _pick_column([info.get("mapped_col"), base_mapped, new_mapped])
 
-        info = mapping_data.get(sheet, {})
-        base_code, base_display, base_mapped = _infer_sheet_columns(base_df)
-        new_code, new_display, new_mapped = _infer_sheet_columns(new_df)
-
-        def _pick_column(candidates: list[str | None]) -> str | None:
-            for cand in candidates:
-                if not cand:
-                    continue
-                if (base_df is not None and cand in base_df.columns) or (
-                    new_df is not None and cand in new_df.columns
-                ):
-                    return cand
-            return None
+    columns = [c for c in [code_col, display_col, mapped_col] if c]
+    if not columns:
+        return None
 
-        code_col = _pick_column([info.get("code_col"), base_code, new_code])
-        display_col = _pick_column([info.get("display_col"), base_display, new_display])
-        mapped_col = _pick_column([info.get("mapped_col"), base_mapped, new_mapped])
+    columns = list(dict.fromkeys(columns))
+    key_column = code_col or display_col or mapped_col
 
-        columns = [c for c in [code_col, display_col, mapped_col] if c]
-        if not columns:
-            continue
+    base_norm = _normalize_diff_dataframe(base_df, columns)
+    new_norm = _normalize_diff_dataframe(new_df, columns)
+    if sheet_fingerprint(base_norm) == sheet_fingerprint(new_norm):
+        return None
+    return compare_sheets(base_norm, new_norm, columns, key_column)
+
+
+def _summarize_diff(sheets: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a workbook diff holding the :class:`SheetDiff` objects ``sheets``."""
+    return {
+        "sheets": sheets,
+        "summary": {
+            "total_sheets": len(sheets),
+            "added": sum(d.count("added") for d in sheets.values()),
+            "removed": sum(d.count("removed") for d in sheets.values()),
+            "changed": sum(d.count("changed") for d in sheets.values()),
+        },
+        "has_changes": bool(sheets),
+    }
 
-        columns = list(dict.fromkeys(columns))
-        key_column = code_col or display_col or mapped_col
 
-        base_rows = _prepare_diff_rows(sheet, base_df, columns, key_column)
-        new_rows = _prepare_diff_rows(sheet, new_df, columns, key_column)
+def _compute_workbook_diff(imported: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """Build a diff summary between the active workbook and ``imported`` data.
 
-        base_map = {row["unique_key"]: row for row in base_rows}
-        new_map = {row["unique_key"]: row for row in new_rows}
+    ``sheets`` maps each differing sheet to a :class:`SheetDiff`; use
+    :func:`_diff_overview` for a JSON summary and page through rows with
+    :meth:`SheetDiff.rows`.
+    """
 
-        added_rows: list[Dict[str, Any]] = []
-        removed_rows: list[Dict[str, Any]] = []
-        changed_rows: list[Dict[str, Any]] = []
+    sheets: Dict[str, Any] = {}
+    for sheet in sorted(set(workbook_data.keys()) | set(imported.keys())):
+        sheet_diff = _sheet_diff(sheet, workbook_data.get(sheet), imported.get(sheet))
+        if sheet_diff is not None:
+            sheets[sheet] = sheet_diff
+    return _summarize_diff(sheets)
 
-        for key, new_row in new_map.items():
-            if key not in base_map:
-                added_rows.append(
-                    {
-                        "key": new_row["display_key"],
-                        "values": new_row["values"],
-                        "row": new_row["row"],
-                    }
-                )
-            else:
-                base_row = base_map[key]
-                if base_row["values"] != new_row["values"]:
-                    changed_columns = [
-                        col for col in columns if base_row["values"].get(col) != new_row["values"].get(col)
-                    ]
-                    changed_rows.append(
-                        {
-                            "key": new_row["display_key"],
-                            "before": base_row["values"],
-                            "after": new_row["values"],
-                            "base_row": base_row["row"],
-                            "incoming_row": new_row["row"],
-                            "changed_columns": changed_columns,
-                        }
-                    )
-
-        for key, base_row in base_map.items():
-            if key not in new_map:
-                removed_rows.append(
-                    {
-                        "key": base_row["display_key"],
-                        "values": base_row["values"],
-                        "row": base_row["row"],
-                    }
-                )
 
-        if added_rows or removed_rows or changed_rows:
-            diff["sheets"][sheet] = {
-                "columns": columns,
-                "key_column": key_column,
-                "added": added_rows,
-                "removed": removed_rows,
-                "changed": changed_rows,
-                "added_count": len(added_rows),
-                "removed_count": len(removed_rows),
-                "changed_count": len(changed_rows),
-            }
-            total_added += len(added_rows)
-            total_removed += len(removed_rows)
-            total_changed += len(changed_rows)
-
-    diff["summary"] = {
-        "total_sheets": len(diff["sheets"]),
-        "added": total_added,
-        "removed": total_removed,
-        "changed": total_changed,
+def _diff_overview(diff: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the summary and per-sheet row counts of a workbook diff."""
+    return {
+        "sheets": {sheet: sheet_diff.overview() for sheet, sheet_diff in diff.get("sheets", {}).items()},
+        "summary": diff.get("summary", {}),
+        "has_changes": diff.get("has_changes", False),
     }
-    diff["has_changes"] = bool(diff["sheets"])
-    return diff
 
 
-def _stage_import_workbook(path: Path, filename: str) -> Dict[str, Any]:
-    """Load ``path`` as a staged import workbook and populate comparison data."""
+def _stage_import_workbook(
+    path: Path, filename: str, file_bytes: bytes | None = None
+) -> Dict[str, Any]:
+    """Load ``path`` as a staged import workbook and populate comparison data.
+
+    The workbook is parsed once; the diff and the comparison columns are both
+    derived from that parse, which is kept for :func:`_promote_staged_import`.
+    ``file_bytes`` may hold the contents of ``path``
+    when the caller already has them in memory.
+    """
 
     global pending_import_path, pending_import_name, pending_import_active, pending_import_diff
+    global pending_import_data, pending_import_source, pending_import_key
+    global comparison_data, comparison_path
 
-    with path.open("rb") as fh:
-        imported_data, _ = load_workbook(fh)
+    if file_bytes is None:
+        file_bytes = path.read_bytes()
+    imported_data, source = read_workbook(
+        io.BytesIO(file_bytes), workers=PARALLEL_WORKERS, min_sheets=PARALLEL_MIN_SHEETS
+    )
 
     pending_import_diff = _compute_workbook_diff(imported_data)
     pending_import_path = path
     pending_import_name = filename
     pending_import_active = True
+    pending_import_data = imported_data
+    pending_import_source = source
+    pending_import_key = workbook_cache.workbook_key(file_bytes)
 
-    _load_comparison_workbook_path(path)
+    comparison_data = _comparison_frames(imported_data)
+    comparison_path = path
+    _combined_cache.clear()
     return pending_import_diff
 
 
-def load_repository_base() -> None:
+def load_repository_base(background: bool = False) -> None:
     """Load repository base from config and refresh cache."""
     global SAMPLES_DIR
     if CONFIG_FILE.exists():
         SAMPLES_DIR = Path(CONFIG_FILE.read_text().strip())
     else:
         SAMPLES_DIR = Path(__file__).resolve().parent.parent / "Samples"
-    refresh_repository_cache()
+    refresh_repository_cache(background=background)
+
+def _repository_entry(base: Path, rel_file: str) -> tuple[str | None, str]:
+    """Return the repository key and in-repository path of workbook ``rel_file``.
 
-def discover_repository_workbooks(base: Path) -> Dict[str, list[str]]:
+    The key is ``None`` for workbooks outside any repository, whose path is
+    then relative to ``base``.
+    """
+    file = base / rel_file
+    for ancestor in file.parents:
+        if ancestor == base:
+            break
+        name = ancestor.name.lower()
+        if "repository" in name or name.endswith("-prc"):
+            # keep the first (closest) repository ancestor
+            return str(ancestor.relative_to(base)), str(file.relative_to(ancestor))
+    return None, str(file.relative_to(base))
+
+
+def discover_repository_workbooks(
+    base: Path, files: list[str] | None = None
+) -> Dict[str, list[str]]:
     """Return a mapping of repository *relative paths* to codeset workbooks.
 
     The scan searches for any directory containing ``Codeset`` in its name and
@@ -355,29 +430,22 @@ def discover_repository_workbooks(base: Path) -> Dict[str, list[str]]:
     their path relative to ``base`` to avoid collisions between repositories
     with the same name and to allow nested repositories to be addressed
     correctly.
+
+    Workbooks are found through the incremental :mod:`repository_index`;
+    ``files`` (paths relative to ``base``) skips the scan entirely.
     """
 
     repo_map: Dict[str, list[str]] = {}
     shared_files: list[str] = []
     if base and base.exists():
-        for file in base.rglob("*.xlsx"):
-            if "codeset" not in file.name.lower():
-                continue
-            repo_dir: Path | None = None
-            for ancestor in file.parents:
-                if ancestor == base:
-                    break
-                name = ancestor.name.lower()
-                if "repository" in name or name.endswith("-prc"):
-                    # keep the first (closest) repository ancestor
-                    repo_dir = ancestor
-                    break
-            if repo_dir is not None:
-                rel_repo = str(repo_dir.relative_to(base))
-                rel_path = str(file.relative_to(repo_dir))
+        if files is None:
+            files = repository_index.scan(base)
+        for rel_file in files:
+            rel_repo, rel_path = _repository_entry(base, rel_file)
+            if rel_repo is not None:
                 repo_map.setdefault(rel_repo, []).append(rel_path)
             else:
-                shared_files.append(str(file.relative_to(base)))
+                shared_files.append(rel_path)
 
     for name, files in repo_map.items():
         repo_map[name] = sorted(set(files))
@@ -388,237 +456,711 @@ def discover_repository_workbooks(base: Path) -> Dict[str, list[str]]:
 
 # Cached mapping of repositories to workbooks for the currently selected base
 REPOSITORY_CACHE: Dict[str, list[str]] = {}
+# Incremented on every refresh so a stale background rescan or watcher event
+# never overwrites the cache for a base selected after it started. Updates
+# from those threads check the generation and apply under the lock.
+_repository_generation = 0
+_repository_lock = threading.Lock()
+_repository_watcher: RepositoryWatcher | None = None
+# Parsed-workbook cache key of every workbook opened or compared from disk, by
+# path, so its entries can be dropped when the watcher sees the file disappear.
+_workbook_cache_keys: Dict[str, str] = {}
+
+
+def _apply_repository_changes(
+    base: Path,
+    generation: int,
+    added: list[str],
+    removed: list[str],
+    renamed: list[tuple[str, str]],
+) -> None:
+    """Apply workbook changes reported by the watcher for ``base``.
+
+    Changes are ignored once the repository cache has been refreshed since
+    the watcher of ``generation`` was started.
+    """
+    with _repository_lock:
+        if generation != _repository_generation or base != SAMPLES_DIR:
+            return
+        _apply_repository_changes_locked(base, added, removed, renamed)
+
+
+def _apply_repository_changes_locked(
+    base: Path,
+    added: list[str],
+    removed: list[str],
+    renamed: list[tuple[str, str]],
+) -> None:
+    global REPOSITORY_CACHE, workbook_path, comparison_path
+    repo_map = {repo: list(files) for repo, files in REPOSITORY_CACHE.items()}
+    for rel_file in removed + [old for old, _ in renamed]:
+        repo, rel_path = _repository_entry(base, rel_file)
+        files = repo_map.get(repo or "SharedRepositories", [])
+        if rel_path in files:
+            files.remove(rel_path)
+    for rel_file in added + [new for _, new in renamed]:
+        repo, rel_path = _repository_entry(base, rel_file)
+        files = repo_map.setdefault(repo or "SharedRepositories", [])
+        if rel_path not in files:
+            files.append(rel_path)
+    REPOSITORY_CACHE = {repo: sorted(files) for repo, files in repo_map.items() if files}
+
+    for rel_file in removed:
+        key = _workbook_cache_keys.pop(str(base / rel_file), None)
+        if key is not None:
+            workbook_cache.invalidate(key)
+            workbook_cache.invalidate(f"{key}-compare")
+    _forget_comparisons([base / rel_file for rel_file in removed + [old for old, _ in renamed]])
+    for old, new in renamed:
+        old_path, new_path = base / old, base / new
+        key = _workbook_cache_keys.pop(str(old_path), None)
+        if key is not None:
+            _workbook_cache_keys[str(new_path)] = key
+        if workbook_path == old_path:
+            workbook_path = new_path
+        if comparison_path == old_path:
+            comparison_path = new_path
+
+
+def _watch_repository_base(base: Path | None, generation: int) -> None:
+    """(Re)start the repository watcher for ``base`` when watching is enabled."""
+    global _repository_watcher
+    if _repository_watcher is not None:
+        _repository_watcher.stop()
+        _repository_watcher = None
+    if not WATCH_REPOSITORIES or base is None:
+        return
+    _repository_watcher = RepositoryWatcher(
+        base,
+        lambda added, removed, renamed: _apply_repository_changes(
+            base, generation, added, removed, renamed
+        ),
+        interval=WATCH_INTERVAL,
+    )
+    _repository_watcher.start()
 
 
-def refresh_repository_cache() -> None:
-    """Refresh repository cache; used at startup or when Samples path changes."""
-    global REPOSITORY_CACHE
-    REPOSITORY_CACHE = (
-        discover_repository_workbooks(SAMPLES_DIR)
-        if SAMPLES_DIR is not None
-        else {}
-    )
+def refresh_repository_cache(background: bool = False) -> None:
+    """Refresh repository cache; used at startup or when Samples path changes.
 
-load_repository_base()
+    With ``background=True`` and a persisted index for the base, the cache is
+    filled from the index immediately and the rescan runs in a thread.
+    """
+    global REPOSITORY_CACHE, _repository_generation
+    with _repository_lock:
+        _repository_generation += 1
+        generation = _repository_generation
+    base = SAMPLES_DIR
+    _watch_repository_base(base, generation)
+    if base is None:
+        repo_map = {}
+        indexed = None
+    else:
+        indexed = repository_index.load_index(base) if background else None
+        files = None if indexed is None else repository_index.indexed_files(indexed)
+        repo_map = discover_repository_workbooks(base, files)
+    with _repository_lock:
+        if generation == _repository_generation:
+            REPOSITORY_CACHE = repo_map
+    if indexed is None:
+        return
+
+    def _rescan() -> None:
+        global REPOSITORY_CACHE
+        try:
+            repo_map = discover_repository_workbooks(base)
+        except OSError:
+            return
+        with _repository_lock:
+            if generation == _repository_generation:
+                REPOSITORY_CACHE = repo_map
+
+    threading.Thread(target=_rescan, daemon=True).start()
+
+load_repository_base(background=True)
+
+
+def _cache_payload(
+    prepared: Dict[str, tuple], fingerprints: Dict[str, str] | None = None
+) -> Dict[str, Any]:
+    """Return the parse cache entry for sheets prepared by :func:`_prepare_source_sheet`."""
+    fingerprints = fingerprints or {}
+    return {
+        "sheets": {s: p[0] for s, p in prepared.items()},
+        "dropdowns": {s: p[2] for s, p in prepared.items()},
+        "lookups": {s: p[4] for s, p in prepared.items() if p[4]},
+        "mapping": {s: p[1] for s, p in prepared.items()},
+        "field_notes": {s: p[3] for s, p in prepared.items()},
+        "fingerprints": {
+            s: fingerprints.get(s) or sheet_fingerprint(p[0]) for s, p in prepared.items()
+        },
+        "source_fingerprints": {s: p[5] for s, p in prepared.items()},
+    }
 
 
 def _load_workbook_path(path: Path, filename: str) -> None:
-    """Load workbook at ``path`` and populate globals for UI rendering."""
+    """Load workbook at ``path`` and populate globals for UI rendering.
+
+    Sheets are materialized lazily: each one is converted and its mapping
+    metadata derived the first time ``workbook_data``, ``mapping_data``,
+    ``dropdown_data`` or ``field_notes`` is read for it. When
+    ``PARALLEL_WORKERS`` is enabled, large workbooks are instead prepared up
+    front across a process pool.
+    """
     global workbook_data, workbook_obj, dropdown_data, mapping_data, field_notes, original_filename, last_error, comparison_data, comparison_path
+    global sheet_fingerprints, source_fingerprints, _exported_fingerprints
 
     _clear_pending_import(clear_comparison=False)
+    _exported_fingerprints = {}
+    _combined_cache.clear()
 
-    with path.open("rb") as fh:
-        workbook_data, wb = load_workbook(fh)
-    workbook_obj = wb
+    file_bytes = path.read_bytes()
+    cache_key = workbook_cache.workbook_key(file_bytes)
+    _workbook_cache_keys[str(path)] = cache_key
+    cached = workbook_cache.load_cached(cache_key)
     original_filename = filename
-    dropdown_data = extract_dropdown_options(wb)
-    lookup_maps = extract_lookup_mappings(wb)
-
-    mapping_data = {}
-    field_notes = {}
-
-    for sheet, df in list(workbook_data.items()):
-        mapped_col = None
-        mapped_type: str | None = None  # "description" or "code"
-        sub_col = None
-        std_col = None
-        std_code_col = None
-        code_col = None
-        display_col = None
-        hidden_cols: list[str] = []
-        definition_col = None
-        for col in df.columns:
-            col_key = col.strip().upper().replace(" ", "_")
-            if col_key in ["MAPPED_STANDARD_DESCRIPTION", "MAPPED_STD_DESCRIPTION"]:
-                mapped_col = col
-                mapped_type = "description"
-            if col_key in ["MAPPED_STANDARD_CODE", "MAPPED_STD_CODE"]:
-                mapped_col = col
-                mapped_type = "code"
-            if col_key in [
-                "SUB_DEFINITION",
-                "SUB_DEFINITION_DESCRIPTION",
-                "SUBDEFINITION",
-                "SUB DEFINITION",
-            ]:
-                sub_col = col
-            if col_key in [
-                "STANDARD_DESCRIPTION",
-                "STD_DESCRIPTION",
-                "STANDARD_DESC",
-                "STADARD_DESCRIPTION",
-                "STADARD_DESC",
-            ]:
-                std_col = col
-            if col_key in ["STANDARD_CODE", "STD_CODE"]:
-                std_code_col = col
-            if col_key == "CODE":
-                code_col = col
-            if col_key in ["DISPLAY_VALUE", "DISPLAY"]:
-                display_col = col
-            if col_key == "DEFINITION":
-                definition_col = col
-                hidden_cols.append(col)
-
-        if mapped_col is None and std_col is None and std_code_col is None and definition_col:
-            mapped_col = definition_col
-            mapped_type = "description"
-            hidden_cols = [c for c in hidden_cols if c != mapped_col]
-
-        if mapped_col:
-            source_col = std_col if mapped_type != "code" else std_code_col
-            if source_col is None:
-                source_col = mapped_col
-            options = sorted({v for v in _str_series(df, source_col) if v})
-            sheet_opts = dropdown_data.setdefault(sheet, {})
-            if options and mapped_col not in sheet_opts:
-                sheet_opts[mapped_col] = options
-
-        sheet_map: Dict[str, str] = {}
-
-        if std_col and std_code_col:
-            std_series = _str_series(df, std_col)
-            code_series = _str_series(df, std_code_col)
-            mask = std_series != ""
-            if mapped_type == "code":
-                sheet_map.update({code: f"{code}^{desc}" for code, desc in zip(code_series[mask], std_series[mask])})
-            else:
-                sheet_map.update({desc: f"{code}^{desc}" for desc, code in zip(std_series[mask], code_series[mask])})
-
-        if mapped_col and not (std_col and std_code_col) and sub_col:
-            mapped_series = _str_series(df, mapped_col)
-            sub_series = _str_series(df, sub_col)
-            mask = mapped_series != ""
-            sheet_map.update({k: v for k, v in zip(mapped_series[mask], sub_series[mask])})
-
-        lookup_sheet = lookup_maps.get(sheet, {})
-        if sub_col and sub_col in lookup_sheet:
-            sheet_map = {**lookup_sheet[sub_col], **sheet_map}
-
-        if sub_col and mapped_col:
-            df[sub_col] = df[mapped_col].map(sheet_map).fillna(df[sub_col])
-
-        mapping_data[sheet] = {
-            "map": sheet_map,
-            "sub_col": sub_col,
-            "mapped_col": mapped_col,
-            "code_col": code_col,
-            "display_col": display_col,
-            "std_col": std_col,
-            "std_code_col": std_code_col,
-            "hidden_cols": hidden_cols,
-        }
-
-        if code_col and display_col and mapped_col:
-            code_series = _str_series(df, code_col)
-            display_series = _str_series(df, display_col)
-            blank_mask = code_series.eq("") & display_series.eq("")
-            if blank_mask.any():
-                df.loc[blank_mask, mapped_col] = ""
-                if sub_col:
-                    df.loc[blank_mask, sub_col] = ""
-        workbook_data[sheet] = df
-
-        note = ""
-        if code_col:
-            ws = wb[sheet]
-            for cell in ws[1]:
-                if (cell.value or "").strip() == code_col and cell.comment:
-                    note = cell.comment.text.strip()
-                    break
-        field_notes[sheet] = note
-
     comparison_data = {}
     comparison_path = None
     last_error = None
+    if cached is not None:
+        # The openpyxl workbook is only needed for export, so it is loaded
+        # lazily by ``_ensure_workbook_obj`` rather than parsed here.
+        workbook_obj = None
+        workbook_data = cached["sheets"]
+        dropdown_data = cached["dropdowns"]
+        mapping_data = cached["mapping"]
+        field_notes = cached["field_notes"]
+        sheet_fingerprints = cached["fingerprints"]
+        source_fingerprints = cached["source_fingerprints"]
+        return
+
+    parsed, source = read_workbook(io.BytesIO(file_bytes), lazy=True)
+    # The streaming reader cannot be saved, so in that case the openpyxl
+    # workbook is loaded by ``_ensure_workbook_obj`` when exporting.
+    workbook_obj = source if isinstance(source, Workbook) else None
+    if (
+        PARALLEL_WORKERS > 1
+        and workbook_obj is None
+        and len(parsed) >= PARALLEL_MIN_SHEETS
+    ):
+        payload = _cache_payload(
+            map_sheets(file_bytes, _prepare_source_sheet, PARALLEL_WORKERS, PARALLEL_MIN_SHEETS)
+        )
+        workbook_cache.store_cached(cache_key, payload)
+        workbook_data = payload["sheets"]
+        dropdown_data = payload["dropdowns"]
+        mapping_data = payload["mapping"]
+        field_notes = payload["field_notes"]
+        sheet_fingerprints = payload["fingerprints"]
+        source_fingerprints = payload["source_fingerprints"]
+        return
+
+    prepared: Dict[str, tuple] = {}
+    # Fingerprints of the prepared frames; ``fingerprints`` follows edits.
+    prepared_fingerprints: Dict[str, str] = {}
+    source_fingerprints = {}
+    lock = threading.RLock()
+
+    def _materialize(sheet: str) -> None:
+        with lock:
+            if sheet in prepared:
+                return
+            prepared[sheet] = _prepare_source_sheet(source, sheet, parsed[sheet])
+            df, info, sheet_opts, note, _, source_fp = prepared[sheet]
+            sheets.provide(sheet, df)
+            mappings.provide(sheet, info)
+            dropdowns.provide(sheet, sheet_opts)
+            notes.provide(sheet, note)
+            prepared_fingerprints[sheet] = sheet_fingerprint(df)
+            fingerprints.provide(sheet, prepared_fingerprints[sheet])
+            source_fingerprints[sheet] = source_fp
+            if len(prepared) == len(parsed):
+                # Cache the pristine parse once every sheet has been touched so
+                # edits made in the meantime never leak into the cache entry.
+                order = [s for s in parsed if s in prepared]
+                workbook_cache.store_cached(
+                    cache_key,
+                    _cache_payload({s: prepared[s] for s in order}, prepared_fingerprints),
+                )
+
+    sheets = LazySheets(parsed, _materialize, lock)
+    mappings = LazySheets(parsed, _materialize, lock)
+    dropdowns = LazySheets(parsed, _materialize, lock)
+    notes = LazySheets(parsed, _materialize, lock)
+    fingerprints = LazySheets(parsed, _materialize, lock)
+    workbook_data, mapping_data, dropdown_data, field_notes = sheets, mappings, dropdowns, notes
+    sheet_fingerprints = fingerprints
+
+
+def _update_sheet(sheet: str, df: pd.DataFrame) -> None:
+    """Replace the data of ``sheet`` with edited rows and refresh its fingerprint.
+
+    A staged import's diff of the sheet is recomputed when the data changed,
+    so its row positions keep pointing at the current rows.
+    """
+    previous = sheet_fingerprints.get(sheet)
+    workbook_data[sheet] = df
+    sheet_fingerprints[sheet] = sheet_fingerprint(df)
+    source_fingerprints.pop(sheet, None)
+    _combined_cache.pop(sheet, None)
+    if pending_import_active and sheet_fingerprints[sheet] != previous:
+        _refresh_pending_diff(sheet)
+
+
+def _refresh_pending_diff(sheet: str) -> None:
+    """Recompute the staged import's diff of ``sheet`` against its current data."""
+    global pending_import_diff
+
+    sheets = dict(pending_import_diff.get("sheets", {}))
+    sheet_diff = _sheet_diff(sheet, workbook_data.get(sheet), pending_import_data.get(sheet))
+    if sheet_diff is None:
+        sheets.pop(sheet, None)
+    else:
+        sheets[sheet] = sheet_diff
+    pending_import_diff = _summarize_diff({s: sheets[s] for s in sorted(sheets)})
+
+
+def _promote_staged_import() -> None:
+    """Make the staged import the active workbook without parsing it again.
+
+    Sheets whose source fingerprint matches the active sheet keep their
+    prepared data, fingerprints and metadata; only the other sheets are
+    prepared from the staged parse. The result is stored in the parse cache
+    under the staged file's key.
+    """
+    global workbook_data, dropdown_data, mapping_data, field_notes, workbook_obj
+    global sheet_fingerprints, source_fingerprints, _exported_fingerprints
+    global original_filename, last_error
+
+    source = pending_import_source
+    prepared: Dict[str, tuple] = {}
+    reused: Dict[str, str] = {}
+    for sheet, df in pending_import_data.items():
+        sheet_opts = extract_dropdown_options(source, [sheet]).get(sheet, {})
+        lookup_sheet = extract_lookup_mappings(source, [sheet]).get(sheet, {})
+        ws = source[sheet]
+        source_fp = _source_fingerprint(ws, df, sheet_opts, lookup_sheet)
+        if source_fingerprints.get(sheet) == source_fp and sheet in sheet_fingerprints:
+            prepared[sheet] = (
+                workbook_data[sheet],
+                mapping_data[sheet],
+                dropdown_data[sheet],
+                field_notes[sheet],
+                lookup_sheet,
+                source_fp,
+            )
+            reused[sheet] = sheet_fingerprints[sheet]
+        else:
+            df, info, note = _prepare_sheet(sheet, df, sheet_opts, lookup_sheet, ws)
+            prepared[sheet] = (df, info, sheet_opts, note, lookup_sheet, source_fp)
+
+    payload = _cache_payload(prepared, reused)
+    workbook_cache.store_cached(pending_import_key, payload)
+    _workbook_cache_keys[str(workbook_path)] = pending_import_key
+    workbook_obj = None
+    workbook_data = payload["sheets"]
+    dropdown_data = payload["dropdowns"]
+    mapping_data = payload["mapping"]
+    field_notes = payload["field_notes"]
+    sheet_fingerprints = payload["fingerprints"]
+    source_fingerprints = payload["source_fingerprints"]
+    _exported_fingerprints = {}
+    _combined_cache.clear()
+    original_filename = pending_import_name or workbook_path.name
+    last_error = None
+
+
+def _column_values(df: pd.DataFrame, columns: list) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``df`` as an object array laid out by ``columns``.
+
+    The second array flags the columns ``df`` has; the others hold ``""``.
+    """
+    values = np.full((len(df), len(columns)), "", dtype=object)
+    present = np.zeros(len(columns), dtype=bool)
+    plan = column_plan(df)
+    for position, col in enumerate(columns):
+        if col in df.columns:
+            values[:, position] = _densest_column(df, col, plan).to_numpy(dtype=object)
+            present[position] = True
+    return values, present
+
+
+def _row_ids(ids: Any) -> bool:
+    """Return whether ``ids`` is a list of diff row ids."""
+    return isinstance(ids, list) and all(
+        isinstance(row_id, int) and not isinstance(row_id, bool) for row_id in ids
+    )
+
+
+def _apply_import_selection(selection: Dict[str, Any]) -> Dict[str, int]:
+    """Apply the chosen rows of the staged import to the active sheets.
+
+    ``selection`` maps sheet names to ``{"added"|"removed"|"changed": ids}``
+    where ``ids`` lists the row ``id`` values of the staged diff, or is
+    ``true`` for every row of that kind. Changed rows take the incoming values of the
+    columns both sheets share, removed rows are dropped and added rows are
+    appended. Only the touched sheets are written back to disk, and their
+    staged diff is recomputed so the remaining rows can be applied later.
+    Returns the number of rows applied per kind; the active sheets are left
+    unchanged when writing the file fails.
+
+    Sheets that only exist in the import cannot be applied row by row, since
+    the open workbook has no tab to write them to; the whole import has to
+    be applied instead.
+    """
+    global workbook_obj
+
+    sheet_diffs = pending_import_diff.get("sheets", {})
+    located: Dict[str, Dict[str, tuple]] = {}
+    for sheet, kinds in selection.items():
+        if sheet not in sheet_diffs:
+            raise ValueError(f"No staged changes for sheet {sheet}")
+        if sheet not in workbook_data:
+            raise ValueError(f"Sheet {sheet} is new in the import; apply the whole import to add it")
+        if (
+            not isinstance(kinds, dict)
+            or not set(kinds) <= set(DIFF_KINDS)
+            or not all(ids is True or _row_ids(ids) for ids in kinds.values())
+        ):
+            raise ValueError(f"Invalid selection for sheet {sheet}")
+        located[sheet] = {
+            kind: sheet_diffs[sheet].locate(kind, None if ids is True else ids)
+            for kind, ids in kinds.items()
+            if ids
+        }
+
+    applied = dict.fromkeys(DIFF_KINDS, 0)
+    touched: Dict[str, pd.DataFrame] = {}
+    for sheet, kinds in located.items():
+        base = workbook_data[sheet]
+        columns = base.columns
+        values = base.to_numpy(dtype=object, copy=True)
+        staged = pending_import_data.get(sheet)
+        if staged is None:  # the import drops the sheet: only removed rows
+            staged = base.iloc[:0]
+        incoming, present = _column_values(staged, list(columns))
+        keep = np.ones(len(base), dtype=bool)
+        added = incoming[:0]
+        if "changed" in kinds:
+            base_pos, new_pos = kinds["changed"]
+            values[np.ix_(base_pos, present)] = incoming[np.ix_(new_pos, present)]
+            applied["changed"] += len(base_pos)
+        if "removed" in kinds:
+            keep[kinds["removed"][0]] = False
+            applied["removed"] += len(kinds["removed"][0])
+        if "added" in kinds:
+            added = incoming[kinds["added"][1]]
+            applied["added"] += len(added)
+        touched[sheet] = pd.DataFrame(np.vstack([values[keep], added]), columns=columns)
+
+    if not touched:
+        return applied
+    # The file is written before the active sheets change, so a failed write
+    # leaves both untouched.
+    _ensure_workbook_obj()
+    tmp_path = workbook_path.with_name(workbook_path.name + ".tmp")
+    try:
+        export_workbook(workbook_obj, touched, tmp_path)
+        tmp_path.replace(workbook_path)
+    except Exception:
+        # ``workbook_obj`` may hold part of the selection; it is reloaded
+        # from the unchanged file when next needed.
+        workbook_obj = None
+        tmp_path.unlink(missing_ok=True)
+        raise
+    for sheet, df in touched.items():
+        _update_sheet(sheet, df)
+    _exported_fingerprints.update({sheet: sheet_fingerprints[sheet] for sheet in touched})
+    return applied
+
+
+def _ensure_workbook_obj() -> Workbook | None:
+    """Return the openpyxl workbook for the active file, loading it on demand."""
+    global workbook_obj
+    if workbook_obj is None and workbook_path is not None and workbook_data:
+        with workbook_path.open("rb") as fh:
+            workbook_obj = load_formula_workbook(fh)
+    return workbook_obj
+
+
+def _comparison_columns(header: list) -> Dict[str, int]:
+    """Return the comparison column names mapped to their positions in ``header``."""
+    roles = resolve_columns(header)
+    positions: Dict[str, int] = {}
+    if roles.code is not None:
+        positions["CODE_COMPARE"] = roles.positions["code"]
+    if roles.display is not None:
+        positions["DISPLAY_VALUE_COMPARE"] = roles.positions["display"]
+    if roles.mapped is not None:
+        positions[f"{roles.mapped}_COMPARE"] = roles.positions["mapped"]
+    return positions
+
+
+def _comparison_frames(data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Return the comparison columns of every sheet in ``data``.
+
+    Sheets without key columns are left out, as are rows that are empty in
+    every key column; the remaining rows keep their sheet position as index.
+    """
+    frames: Dict[str, pd.DataFrame] = {}
+    for sheet, df in data.items():
+        positions = _comparison_columns(df.columns.tolist())
+        if not positions:
+            continue
+        frame = pd.DataFrame(
+            {name: df.iloc[:, position] for name, position in positions.items()}
+        )
+        frames[sheet] = frame[frame.ne("").any(axis=1)]
+    return frames
+
+
+def _comparison_key(path: Path) -> tuple:
+    """Return the :data:`_comparison_lru` key of the workbook at ``path``."""
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+def _remember_comparison(key: tuple, data: Dict[str, pd.DataFrame]) -> None:
+    """Add ``data`` to :data:`_comparison_lru`, evicting entries over the budget."""
+    size = sum(int(df.memory_usage(index=True, deep=True).sum()) for df in data.values())
+    with _comparison_lru_lock:
+        _comparison_lru.pop(key, None)
+        if size > COMPARE_CACHE_BYTES:
+            return
+        _comparison_lru[key] = (size, data)
+        total = sum(entry_size for entry_size, _ in _comparison_lru.values())
+        while total > COMPARE_CACHE_BYTES:
+            _, (evicted, _) = _comparison_lru.popitem(last=False)
+            total -= evicted
+
+
+def _recall_comparison(key: tuple) -> Dict[str, pd.DataFrame] | None:
+    """Return the dataset cached under ``key``, marking it recently used."""
+    with _comparison_lru_lock:
+        entry = _comparison_lru.get(key)
+        if entry is None:
+            return None
+        _comparison_lru.move_to_end(key)
+        return entry[1]
+
+
+def _forget_comparisons(paths: list[Path]) -> None:
+    """Drop the cached comparison datasets of ``paths``."""
+    names = {str(path.resolve()) for path in paths}
+    with _comparison_lru_lock:
+        for key in [key for key in _comparison_lru if key[0] in names]:
+            del _comparison_lru[key]
 
 
 def _load_comparison_workbook_path(path: Path) -> None:
-    """Load a comparison workbook keeping only key columns."""
+    """Load a comparison workbook keeping only key columns.
+
+    Recently compared workbooks are served from :data:`_comparison_lru` while
+    their file is unchanged. Otherwise only the CODE, display and mapped
+    columns are read from each sheet (see :func:`read_columns`) and the result
+    is kept in :mod:`workbook_cache`, so even a workbook that dropped out of the
+    in-memory cache is not parsed again.
+    """
     global comparison_data, comparison_path
-    comparison_data = {}
-    with path.open("rb") as fh:
-        data, _ = load_workbook(fh)
-    for sheet, df in data.items():
-        code_col = None
-        display_col = None
-        mapped_col = None
-        for col in df.columns:
-            col_key = col.strip().upper().replace(" ", "_")
-            if col_key == "CODE":
-                code_col = col
-            if col_key in ["DISPLAY_VALUE", "DISPLAY"]:
-                display_col = col
-            if col_key in [
-                "MAPPED_STD_DESCRIPTION",
-                "MAPPED_STANDARD_DESCRIPTION",
-                "MAPPED_STD_CODE",
-                "MAPPED_STANDARD_CODE",
-            ]:
-                mapped_col = col
-        cols: Dict[str, Any] = {}
-        if code_col:
-            cols["CODE_COMPARE"] = df[code_col]
-        if display_col:
-            cols["DISPLAY_VALUE_COMPARE"] = df[display_col]
-        if mapped_col:
-            cols[f"{mapped_col}_COMPARE"] = df[mapped_col]
-        if cols:
-            comparison_data[sheet] = pd.DataFrame(cols)
+    lru_key = _comparison_key(path)
+    data = _recall_comparison(lru_key)
+    if data is None:
+        file_bytes = path.read_bytes()
+        workbook_key = workbook_cache.workbook_key(file_bytes)
+        _workbook_cache_keys[str(path)] = workbook_key
+        cache_key = f"{workbook_key}-compare"
+        cached = workbook_cache.load_cached(cache_key)
+        if cached is not None:
+            data = cached["comparison"]
+        else:
+            data = _comparison_frames(
+                read_columns(
+                    io.BytesIO(file_bytes), lambda header: _comparison_columns(header).values()
+                )
+            )
+            workbook_cache.store_cached(cache_key, {"comparison": data})
+        _remember_comparison(lru_key, data)
+    # The dict is copied so clearing the active comparison leaves the cached
+    # entry intact.
+    comparison_data = dict(data)
     comparison_path = path
+    _combined_cache.clear()
 
 
+def _key_values(df: pd.DataFrame, col: str | None, plan: ColumnPlan | None = None) -> np.ndarray:
+    """Return the stripped values of ``col`` for row alignment, blank if absent."""
+    if not col or col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    return _densest_column(df, col, plan).fillna("").astype(str).str.strip().to_numpy(dtype=object)
 
-def _combine_sheet(sheet: str) -> pd.DataFrame | None:
-    """Return sheet data with comparison columns merged in."""
+
+def _combined_entry(sheet: str) -> Dict[str, Any]:
+    """Return the :data:`_combined_cache` entry of ``sheet``.
+
+    An entry is only reused while the base and comparison frames are the very
+    objects it was built from; edits, loads and imports replace those frames.
+    """
     df = workbook_data.get(sheet)
-    if df is None:
-        return None
     cmp_df = comparison_data.get(sheet)
-    if cmp_df is None:
-        return df
-    combined = df.copy()
+    entry = _combined_cache.get(sheet)
+    if entry is None or entry["base"] is not df or entry["compare"] is not cmp_df:
+        entry = _combined_cache[sheet] = {"base": df, "compare": cmp_df}
+    return entry
+
 
-    cmp_df = cmp_df.copy()
+def _column_plan(sheet: str) -> ColumnPlan | None:
+    """Return the :class:`ColumnPlan` of the current data of ``sheet``.
 
-    max_rows = max(len(combined), len(cmp_df))
-    if max_rows:
-        combined = combined.reindex(range(max_rows)).reset_index(drop=True)
-        cmp_df = cmp_df.reindex(range(max_rows)).reset_index(drop=True)
+    The plan is resolved once per version of the sheet and kept in its
+    :data:`_combined_cache` entry.
+    """
+    entry = _combined_entry(sheet)
+    if "plan" not in entry:
+        entry["plan"] = None if entry["base"] is None else column_plan(entry["base"])
+    return entry["plan"]
+
+
+def _combined_plan(sheet: str) -> ColumnPlan | None:
+    """Return the :class:`ColumnPlan` of :func:`_combine_sheet`."""
+    entry = _combined_entry(sheet)
+    if "combined_plan" not in entry:
+        df = _combine_sheet(sheet)
+        entry["combined_plan"] = None if df is None else column_plan(df)
+    return entry["combined_plan"]
+
+
+def _aligned_comparison(sheet: str) -> tuple[pd.DataFrame, Dict[str, Any]] | None:
+    """Return the comparison rows of ``sheet`` aligned to its base rows.
+
+    Rows are matched by CODE and then, among the rows still unmatched, by
+    display value. Row ``i`` of the returned frame is the comparison row
+    matching base row ``i`` (blank when there is none); comparison rows that
+    match no base row follow the base rows. Sheets without either key column
+    on both sides pair rows by their row in the sheet. The second item reports the
+    matched and unmatched row counts.
+    """
+    entry = _combined_entry(sheet)
+    if "aligned" not in entry:
+        entry["aligned"] = _align_comparison(sheet, entry["base"], entry["compare"])
+    return entry["aligned"]
+
+
+def _align_comparison(
+    sheet: str, df: pd.DataFrame | None, cmp_df: pd.DataFrame | None
+) -> tuple[pd.DataFrame, Dict[str, Any]] | None:
+    """Compute :func:`_aligned_comparison` for the frames ``df`` and ``cmp_df``."""
+    if df is None or cmp_df is None:
+        return None
+    info = mapping_data.get(sheet, {})
+    pairs = [
+        (info.get("code_col"), "CODE_COMPARE"),
+        (info.get("display_col"), "DISPLAY_VALUE_COMPARE"),
+    ]
+    pairs = [(col, cmp_col) for col, cmp_col in pairs if col and cmp_col in cmp_df]
+    if pairs:
+        match = align_rows(
+            [_key_values(df, col, _column_plan(sheet)) for col, _ in pairs],
+            [_key_values(cmp_df, cmp_col) for _, cmp_col in pairs],
+        )
+    elif df.index.is_unique and cmp_df.index.is_unique:
+        # Both frames keep each row's sheet position as its label, so rows
+        # left out of the comparison for blank keys do not shift later rows.
+        match = cmp_df.index.get_indexer(df.index).astype(np.int64)
     else:
-        combined = combined.iloc[0:0].copy()
-        cmp_df = cmp_df.iloc[0:0].copy()
+        match = np.arange(len(df))
+        match[match >= len(cmp_df)] = -1
+    taken = np.zeros(len(cmp_df), dtype=bool)
+    taken[match[match >= 0]] = True
+    order = np.concatenate([match, np.flatnonzero(~taken)])
+    aligned = cmp_df.reset_index(drop=True).reindex(order).reset_index(drop=True).fillna("")
+    stats = {
+        "key": pairs[0][0] if pairs else None,
+        "matched": int((match >= 0).sum()),
+        "unmatched_base": int((match < 0).sum()),
+        "unmatched_compare": int((~taken).sum()),
+    }
+    return aligned, stats
+
 
+def _compare_columns(sheet: str, cmp_df: pd.DataFrame) -> list[tuple[str, str]]:
+    """Return the ``(column, comparison column)`` pairs shown side by side for ``sheet``."""
     info = mapping_data.get(sheet, {})
-    code_col = info.get("code_col")
-    display_col = info.get("display_col")
     mapped_col = info.get("mapped_col")
-    if code_col and "CODE_COMPARE" in cmp_df:
-        combined.insert(
-            combined.columns.get_loc(code_col) + 1,
-            "CODE_COMPARE",
-            cmp_df["CODE_COMPARE"],
-        )
-    if display_col and "DISPLAY_VALUE_COMPARE" in cmp_df:
-        combined.insert(
-            combined.columns.get_loc(display_col) + 1,
-            "DISPLAY_VALUE_COMPARE",
-            cmp_df["DISPLAY_VALUE_COMPARE"],
-        )
-    if mapped_col:
-        cmp_key = f"{mapped_col}_COMPARE"
-        if cmp_key in cmp_df:
-            combined.insert(
-                combined.columns.get_loc(mapped_col) + 1,
-                cmp_key,
-                cmp_df[cmp_key],
-            )
+    pairs = [
+        (info.get("code_col"), "CODE_COMPARE"),
+        (info.get("display_col"), "DISPLAY_VALUE_COMPARE"),
+        (mapped_col, f"{mapped_col}_COMPARE"),
+    ]
+    return [(col, cmp_col) for col, cmp_col in pairs if col and cmp_col in cmp_df]
+
+
+def _combined_columns(sheet: str) -> list:
+    """Return the columns of :func:`_combine_sheet` without building the frame."""
+    df = workbook_data.get(sheet)
+    if df is None:
+        return []
+    columns = df.columns.tolist()
+    cmp_df = comparison_data.get(sheet)
+    if cmp_df is not None:
+        for col, cmp_col in _compare_columns(sheet, cmp_df):
+            columns.insert(columns.index(col) + 1, cmp_col)
+    return columns
+
+
+def _combine_sheet(sheet: str) -> pd.DataFrame | None:
+    """Return sheet data with comparison columns merged in.
+
+    Comparison rows are aligned by key (see :func:`_aligned_comparison`);
+    unmatched comparison rows are appended below blank base rows. The frame
+    is built once per version of the sheet and comparison and must not be
+    modified by callers.
+    """
+    entry = _combined_entry(sheet)
+    if "combined" not in entry:
+        entry["combined"] = _build_combined_sheet(sheet, entry["base"])
+    return entry["combined"]
+
+
+def _build_combined_sheet(sheet: str, df: pd.DataFrame | None) -> pd.DataFrame | None:
+    if df is None:
+        return None
+    aligned = _aligned_comparison(sheet)
+    if aligned is None:
+        return df
+    cmp_df = aligned[0]
+    combined = df.reset_index(drop=True).reindex(range(len(cmp_df)))
+    for col, cmp_col in _compare_columns(sheet, cmp_df):
+        combined.insert(combined.columns.get_loc(col) + 1, cmp_col, cmp_df[cmp_col])
     return combined.fillna("")
 
+
+def _loaded_sheet_names() -> list[str]:
+    """Return the sheets whose data has been materialized, in workbook order."""
+    if isinstance(workbook_data, LazySheets):
+        return [s for s in workbook_data if workbook_data.is_loaded(s)]
+    return list(workbook_data)
+
+
+def _sheet_meta(sheet: str) -> Dict[str, Any]:
+    """Return the headers and mapping metadata the client needs to render ``sheet``."""
+    df = workbook_data[sheet]
+    hidden = mapping_data.get(sheet, {}).get("hidden_cols", [])
+    aligned = _aligned_comparison(sheet)
+    render_cols = [c for c in _combined_columns(sheet) if c not in hidden]
+    return {
+        "headers": df.columns.tolist(),
+        "render_headers": render_cols,
+        "mapping": mapping_data.get(sheet, {}),
+        "dropdowns": dropdown_data.get(sheet, {}),
+        "field_note": field_notes.get(sheet, ""),
+        "comparison": aligned[1] if aligned else None,
+    }
+
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     global workbook_data
+    global sheet_fingerprints, source_fingerprints
     global dropdown_data
     global last_error
     global mapping_data
@@ -657,6 +1199,7 @@ def index():
         elif request.form.get("end_compare"):
             comparison_data.clear()
             comparison_path = None
+            _combined_cache.clear()
             compare_mode = False
         elif request.form.get("start_compare"):
             compare_mode = True
@@ -690,6 +1233,8 @@ def index():
                         workbook_data = {}
                         dropdown_data = {}
                         mapping_data = {}
+                        sheet_fingerprints = {}
+                        source_fingerprints = {}
                     if tmp_path and tmp_path.exists():
                         try:
                             tmp_path.unlink()
@@ -719,6 +1264,8 @@ def index():
                 workbook_data = {}
                 dropdown_data = {}
                 mapping_data = {}
+                sheet_fingerprints = {}
+                source_fingerprints = {}
         elif request.form.get("compare_repo") and request.form.get("compare_workbook_name"):
             try:
                 repo = request.form.get("compare_repo")
@@ -769,44 +1316,43 @@ def index():
         repo_files = REPOSITORY_CACHE.get(selected_repo, [])
 
     sheet_names = list(workbook_data.keys())
-    base_headers: Dict[str, list] = {s: df.columns.tolist() for s, df in workbook_data.items()}
-    render_headers: Dict[str, list] = {}
-    for s in sheet_names:
-        cols = _combine_sheet(s).columns.tolist()
-        hidden = mapping_data.get(s, {}).get("hidden_cols", [])
-        cols = [c for c in cols if c not in hidden]
-        render_headers[s] = cols
     initial_sheet = sheet_names[0] if sheet_names else None
-    initial_records = _records(_combine_sheet(initial_sheet)) if initial_sheet else []
-    base_initial_records = _records(workbook_data.get(initial_sheet)) if initial_sheet else []
-    initial_compare_records = (
-        _records(comparison_data.get(initial_sheet, pd.DataFrame())) if initial_sheet else []
+    if initial_sheet:
+        workbook_data[initial_sheet]
+    # Only sheets that are already materialized are described in the page;
+    # the client fetches ``/sheet/<name>/meta`` for the others on first view.
+    loaded_sheets = _loaded_sheet_names()
+    sheet_meta = {s: _sheet_meta(s) for s in loaded_sheets}
+    base_headers: Dict[str, list] = {s: m["headers"] for s, m in sheet_meta.items()}
+    render_headers: Dict[str, list] = {s: m["render_headers"] for s, m in sheet_meta.items()}
+    base_table = (
+        _table(workbook_data[initial_sheet], plan=_column_plan(initial_sheet))
+        if initial_sheet
+        else _table(None)
     )
+    aligned_compare = _aligned_comparison(initial_sheet) if initial_sheet else None
+    compare_table = _table(aligned_compare[0] if aligned_compare else None)
     comparison_repos = [r for r in repo_names if r != selected_repo]
     try:
         transformer_url = url_for("export_transformer")
     except BuildError:
         transformer_url = None
 
-    initial_errors: list[str] = []
-    if workbook_data:
-        try:
-            initial_errors = validate_workbook(workbook_data, mapping_data)
-        except Exception:
-            initial_errors = []
+    # Errors of the other sheets are fetched from ``/validation`` after the
+    # first paint so rendering does not materialize every sheet.
+    initial_errors = _workbook_errors(loaded_sheets)
 
-    return render_template(
+    page = render_template(
         "index.html",
         sheet_names=sheet_names,
         initial_sheet=initial_sheet,
-        initial_records=initial_records,
-        base_records=base_initial_records,
-        compare_records=initial_compare_records,
+        base_table=base_table,
+        compare_table=compare_table,
         headers=base_headers,
         render_headers=render_headers,
-        dropdowns=dropdown_data,
-        mappings=mapping_data,
-        field_notes=field_notes,
+        dropdowns={s: m["dropdowns"] for s, m in sheet_meta.items()},
+        mappings={s: m["mapping"] for s, m in sheet_meta.items()},
+        field_notes={s: m["field_note"] for s, m in sheet_meta.items()},
         error=last_error,
         filename=original_filename,
         repositories=repo_names,
@@ -824,18 +1370,179 @@ def index():
         reopen_controls=reopen_controls,
         transformer_url=transformer_url,
         initial_errors=initial_errors,
-        pending_import=pending_import_diff,
+        pending_import=_diff_overview(pending_import_diff),
         pending_import_active=pending_import_active,
         pending_import_name=pending_import_name,
     )
+    return compress_response(make_response(page))
+
+
+def _sheet_window_positions(
+    sheet: str,
+    df: pd.DataFrame,
+    query: str = "",
+    column: str | None = None,
+    unmapped: bool = False,
+    sort: str | None = None,
+    descending: bool = False,
+) -> np.ndarray:
+    """Return the 0-based rows of ``df`` that pass the filters, in sort order.
+
+    ``query`` keeps rows containing the text, case-insensitively, in
+    ``column`` or in any column. ``unmapped`` keeps rows with a code or
+    display value but an empty mapped column. Sorting is stable, so rows with
+    equal values keep their sheet order. Unknown columns raise ``KeyError``.
+    """
+    plan = _combined_plan(sheet)
+    keep = np.ones(len(df), dtype=bool)
+    if query:
+        if column is not None:
+            if column not in df.columns:
+                raise KeyError(column)
+            searched = [i for i, col in enumerate(df.columns) if col == column]
+        else:
+            searched = range(df.shape[1])
+        found = np.zeros(len(df), dtype=bool)
+        for i in searched:
+            values = df.iloc[:, i].astype(str)
+            found |= values.str.contains(query, case=False, regex=False).to_numpy()
+        keep &= found
+    if unmapped:
+        info = mapping_data.get(sheet, {})
+        mapped_col = info.get("mapped_col")
+        keys = [c for c in (info.get("code_col"), info.get("display_col")) if c in df.columns]
+        if mapped_col in df.columns and keys:
+            has_key = np.zeros(len(df), dtype=bool)
+            for col in keys:
+                has_key |= _densest_column(df, col, plan).astype(str).str.strip().ne("").to_numpy()
+            mapped = _densest_column(df, mapped_col, plan).astype(str).str.strip().ne("").to_numpy()
+            keep &= has_key & ~mapped
+    positions = np.flatnonzero(keep)
+    if sort:
+        if sort not in df.columns:
+            raise KeyError(sort)
+        values = _densest_column(df, sort, plan).astype(str).to_numpy()[positions]
+        order = pd.Series(values).sort_values(ascending=not descending, kind="stable")
+        positions = positions[order.index.to_numpy()]
+    return positions
+
+
+def _sheet_payload(sheet: str, df: pd.DataFrame | None, args, fmt: str) -> Any:
+    """Build the ``/sheet`` response for query ``args``; see :func:`sheet_data`.
+
+    Raises ``ValueError`` for invalid arguments and ``LookupError`` when a
+    window of a missing sheet is requested.
+    """
+
+    plan = _combined_plan(sheet)
+
+    def rows(frame: pd.DataFrame | None) -> Any:
+        return _records(frame, plan) if fmt == "records" else _table(frame, fmt, plan)
+
+    if not any(arg in args for arg in SHEET_WINDOW_ARGS):
+        return rows(df)
+    if df is None:
+        raise LookupError(sheet)
+    order = args.get("order", "asc").lower()
+    if order not in ("asc", "desc"):
+        raise ValueError("Invalid order")
+    try:
+        positions = _sheet_window_positions(
+            sheet,
+            df,
+            query=args.get("q", "").strip(),
+            column=args.get("column") or None,
+            unmapped=args.get("unmapped", "").lower() in ("1", "true", "yes"),
+            sort=args.get("sort") or None,
+            descending=order == "desc",
+        )
+    except KeyError as exc:
+        raise ValueError(f"Unknown column: {exc.args[0]}") from None
+    offset = max(args.get("offset", 0, type=int), 0)
+    limit = min(max(args.get("limit", SHEET_PAGE_SIZE, type=int), 1), SHEET_PAGE_MAX)
+    window = positions[offset : offset + limit]
+    return {
+        "sheet": sheet,
+        "offset": offset,
+        "limit": limit,
+        "total": int(len(positions)),
+        "row_count": int(len(df)),
+        "positions": window.tolist(),
+        "rows": rows(df.iloc[window]),
+    }
 
 
 @app.route("/sheet/<sheet_name>", endpoint="sheet_data")
 def sheet_data(sheet_name: str):
-    df = _combine_sheet(sheet_name)
-    if df is None:
-        return jsonify([])
-    return jsonify(_records(df))
+    """Return the rows of a sheet merged with any comparison.
+
+    Without query arguments every row is returned as a list. With any of
+    ``offset``, ``limit``, ``sort``, ``order`` (``asc``/``desc``), ``q``,
+    ``column`` or ``unmapped`` only one window of the filtered, sorted rows
+    is returned along with the total counts and each row's sheet position.
+    ``format=rows`` or ``format=columns`` sends the rows as a header list plus
+    row or column arrays (see :func:`_table`) instead of record dicts.
+
+    Encoded bodies are kept with the sheet's combined frame, so repeated
+    requests skip encoding and compression and revalidate by ``ETag``.
+    """
+    fmt = request.args.get("format", "records")
+    if fmt not in SHEET_FORMATS:
+        return "Invalid format", 400
+    if sheet_name not in workbook_data and sheet_name not in comparison_data:
+        return "Sheet not found", 404
+    entry = _combined_entry(sheet_name)
+    responses = entry.setdefault("responses", OrderedDict())
+    key = tuple(sorted(request.args.items(multi=True)))
+    cached = responses.get(key)
+    if cached is None:
+        try:
+            payload = _sheet_payload(sheet_name, _combine_sheet(sheet_name), request.args, fmt)
+        except LookupError:
+            return "Sheet not found", 404
+        except ValueError as exc:
+            return str(exc), 400
+        body = encode_json(payload)
+        cached = responses[key] = (body, body_etag(body), {})
+        while len(responses) > SHEET_RESPONSE_CACHE:
+            responses.popitem(last=False)
+    else:
+        responses.move_to_end(key)
+    body, etag, variants = cached
+    return json_response(body, etag, variants)
+
+
+def _workbook_errors(sheets: list[str]) -> list[str]:
+    """Return the validation errors of ``sheets`` of the open workbook."""
+    if not sheets:
+        return []
+    try:
+        return validate_workbook(
+            {s: workbook_data[s] for s in sheets},
+            mapping_data,
+            fingerprints=sheet_fingerprints,
+            cache=_validation_cache,
+        )
+    except Exception:
+        return []
+
+
+@app.route("/validation")
+def workbook_validation():
+    """Return the validation errors of the open workbook by sheet.
+
+    Sheets without errors are omitted.
+    """
+    errors = {sheet: _workbook_errors([sheet]) for sheet in workbook_data}
+    return jsonify({"errors": {sheet: found for sheet, found in errors.items() if found}})
+
+
+@app.route("/sheet/<sheet_name>/meta", endpoint="sheet_meta")
+def sheet_meta(sheet_name: str):
+    """Return headers, mapping info, dropdowns and field note for a sheet."""
+    if sheet_name not in workbook_data:
+        return jsonify({}), 404
+    return jsonify(_sheet_meta(sheet_name))
 
 
 @app.route("/workbooks/<path:repo>")
@@ -844,6 +1551,111 @@ def list_workbooks(repo: str):
     return jsonify(REPOSITORY_CACHE.get(repo, []))
 
 
+def _resolve_repository_workbook(repo: str, workbook_name: str) -> Path:
+    """Return the path of ``workbook_name`` in ``repo`` below ``SAMPLES_DIR``."""
+    if SAMPLES_DIR is None:
+        raise FileNotFoundError("Repository folder not selected")
+    base = SAMPLES_DIR.resolve()
+    repo_path = base if repo == "SharedRepositories" else (SAMPLES_DIR / repo).resolve()
+    if not repo_path.is_dir() or not repo_path.is_relative_to(base):
+        raise FileNotFoundError("Repository not found")
+    path = (repo_path / workbook_name).resolve()
+    if not path.is_file() or not path.is_relative_to(base):
+        raise FileNotFoundError("Workbook not found")
+    return path
+
+
+def _multi_compare_summary() -> Dict[str, Any]:
+    return {
+        "sources": multi_compare_sources,
+        "sheets": {sheet: matrix.summary() for sheet, matrix in multi_compare_data.items()},
+    }
+
+
+@app.route("/compare/multi", methods=["GET", "POST"])
+def multi_compare():
+    """Compare how several repository workbooks map each CODE.
+
+    ``POST`` a JSON body ``{"workbooks": [{"repo": ..., "workbook": ...}, ...]}``
+    to load the workbooks and build the comparison; both methods return the
+    compared workbooks with consensus/disagreement counts per sheet.
+    """
+    global multi_compare_sources, multi_compare_data
+    if request.method == "GET":
+        if not multi_compare_sources:
+            return "No comparison loaded", 404
+        return jsonify(_multi_compare_summary())
+
+    payload = request.get_json(silent=True) or {}
+    entries = payload.get("workbooks")
+    if not isinstance(entries, list) or len(entries) < 2:
+        return "Select at least two workbooks", 400
+    try:
+        sources = [
+            {"repo": str(entry["repo"]), "workbook": str(entry["workbook"])}
+            for entry in entries
+        ]
+        paths = [_resolve_repository_workbook(e["repo"], e["workbook"]) for e in sources]
+    except (KeyError, TypeError):
+        return "Invalid payload", 400
+    except FileNotFoundError as exc:
+        return str(exc), 404
+    try:
+        tables = load_code_tables(paths, COMPARE_WORKERS)
+    except Exception as exc:
+        return str(exc), 400
+    multi_compare_sources = sources
+    multi_compare_data = compare_workbooks(tables)
+    return jsonify(_multi_compare_summary())
+
+
+@app.route("/compare/multi/<sheet_name>")
+def multi_compare_rows(sheet_name: str):
+    """Return one page of the code matrix of ``sheet_name``.
+
+    ``status`` limits the page to ``consensus``, ``partial``, ``conflict`` or
+    ``unmapped`` codes.
+    """
+    matrix = multi_compare_data.get(sheet_name)
+    if matrix is None:
+        return "Sheet not found", 404
+    status = request.args.get("status") or None
+    if status is not None and status not in MATRIX_STATUSES:
+        return "Invalid status", 400
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(max(request.args.get("limit", DIFF_PAGE_SIZE, type=int), 1), DIFF_PAGE_MAX)
+    total, rows = matrix.rows(offset, limit, status)
+    return jsonify(
+        {
+            "sheet": sheet_name,
+            "sources": multi_compare_sources,
+            "status": status,
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "rows": rows,
+        }
+    )
+
+
+@app.route("/compare/multi/clear", methods=["POST"])
+def clear_multi_compare():
+    """Discard the N-way comparison."""
+    global multi_compare_sources, multi_compare_data
+    multi_compare_sources = []
+    multi_compare_data = {}
+    return jsonify({"status": "cleared"})
+
+
+@app.route("/cache/clear", methods=["POST"])
+def clear_workbook_cache():
+    """Discard every cached parse so workbooks are re-read from disk."""
+    removed = workbook_cache.invalidate()
+    with _comparison_lru_lock:
+        _comparison_lru.clear()
+    return jsonify({"status": "cleared", "removed": removed})
+
+
 @app.route("/transformer")
 def export_transformer():
     """Generate an XML transformer from the currently loaded workbook."""
@@ -860,6 +1672,8 @@ def export_transformer():
         workbook_data,
         mapping_data,
         skip_mapped_requirement_sheets=skip_mapped_requirement,
+        fingerprints=sheet_fingerprints,
+        cache=_validation_cache,
     )
     if errors:
         return jsonify({"errors": errors}), 400
@@ -872,7 +1686,9 @@ def export_transformer():
         except json.JSONDecodeError:
             free_map = {}
 
-    xml_str = build_transformer_xml(workbook_data, free_map)
+    xml_str = build_transformer_xml(
+        workbook_data, free_map, fingerprints=sheet_fingerprints, cache=_transformer_cache
+    )
     return send_file(
         io.BytesIO(xml_str.encode("utf-8")),
         mimetype="application/xml",
@@ -885,7 +1701,7 @@ def export_transformer():
 def export():
     """Export the in-memory workbook with updated values."""
     global workbook_obj, workbook_data, original_filename, workbook_path
-    if workbook_obj is None or workbook_path is None:
+    if _ensure_workbook_obj() is None or workbook_path is None:
         return "No workbook loaded", 400
 
     payload = request.get_json() or {}
@@ -899,19 +1715,27 @@ def export():
 
     for sheet, rows in workbook_payload.items():
         if sheet in workbook_data:
-            df = pd.DataFrame(rows, columns=workbook_data[sheet].columns)
-            df = df.where(pd.notna(df), "")
-            workbook_data[sheet] = df
+            _update_sheet(sheet, _column_plan(sheet).expand(rows, workbook_data[sheet]))
 
-    errors = validate_workbook(workbook_data, mapping_data)
+    errors = validate_workbook(
+        workbook_data, mapping_data, fingerprints=sheet_fingerprints, cache=_validation_cache
+    )
     if errors:
         return jsonify({"errors": errors}), 400
 
     # Write to a temporary file and atomically replace the original so the
     # on-disk workbook is always updated in place
+    # Sheets unchanged since they were last written to ``workbook_obj`` are
+    # skipped; rewriting them would store the same values again.
+    changed = {
+        sheet: df
+        for sheet, df in workbook_data.items()
+        if _exported_fingerprints.get(sheet) != sheet_fingerprints.get(sheet)
+    }
     tmp_path = workbook_path.with_name(workbook_path.name + ".tmp")
-    export_workbook(workbook_obj, workbook_data, tmp_path, locks)
+    export_workbook(workbook_obj, changed, tmp_path, locks)
     tmp_path.replace(workbook_path)
+    _exported_fingerprints.update({sheet: sheet_fingerprints[sheet] for sheet in changed})
 
     filename = original_filename or workbook_path.name
     return jsonify({"status": "ok", "filename": filename})
@@ -921,7 +1745,7 @@ def export():
 def export_errors():
     """Return a CSV file listing validation errors for the current data."""
     global workbook_data, workbook_obj, workbook_path
-    if workbook_obj is None or workbook_path is None:
+    if _ensure_workbook_obj() is None or workbook_path is None:
         return "No workbook loaded", 400
 
     payload = request.get_json() or {}
@@ -934,11 +1758,11 @@ def export_errors():
 
     for sheet, rows in workbook_payload.items():
         if sheet in workbook_data:
-            df = pd.DataFrame(rows, columns=workbook_data[sheet].columns)
-            df = df.where(pd.notna(df), "")
-            workbook_data[sheet] = df
+            _update_sheet(sheet, _column_plan(sheet).expand(rows, workbook_data[sheet]))
 
-    errors = validate_workbook(workbook_data, mapping_data)
+    errors = validate_workbook(
+        workbook_data, mapping_data, fingerprints=sheet_fingerprints, cache=_validation_cache
+    )
     if not errors:
         return jsonify({"errors": []})
 
@@ -968,14 +1792,17 @@ def import_workbook():
         filename = secure_filename(file.filename)
         suffix = Path(filename).suffix or ".xlsx"
         _clear_pending_import()
+        # The upload is read once and the same bytes are written to the
+        # temporary file and handed to the parser.
+        file_bytes = file.read()
         tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
         tmp_path = Path(tmp.name)
-        tmp.close()
-        file.save(tmp_path)
+        with tmp:
+            tmp.write(file_bytes)
         if stage_only:
-            diff = _stage_import_workbook(tmp_path, filename)
+            diff = _stage_import_workbook(tmp_path, filename, file_bytes)
             status = "pending_changes" if diff.get("has_changes") else "pending_no_changes"
-            return jsonify({"status": status, "diff": diff})
+            return jsonify({"status": status, "diff": _diff_overview(diff)})
         tmp_path.replace(workbook_path)
         tmp_path = None
         _load_workbook_path(workbook_path, filename or workbook_path.name)
@@ -990,6 +1817,39 @@ def import_workbook():
         return str(exc), 400
 
 
+@app.route("/import/diff")
+def import_diff():
+    """Return the summary of the staged import diff."""
+    if not pending_import_active:
+        return "No pending import", 404
+    return jsonify(_diff_overview(pending_import_diff))
+
+
+@app.route("/import/diff/<sheet_name>/<kind>")
+def import_diff_rows(sheet_name: str, kind: str):
+    """Return one page of the added, removed or changed rows of a staged sheet."""
+    if not pending_import_active:
+        return "No pending import", 404
+    if kind not in DIFF_KINDS:
+        return "Invalid diff kind", 400
+    sheet_diff = pending_import_diff.get("sheets", {}).get(sheet_name)
+    if sheet_diff is None:
+        return "Sheet not found", 404
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = request.args.get("limit", DIFF_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), DIFF_PAGE_MAX)
+    return jsonify(
+        {
+            "sheet": sheet_name,
+            "kind": kind,
+            "offset": offset,
+            "limit": limit,
+            "total": sheet_diff.count(kind),
+            "rows": sheet_diff.rows(kind, offset, limit),
+        }
+    )
+
+
 @app.route("/import/confirm", methods=["POST"])
 def confirm_import_workbook():
     """Apply or discard the currently staged import workbook."""
@@ -1006,6 +1866,26 @@ def confirm_import_workbook():
         _clear_pending_import()
         return jsonify({"status": "cancelled"})
 
+    if action == "apply_selected":
+        if not pending_import_active:
+            return "No pending import", 400
+        selection = payload.get("selection")
+        if not isinstance(selection, dict):
+            return "Invalid selection", 400
+        try:
+            applied = _apply_import_selection(selection)
+        except (ValueError, TypeError) as exc:
+            return str(exc), 400
+        except OSError as exc:
+            return f"Failed to write the workbook: {exc}", 500
+        return jsonify(
+            {
+                "status": "applied_selected",
+                "applied": applied,
+                "diff": _diff_overview(pending_import_diff),
+            }
+        )
+
     if action != "apply_all":
         return "Invalid action", 400
 
@@ -1015,7 +1895,10 @@ def confirm_import_workbook():
 
     try:
         staged_path.replace(workbook_path)
-        _load_workbook_path(workbook_path, pending_import_name or workbook_path.name)
+        if pending_import_key is not None:
+            _promote_staged_import()
+        else:
+            _load_workbook_path(workbook_path, pending_import_name or workbook_path.name)
     except Exception as exc:
         _clear_pending_import()
         return str(exc), 400
@@ -0,0 +1,94 @@
+"""Resolution of duplicated sheet headers.
+
+Codeset sheets sometimes repeat a header, e.g. two ``CODE`` columns where
+only one is filled in. The editor shows one column per header: the densest
+of the duplicates, i.e. the one with the fewest empty cells. A
+:class:`ColumnPlan` records that choice once per version of a sheet so
+serializing, filtering and validating the sheet do not rescan the
+duplicates, and remembers the hidden duplicates so edited rows can be
+written back without losing their values.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnPlan:
+    """The visible column of each header of a sheet and its hidden duplicates."""
+
+    def __init__(self, labels: List[Any], positions: List[int], hidden: Dict[Any, List[int]]):
+        self.labels = labels
+        # Unique headers in sheet order and the position of their visible column.
+        self.columns = list(dict.fromkeys(labels))
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.hidden = hidden
+        self._index = dict(zip(self.columns, positions))
+
+    @property
+    def has_duplicates(self) -> bool:
+        return bool(self.hidden)
+
+    def position(self, col: Any) -> int:
+        """Return the position of the visible ``col`` column; ``KeyError`` if absent."""
+        return self._index[col]
+
+    def column(self, df: pd.DataFrame, col: Any) -> pd.Series:
+        """Return the visible ``col`` column of ``df``."""
+        if not self.hidden:
+            return df[col]
+        return df.iloc[:, self._index[col]]
+
+    def unique(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return ``df`` with only the visible column of each header."""
+        if not self.hidden:
+            return df
+        frame = df.iloc[:, self.positions]
+        frame.columns = self.columns
+        return frame
+
+    def expand(self, rows: List[Dict[str, Any]], original: pd.DataFrame) -> pd.DataFrame:
+        """Return edited ``rows`` laid out with every column of ``original``.
+
+        ``rows`` hold the visible columns as produced by :meth:`unique`;
+        missing values become ``""``. Hidden duplicate columns keep the values
+        of ``original`` row by row, and rows beyond it get ``""``.
+        """
+        frame = pd.DataFrame(rows, columns=self.columns)
+        frame = frame.where(pd.notna(frame), "")
+        if not self.hidden:
+            return frame
+        values = np.full((len(frame), len(self.labels)), "", dtype=object)
+        values[:, self.positions] = frame.to_numpy(dtype=object)
+        kept = min(len(frame), len(original))
+        for positions in self.hidden.values():
+            values[:kept, positions] = original.iloc[:kept, positions].to_numpy(dtype=object)
+        return pd.DataFrame(values, columns=original.columns)
+
+
+def column_plan(df: pd.DataFrame) -> ColumnPlan:
+    """Return the :class:`ColumnPlan` of ``df``.
+
+    Among duplicated headers the column with the most non-empty cells is
+    visible; ties go to the leftmost column.
+    """
+    labels = df.columns.tolist()
+    if not df.columns.duplicated().any():
+        return ColumnPlan(labels, list(range(len(labels))), {})
+    groups: Dict[Any, List[int]] = {}
+    for position, label in enumerate(labels):
+        groups.setdefault(label, []).append(position)
+    positions: List[int] = []
+    hidden: Dict[Any, List[int]] = {}
+    for label, group in groups.items():
+        if len(group) == 1:
+            positions.append(group[0])
+            continue
+        non_empty = df.iloc[:, group].ne("").sum().to_numpy()
+        best = group[int(non_empty.argmax())]
+        positions.append(best)
+        hidden[label] = [p for p in group if p != best]
+    return ColumnPlan(labels, positions, hidden)
@@ -0,0 +1,107 @@
+"""Recognition of the key columns of codeset sheets by their headers.
+
+Headers are matched case-insensitively against :data:`ROLE_ALIASES`, with
+surrounding whitespace ignored and inner spaces treated as underscores, so
+``Display Value`` and ``DISPLAY_VALUE`` both name the display column. The
+alias table is compiled once and :func:`resolve_columns` remembers its result
+per header tuple, so the many sheets of a repository that share a layout are
+resolved once.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, NamedTuple
+
+# Normalized header aliases of each column role.
+ROLE_ALIASES: Dict[str, tuple[str, ...]] = {
+    "code": ("CODE",),
+    "display": ("DISPLAY_VALUE", "DISPLAY"),
+    "mapped_description": (
+        "MAPPED_STD_DESCRIPTION",
+        "MAPPED_STANDARD_DESCRIPTION",
+        "MAPPED_STD_DESC",
+    ),
+    "mapped_code": ("MAPPED_STD_CODE", "MAPPED_STANDARD_CODE"),
+    "std_description": (
+        "STANDARD_DESCRIPTION",
+        "STD_DESCRIPTION",
+        "STANDARD_DESC",
+        "STADARD_DESCRIPTION",
+        "STADARD_DESC",
+    ),
+    "std_code": ("STANDARD_CODE", "STD_CODE"),
+    "sub_definition": ("SUB_DEFINITION", "SUB_DEFINITION_DESCRIPTION", "SUBDEFINITION"),
+    "subsection": ("SUBSECTION",),
+    "definition": ("DEFINITION",),
+    "oid": ("OID",),
+    "url": ("URL",),
+}
+
+_ALIAS_ROLES = {alias: role for role, aliases in ROLE_ALIASES.items() for alias in aliases}
+
+
+class ColumnRoles(NamedTuple):
+    """The header label of each column role, ``None`` when a sheet lacks it.
+
+    When several headers match a role the rightmost one is used. ``mapped``
+    is the rightmost of ``mapped_description`` and ``mapped_code`` and
+    ``mapped_type`` says which (``"description"`` or ``"code"``).
+    ``positions`` maps each found role, ``mapped`` included, to the 0-based
+    position of its column; it is read-only as results are shared.
+    """
+
+    code: Any = None
+    display: Any = None
+    mapped: Any = None
+    mapped_type: str | None = None
+    mapped_description: Any = None
+    mapped_code: Any = None
+    std_description: Any = None
+    std_code: Any = None
+    sub_definition: Any = None
+    subsection: Any = None
+    definition: Any = None
+    oid: Any = None
+    url: Any = None
+    positions: Mapping[str, int] = MappingProxyType({})
+
+
+def normalize_header(col: str) -> str:
+    """Return the form of header ``col`` that is matched against the aliases."""
+    return col.strip().upper().replace(" ", "_")
+
+
+def resolve_columns(columns: Iterable[Any]) -> ColumnRoles:
+    """Return the :class:`ColumnRoles` of a sheet with headers ``columns``.
+
+    Headers that are not strings never match.
+    """
+    return _resolve(tuple(columns))
+
+
+@lru_cache(maxsize=1024)
+def _resolve(header: tuple) -> ColumnRoles:
+    found: Dict[str, tuple[Any, int]] = {}
+    for position, col in enumerate(header):
+        if not isinstance(col, str):
+            continue
+        role = _ALIAS_ROLES.get(normalize_header(col))
+        if role is not None:
+            found[role] = (col, position)
+    mapped = max(
+        (
+            (found[role][1], role)
+            for role in ("mapped_description", "mapped_code")
+            if role in found
+        ),
+        default=None,
+    )
+    if mapped is not None:
+        found["mapped"] = found[mapped[1]]
+    return ColumnRoles(
+        mapped_type=None if mapped is None else mapped[1][len("mapped_") :],
+        positions=MappingProxyType({role: position for role, (_, position) in found.items()}),
+        **{role: label for role, (label, _) in found.items()},
+    )
@@ -1,7 +1,7 @@
 """Utilities for extracting and handling dropdown validations."""
 
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, Iterable, List
 from openpyxl import load_workbook
 from openpyxl.utils import range_boundaries
 
@@ -63,7 +63,9 @@ def _parse_formula(formula: str, wb, ws=None) -> List[str]:
         # Gracefully handle malformed formulas
         return []
 
-def extract_dropdown_options(file_or_wb) -> Dict[str, Dict[str, List[str]]]:
+def extract_dropdown_options(
+    file_or_wb, sheets: Iterable[str] | None = None
+) -> Dict[str, Dict[str, List[str]]]:
 
     """Extract dropdown validation options per sheet and column.
 
@@ -71,7 +73,10 @@ def extract_dropdown_options(file_or_wb) -> Dict[str, Dict[str, List[str]]]:
     ----------
     file_or_wb: ``Workbook`` or file-like object
         The Excel workbook to inspect. Passing an already loaded
-        ``openpyxl`` workbook avoids reading the file again.
+        ``openpyxl`` workbook (or an ``XlsxReader``) avoids reading the
+        file again.
+    sheets: iterable of str, optional
+        Only inspect these sheets. Defaults to every sheet in the workbook.
 
 
     Returns
@@ -79,13 +84,13 @@ def extract_dropdown_options(file_or_wb) -> Dict[str, Dict[str, List[str]]]:
     Dict[str, Dict[str, List[str]]]
         Mapping of sheet names to columns and their list of allowed values.
     """
-    if hasattr(file_or_wb, "worksheets"):
+    if hasattr(file_or_wb, "sheetnames"):
         wb = file_or_wb
     else:
         file_or_wb.seek(0)
         wb = load_workbook(file_or_wb, data_only=True)
     dropdowns: Dict[str, Dict[str, List[str]]] = {}
-    for sheet_name in wb.sheetnames:
+    for sheet_name in wb.sheetnames if sheets is None else sheets:
         ws = wb[sheet_name]
         sheet_opts: Dict[str, List[str]] = {}
         headers = {cell.column: str(cell.value) for cell in ws[1]}
@@ -1,59 +1,390 @@
 from __future__ import annotations
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 from importlib import import_module
+import pickle
+import re
+from xml.etree.ElementTree import iterparse
+from zipfile import ZipFile
 
 # ``file_parser`` can be imported either as part of the ``codeset_ui_app``
 # package (via unit tests) or executed when running ``app.py`` directly. The
 # explicit ``import_module`` calls avoid fragile relative imports so the
 # sanitizer is located in both contexts.
 try:  # pragma: no cover - import resolution path tested indirectly
-    strip_invalid_font_families = import_module(
-        "codeset_ui_app.utils.xlsx_sanitizer"
-    ).strip_invalid_font_families
+    xlsx_sanitizer = import_module("codeset_ui_app.utils.xlsx_sanitizer")
 except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
-    strip_invalid_font_families = import_module(
-        "utils.xlsx_sanitizer"
-    ).strip_invalid_font_families
+    xlsx_sanitizer = import_module("utils.xlsx_sanitizer")
+repair_workbook = xlsx_sanitizer.repair_workbook
 
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook as _load_workbook
+from openpyxl.reader.strings import read_string_table
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.utils.datetime import from_excel
 from openpyxl.workbook.workbook import Workbook
 
+try:  # pragma: no cover - import resolution path tested indirectly
+    LazySheets = import_module("codeset_ui_app.components.lazy_workbook").LazySheets
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    LazySheets = import_module("components.lazy_workbook").LazySheets
 
-def load_workbook(file) -> Tuple[Dict[str, pd.DataFrame], Workbook]:
-    """Return workbook data and an openpyxl workbook instance.
+try:  # pragma: no cover - import resolution path tested indirectly
+    _xlsx_reader = import_module("codeset_ui_app.components.xlsx_reader")
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    _xlsx_reader = import_module("components.xlsx_reader")
+XlsxReader = _xlsx_reader.XlsxReader
+_sheet_parts = _xlsx_reader._sheet_parts
+cast_number = _xlsx_reader.cast_number
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_FORMULA_RE = re.compile(rb"<f[\s>/]")
+
+
+def _cached_formula_values(
+    file_bytes: bytes,
+    wb: Workbook,
+    sheets: Iterable[str] | None = None,
+) -> Dict[str, Dict[tuple[int, int], Any]]:
+    """Return the values Excel cached for formula cells, keyed by sheet and cell.
 
-    The workbook bytes are read once and reused for both :mod:`pandas`
-    (to obtain values with formulas resolved) and :mod:`openpyxl` (to
-    inspect formulas and validations).
+    ``openpyxl`` discards the cached ``<v>`` element of a formula cell when it
+    is asked for formulas. Rather than parsing the whole workbook a second time
+    with ``data_only=True`` only the worksheets that actually contain formulas
+    are scanned, and only their formula cells are converted. ``sheets`` limits
+    the scan to the named worksheets.
     """
-    file_bytes = file.read()
+    wanted = set(wb.sheetnames if sheets is None else sheets)
+    cached: Dict[str, Dict[tuple[int, int], Any]] = {}
+    with ZipFile(BytesIO(file_bytes)) as archive:
+        shared_strings = None
+        for title, part in _sheet_parts(archive).items():
+            if title not in wanted or title not in wb.sheetnames or part not in archive.NameToInfo:
+                continue
+            src = archive.read(part)
+            if not _FORMULA_RE.search(src):
+                continue
+            ws = wb[title]
+            values: Dict[tuple[int, int], Any] = {}
+            for _, el in iterparse(BytesIO(src)):
+                if el.tag != f"{_MAIN_NS}c":
+                    if el.tag == f"{_MAIN_NS}row":
+                        el.clear()
+                    continue
+                if el.find(f"{_MAIN_NS}f") is None or not el.get("r"):
+                    continue
+                coord = coordinate_to_tuple(el.get("r"))
+                value: Any = el.findtext(f"{_MAIN_NS}v") or None
+                data_type = el.get("t", "n")
+                if value is not None:
+                    if data_type == "n":
+                        value = cast_number(value)
+                        cell = ws.cell(*coord)
+                        if cell.is_date:
+                            try:
+                                value = from_excel(value, wb.epoch)
+                            except (OverflowError, ValueError):
+                                value = "#VALUE!"
+                    elif data_type == "s":
+                        if shared_strings is None:
+                            try:
+                                with archive.open("xl/sharedStrings.xml") as fh:
+                                    shared_strings = read_string_table(fh)
+                            except KeyError:
+                                shared_strings = []
+                        value = shared_strings[int(value)]
+                    elif data_type == "b":
+                        value = bool(int(value))
+                values[coord] = value
+            if values:
+                cached[title] = values
+    return cached
+
+
+def _sheet_rows(ws, cached: Dict[tuple[int, int], Any]) -> list[tuple]:
+    """Return the cell values of ``ws`` with formulas replaced by ``cached``."""
+    rows = list(ws.values)
+    if not cached:
+        return rows
+    patched = [list(row) for row in rows]
+    for (r, c), value in cached.items():
+        if r <= len(patched) and c <= len(patched[r - 1]):
+            patched[r - 1][c - 1] = value
+    return [tuple(row) for row in patched]
+
+
+def _load_formula_workbook(file_bytes: bytes) -> Tuple[Workbook, bytes]:
+    """Return the formula workbook for ``file_bytes`` and the bytes it was read from.
+
+    Known malformed parts that ``openpyxl`` rejects are detected and repaired
+    before parsing, so the workbook is usually parsed once. When ``openpyxl``
+    still raises ``ValueError`` the broader fallback repairs are applied and
+    the workbook is parsed again.
+    """
+    file_bytes = repair_workbook(file_bytes)
     try:
-        data_wb = _load_workbook(BytesIO(file_bytes), data_only=True)
         wb = _load_workbook(BytesIO(file_bytes), data_only=False)
     except ValueError:
-        file_bytes = strip_invalid_font_families(file_bytes)
-        data_wb = _load_workbook(BytesIO(file_bytes), data_only=True)
+        repaired = repair_workbook(file_bytes, xlsx_sanitizer.FALLBACK_REPAIRS)
+        if repaired is file_bytes:
+            raise
+        file_bytes = repaired
         wb = _load_workbook(BytesIO(file_bytes), data_only=False)
+    return wb, file_bytes
+
+
+def load_formula_workbook(file) -> Workbook:
+    """Return only the :mod:`openpyxl` workbook with formulas preserved.
+
+    Used when workbook data was restored from the parse cache and the
+    workbook object is needed later, for example to export edits.
+    """
+    wb, _ = _load_formula_workbook(file.read())
+    return wb
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` as strings without empty rows or unnamed columns."""
+    df = df.where(pd.notna(df), "").astype(str)
+    # Remove completely empty rows but preserve blank columns so the UI retains
+    # all expected headers, even when no data is present in a column.
+    df.replace("", pd.NA, inplace=True)
+    df.dropna(axis=0, how="all", inplace=True)
+    df.fillna("", inplace=True)
+    empty_cols = [c for c in df.columns if not c or str(c).startswith("Unnamed")]
+    df.drop(columns=empty_cols, inplace=True, errors="ignore")
+    return df
+
+
+def _sheet_frame(ws, cached: Dict[tuple[int, int], Any]) -> pd.DataFrame:
+    """Return the cleaned DataFrame for worksheet ``ws``."""
+    rows = _sheet_rows(ws, cached)
+    if not rows:
+        return pd.DataFrame()
+    header, *content = rows
+    return _normalize_frame(pd.DataFrame(content, columns=header))
+
+
+def _string_column(values: list[Any]) -> np.ndarray:
+    """Return ``values`` rendered as they appear after :func:`_normalize_frame`.
+
+    Text columns, the common case, are converted in one pass. Columns holding
+    numbers, booleans or dates go through pandas so their type inference and
+    formatting (``1.0`` for integers next to blanks, dates without a time)
+    stay exactly as before.
+    """
+    if all(v is None or type(v) is str for v in values):
+        out = np.empty(len(values), dtype=object)
+        out[:] = ["" if v is None else v for v in values]
+        return out
+    series = pd.Series(values)
+    return series.where(pd.notna(series), "").astype(str).to_numpy(dtype=object)
+
+
+def _columns_frame(
+    columns: list[list[Any]], string_dtype: str | None = None
+) -> pd.DataFrame:
+    """Return the cleaned DataFrame for per-column value lists from :class:`XlsxReader`.
+
+    Produces the same frame as :func:`_normalize_frame` without its chain of
+    whole-frame copies: every string column is built once, empty rows are
+    found with a single mask and unnamed columns are never materialized.
+    ``string_dtype`` optionally stores the columns as ``"category"`` or
+    ``"string"`` (pandas' string dtype, Arrow-backed when configured so).
+    """
+    if not columns:
+        return pd.DataFrame()
+    header = [column[0] for column in columns]
+    nrows = len(columns[0]) - 1
+    keep = np.zeros(nrows, dtype=bool)
+    arrays: list[np.ndarray] = []
+    labels: list[Any] = []
+    dropped = [c for c in header if not c or str(c).startswith("Unnamed")]
+    for label, column in zip(header, columns):
+        values = _string_column(column[1:])
+        # Rows with text only in unnamed columns are kept, as before.
+        keep |= values.astype(bool)
+        if label not in dropped:
+            arrays.append(values)
+            labels.append(label)
+    if not keep.all():
+        arrays = [values[keep] for values in arrays]
+    index = pd.RangeIndex(nrows) if keep.all() else pd.Index(np.flatnonzero(keep))
+    df = pd.DataFrame(dict(enumerate(arrays)), index=index)
+    df.columns = pd.Index(labels, dtype=object)
+    if string_dtype:
+        df = df.astype(string_dtype)
+    return df
 
-    data: Dict[str, pd.DataFrame] = {}
-    for sheet in data_wb.sheetnames:
-        ws = data_wb[sheet]
-        rows = list(ws.values)
-        if not rows:
-            data[sheet] = pd.DataFrame()
-            continue
-        header, *content = rows
-        df = pd.DataFrame(content, columns=header)
-        df = df.where(pd.notna(df), "").astype(str)
-        # Remove completely empty rows but preserve blank columns so the UI retains
-        # all expected headers, even when no data is present in a column.
-        df.replace("", pd.NA, inplace=True)
-        df.dropna(axis=0, how="all", inplace=True)
-        df.fillna("", inplace=True)
-        empty_cols = [c for c in df.columns if not c or str(c).startswith("Unnamed")]
-        df.drop(columns=empty_cols, inplace=True, errors="ignore")
-        data[sheet] = df
 
+def load_workbook(file, lazy: bool = False) -> Tuple[Dict[str, pd.DataFrame], Workbook]:
+    """Return workbook data and an openpyxl workbook instance.
+
+    The workbook is parsed once with formulas preserved so the returned
+    :class:`Workbook` can be inspected for validations and lookup formulas and
+    saved back without losing them. The displayed values of formula cells
+    come from the results Excel cached in the worksheet XML.
+
+    With ``lazy=True`` the data is a :class:`LazySheets` mapping that builds
+    each sheet's DataFrame the first time the sheet is read.
+    """
+    wb, file_bytes = _load_formula_workbook(file.read())
+
+    if lazy:
+        def _load_sheet(sheet: str) -> pd.DataFrame:
+            cached = _cached_formula_values(file_bytes, wb, [sheet])
+            return _sheet_frame(wb[sheet], cached.get(sheet, {}))
+
+        return LazySheets(wb.sheetnames, _load_sheet), wb
+
+    cached = _cached_formula_values(file_bytes, wb)
+    data: Dict[str, pd.DataFrame] = {}
+    for sheet in wb.sheetnames:
+        data[sheet] = _sheet_frame(wb[sheet], cached.get(sheet, {}))
     return data, wb
+
+
+def read_workbook(
+    file,
+    lazy: bool = False,
+    workers: int = 1,
+    min_sheets: int = 2,
+    string_dtype: str | None = None,
+) -> Tuple[Dict[str, pd.DataFrame], Any]:
+    """Return workbook data and a source for validations and lookup formulas.
+
+    Sheets are streamed by :class:`XlsxReader`, which is returned as the
+    source; it answers the same queries as an :mod:`openpyxl` workbook for
+    :func:`extract_dropdown_options` and :func:`extract_lookup_mappings` but
+    cannot be saved. Workbooks the reader cannot open are handed to
+    :func:`load_workbook` and the :class:`Workbook` is returned instead.
+
+    With ``lazy=True`` the data is a :class:`LazySheets` mapping and each
+    worksheet is only streamed when its sheet is first read. Otherwise
+    ``workers > 1`` converts workbooks with at least ``min_sheets`` sheets in
+    parallel via :func:`map_sheets`. ``string_dtype`` is passed on to
+    :func:`_columns_frame` for streamed sheets.
+    """
+    file_bytes = file.read()
+    try:
+        reader = XlsxReader(file_bytes)
+    except Exception:
+        return load_workbook(BytesIO(file_bytes), lazy=lazy)
+
+    if lazy:
+        def _load_sheet(sheet: str) -> pd.DataFrame:
+            df = _columns_frame(reader.columns(sheet), string_dtype)
+            reader.release(sheet)
+            return df
+
+        return LazySheets(reader.sheetnames, _load_sheet), reader
+    data = map_sheets(
+        file_bytes,
+        workers=workers,
+        min_sheets=min_sheets,
+        string_dtype=string_dtype,
+        reader=reader,
+    )
+    return data, reader
+
+
+def read_columns(
+    file, select: Callable[[List[Any]], Iterable[int]]
+) -> Dict[str, pd.DataFrame]:
+    """Return only the columns chosen by ``select`` from every sheet of ``file``.
+
+    ``select`` receives a sheet's header row and returns the 0-based positions
+    of the columns to read; sheets for which it returns none are omitted.
+    Sheets are projected by :meth:`XlsxReader.project`, so the other cells are
+    never converted and no formula workbook is built. Rows that are empty in
+    every chosen column are dropped. Workbooks the reader cannot open are
+    loaded by :func:`load_workbook` and projected afterwards.
+    """
+    file_bytes = file.read()
+    try:
+        reader = XlsxReader(file_bytes)
+    except Exception:
+        data, _ = load_workbook(BytesIO(file_bytes))
+        projected: Dict[str, pd.DataFrame] = {}
+        for sheet, df in data.items():
+            positions = list(select(df.columns.tolist()))
+            if positions:
+                df = df.iloc[:, positions]
+                projected[sheet] = df[df.ne("").any(axis=1)]
+        return projected
+    projected = {}
+    for sheet in reader.sheetnames:
+        columns = reader.project(sheet, select)
+        if columns:
+            projected[sheet] = _columns_frame(list(columns.values()))
+    return projected
+
+
+def _map_chunk(
+    file_bytes: bytes,
+    sheets: List[str],
+    func: Callable[[Any, str, pd.DataFrame], Any] | None,
+    string_dtype: str | None = None,
+    reader: XlsxReader | None = None,
+) -> Dict[str, Any]:
+    """Worker entry point for :func:`map_sheets`."""
+    reader = reader or XlsxReader(file_bytes)
+    results: Dict[str, Any] = {}
+    for sheet in sheets:
+        df = _columns_frame(reader.columns(sheet), string_dtype)
+        reader.release(sheet)
+        results[sheet] = df if func is None else func(reader, sheet, df)
+    return results
+
+
+def _balance(sizes: Dict[str, int], workers: int) -> List[List[str]]:
+    """Split sheets into ``workers`` chunks of similar total XML size."""
+    chunks: List[List[str]] = [[] for _ in range(workers)]
+    totals = [0] * workers
+    for sheet in sorted(sizes, key=sizes.get, reverse=True):
+        idx = totals.index(min(totals))
+        chunks[idx].append(sheet)
+        totals[idx] += sizes[sheet]
+    return [chunk for chunk in chunks if chunk]
+
+
+def map_sheets(
+    file_bytes: bytes,
+    func: Callable[[Any, str, pd.DataFrame], Any] | None = None,
+    workers: int = 1,
+    min_sheets: int = 2,
+    string_dtype: str | None = None,
+    reader: XlsxReader | None = None,
+) -> Dict[str, Any]:
+    """Return ``func(reader, sheet, df)`` for every sheet, in workbook order.
+
+    Without ``func`` the cleaned DataFrames themselves are returned. With
+    ``workers > 1`` and at least ``min_sheets`` sheets, the sheets are split
+    by worksheet size across a process pool and every worker streams its
+    share with its own :class:`XlsxReader`; ``func`` must then be a picklable
+    module-level function. Smaller workbooks, or a pool that cannot be
+    started, are processed serially in this process, reusing ``reader`` when
+    one is already open for the same bytes. Raises if the streaming reader
+    cannot open the workbook.
+    """
+    reader = reader or XlsxReader(file_bytes)
+    sheets = reader.sheetnames
+    workers = min(workers, len(sheets))
+    if workers > 1 and len(sheets) >= min_sheets:
+        sizes = reader.sheet_sizes()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_map_chunk, file_bytes, chunk, func, string_dtype)
+                    for chunk in _balance(sizes, workers)
+                ]
+                results: Dict[str, Any] = {}
+                for future in futures:
+                    results.update(future.result())
+            return {sheet: results[sheet] for sheet in sheets}
+        except (OSError, RuntimeError, pickle.PicklingError, BrokenProcessPool):
+            pass
+    return _map_chunk(file_bytes, sheets, func, string_dtype, reader)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, Any
+from typing import Dict, Any, Iterable
 import re
 from openpyxl import load_workbook
 from openpyxl.utils import range_boundaries
@@ -7,7 +7,7 @@ from openpyxl.utils import range_boundaries
 
 def extract_column_formulas(file_or_wb) -> Dict[str, Dict[str, str]]:
     """Return formulas for the first data row of each column per sheet."""
-    if hasattr(file_or_wb, "worksheets"):
+    if hasattr(file_or_wb, "sheetnames"):
         wb = file_or_wb
     else:
         file_or_wb.seek(0)
@@ -92,16 +92,21 @@ def _parse_vlookup_range(formula: str, wb) -> Dict[str, str] | None:
         combined[key] = "^".join(p.get(key, "") for p in parts)
     return combined
 
-def extract_lookup_mappings(file_or_wb) -> Dict[str, Dict[str, Dict[str, str]]]:
-    """Extract lookup mappings defined via simple VLOOKUP formulas."""
-    if hasattr(file_or_wb, "worksheets"):
+def extract_lookup_mappings(
+    file_or_wb, sheets: Iterable[str] | None = None
+) -> Dict[str, Dict[str, Dict[str, str]]]:
+    """Extract lookup mappings defined via simple VLOOKUP formulas.
+
+    ``sheets`` limits the scan to the named sheets.
+    """
+    if hasattr(file_or_wb, "sheetnames"):
         wb = file_or_wb
     else:
         file_or_wb.seek(0)
         wb = load_workbook(file_or_wb, data_only=False)
 
     mappings: Dict[str, Dict[str, Dict[str, str]]] = {}
-    for sheet_name in wb.sheetnames:
+    for sheet_name in wb.sheetnames if sheets is None else sheets:
         ws = wb[sheet_name]
         headers = [str(cell.value) if cell.value is not None else "" for cell in ws[1]]
         sheet_map: Dict[str, Dict[str, str]] = {}
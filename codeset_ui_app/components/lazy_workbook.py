@@ -0,0 +1,83 @@
+"""Sheet mappings whose values are materialized the first time they are used."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+
+class LazySheets(MutableMapping):
+    """Mapping of sheet name to a value that is loaded on first access.
+
+    Sheet names are known up front so iteration, ``len`` and membership tests
+    never trigger any work. Reading a value calls ``loader(sheet)``, which is
+    expected to either return the value or populate this mapping (and any
+    sibling mappings built from the same workbook) via :meth:`provide`.
+    Anything that walks every value, such as ``items()``, validation or export,
+    therefore materializes every sheet while the UI only pays for the sheets it
+    shows. Mappings filled by the same loader should share one ``lock``.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        loader: Callable[[str], Any],
+        lock: threading.RLock | None = None,
+    ):
+        self._names: list[str] = list(dict.fromkeys(names))
+        self._values: Dict[str, Any] = {}
+        self._loader = loader
+        self._lock = lock or threading.RLock()
+
+    def __getitem__(self, sheet: str) -> Any:
+        try:
+            return self._values[sheet]
+        except KeyError:
+            pass
+        if sheet not in self._names:
+            raise KeyError(sheet)
+        with self._lock:
+            if sheet not in self._values:
+                value = self._loader(sheet)
+                if sheet not in self._values:
+                    self._values[sheet] = value
+        return self._values[sheet]
+
+    def __setitem__(self, sheet: str, value: Any) -> None:
+        if sheet not in self._names:
+            self._names.append(sheet)
+        self._values[sheet] = value
+
+    def __delitem__(self, sheet: str) -> None:
+        self._names.remove(sheet)
+        self._values.pop(sheet, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._names))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, sheet: object) -> bool:
+        return sheet in self._names
+
+    def clear(self) -> None:
+        """Drop every sheet without materializing pending ones."""
+        self._names.clear()
+        self._values.clear()
+
+    def provide(self, sheet: str, value: Any) -> None:
+        """Store ``value`` for ``sheet`` unless a value was already assigned."""
+        self._values.setdefault(sheet, value)
+
+    def is_loaded(self, sheet: str) -> bool:
+        """Return whether ``sheet`` has been materialized."""
+        return sheet in self._values
+
+    def loaded(self) -> Dict[str, Any]:
+        """Return the sheets materialized so far, in workbook order."""
+        return {s: self._values[s] for s in self._names if s in self._values}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._names!r}, loaded={list(self._values)!r})"
@@ -0,0 +1,220 @@
+"""N-way comparison of how several workbooks map each CODE.
+
+Every workbook is reduced to the CODE, display and mapped columns of its
+sheets. Per sheet, the workbooks are then joined by CODE into a matrix with
+one row per code and one column per workbook, and each code is classified:
+
+``consensus``
+    every workbook has the code and maps it to the same value;
+``partial``
+    the workbooks that map the code agree, but others lack it or leave it
+    unmapped;
+``conflict``
+    the code is mapped to different values;
+``unmapped``
+    no workbook maps the code.
+"""
+
+from __future__ import annotations
+
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+try:  # pragma: no cover - import resolution path tested indirectly
+    read_columns = import_module("codeset_ui_app.components.file_parser").read_columns
+    resolve_columns = import_module("codeset_ui_app.components.column_roles").resolve_columns
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    read_columns = import_module("components.file_parser").read_columns
+    resolve_columns = import_module("components.column_roles").resolve_columns
+
+MATRIX_STATUSES = ("consensus", "partial", "conflict", "unmapped")
+_KEY_COLUMNS = ["code", "display", "mapped"]
+
+
+def _key_columns(columns: List[Any]) -> tuple[Any, Any, Any]:
+    """Return the CODE, display and mapped labels among ``columns``."""
+    roles = resolve_columns(columns)
+    return roles.code, roles.display, roles.mapped
+
+
+def _key_positions(header: List[Any]) -> List[int]:
+    """Return the positions of the key columns in ``header``, none without CODE."""
+    roles = resolve_columns(header)
+    if roles.code is None:
+        return []
+    return [roles.positions[role] for role in ("code", "display", "mapped") if role in roles.positions]
+
+
+def _column_values(df: pd.DataFrame, col: str | None) -> List[str]:
+    if col is None:
+        return [""] * len(df)
+    series = df[col]
+    if isinstance(series, pd.DataFrame):
+        series = series.iloc[:, 0]
+    return [str(value).strip() for value in series.tolist()]
+
+
+def load_code_table(path: Path) -> Dict[str, pd.DataFrame]:
+    """Return the ``code``/``display``/``mapped`` values of every sheet of ``path``.
+
+    Only those columns are read from the workbook and sheets without a CODE
+    column are skipped.
+    """
+    with Path(path).open("rb") as fh:
+        data = read_columns(fh, _key_positions)
+    tables: Dict[str, pd.DataFrame] = {}
+    for sheet, df in data.items():
+        code_col, display_col, mapped_col = _key_columns(df.columns.tolist())
+        tables[sheet] = pd.DataFrame(
+            {
+                "code": _column_values(df, code_col),
+                "display": _column_values(df, display_col),
+                "mapped": _column_values(df, mapped_col),
+            }
+        )
+    return tables
+
+
+def load_code_tables(paths: List[Path], workers: int = 1) -> List[Dict[str, pd.DataFrame]]:
+    """Return :func:`load_code_table` for every path, in order.
+
+    With ``workers > 1`` the workbooks are read concurrently in a process
+    pool; a pool that cannot be started falls back to reading them serially.
+    """
+    workers = min(workers, len(paths))
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(load_code_table, paths))
+        except (OSError, RuntimeError, pickle.PicklingError, BrokenProcessPool):
+            pass
+    return [load_code_table(path) for path in paths]
+
+
+class CodeMatrix:
+    """Codes of one sheet joined across workbooks, with per-code agreement."""
+
+    def __init__(
+        self,
+        codes: np.ndarray,
+        mapped: np.ndarray,
+        display: np.ndarray,
+        status: np.ndarray,
+        consensus: np.ndarray,
+        agreement: np.ndarray,
+    ):
+        self.codes = codes
+        # ``mapped`` and ``display`` are ``(codes, workbooks)`` object arrays
+        # holding ``None`` where a workbook lacks the code.
+        self.mapped = mapped
+        self.display = display
+        self.status = status
+        self.consensus = consensus
+        self.agreement = agreement
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the number of codes in total, per status and per workbook."""
+        present = self.mapped != None  # noqa: E711 - elementwise comparison
+        mapped = present & (self.mapped != "")
+        agrees = mapped & (self.mapped == self.consensus[:, None])
+        counts = {status: int((self.status == status).sum()) for status in MATRIX_STATUSES}
+        return {
+            "codes": len(self.codes),
+            **counts,
+            "present": present.sum(axis=0).tolist(),
+            "mapped": mapped.sum(axis=0).tolist(),
+            "agreeing": agrees.sum(axis=0).tolist(),
+        }
+
+    def rows(
+        self, offset: int = 0, limit: int | None = None, status: str | None = None
+    ) -> tuple[int, List[Dict[str, Any]]]:
+        """Return the number of matching codes and one page of them."""
+        index = np.arange(len(self.codes))
+        if status is not None:
+            index = index[self.status == status]
+        page = index[max(offset, 0):None if limit is None else max(offset, 0) + limit]
+        return len(index), [
+            {
+                "code": self.codes[i],
+                "status": self.status[i],
+                "consensus": self.consensus[i],
+                "agreement": int(self.agreement[i]),
+                "mapped": self.mapped[i].tolist(),
+                "display": self.display[i].tolist(),
+            }
+            for i in page.tolist()
+        ]
+
+
+def build_code_matrix(tables: List[pd.DataFrame | None]) -> CodeMatrix | None:
+    """Join the ``code``/``display``/``mapped`` tables of one sheet by code.
+
+    ``tables`` holds one entry per workbook, ``None`` when the workbook lacks
+    the sheet. Only the first row of a code repeated within a workbook is
+    used. Codes keep the order in which they first appear.
+    """
+    frames = [
+        df[_KEY_COLUMNS].assign(source=source)
+        for source, df in enumerate(tables)
+        if df is not None and len(df)
+    ]
+    if not frames:
+        return None
+    long = pd.concat(frames, ignore_index=True)
+    long = long[long["code"] != ""].drop_duplicates(["code", "source"])
+    if long.empty:
+        return None
+    code_idx, codes = pd.factorize(long["code"])
+    sources = long["source"].to_numpy()
+    shape = (len(codes), len(tables))
+    mapped = np.full(shape, None, dtype=object)
+    display = np.full(shape, None, dtype=object)
+    mapped[code_idx, sources] = long["mapped"].to_numpy(dtype=object)
+    display[code_idx, sources] = long["display"].to_numpy(dtype=object)
+
+    # Most common non-empty mapping per code, ties going to the earliest one.
+    votes = (
+        pd.DataFrame({"code": code_idx, "mapped": long["mapped"].to_numpy()})
+        .loc[lambda frame: frame["mapped"] != ""]
+        .groupby(["code", "mapped"], sort=False)
+        .size()
+        .reset_index(name="votes")
+    )
+    distinct = np.bincount(votes["code"].to_numpy(), minlength=len(codes))
+    top = votes.sort_values("votes", ascending=False, kind="stable").drop_duplicates("code")
+    consensus = np.full(len(codes), "", dtype=object)
+    agreement = np.zeros(len(codes), dtype=np.int64)
+    consensus[top["code"].to_numpy()] = top["mapped"].to_numpy()
+    agreement[top["code"].to_numpy()] = top["votes"].to_numpy()
+
+    status = np.where(
+        distinct == 0,
+        "unmapped",
+        np.where(
+            distinct > 1,
+            "conflict",
+            np.where(agreement == len(tables), "consensus", "partial"),
+        ),
+    ).astype(object)
+    return CodeMatrix(
+        codes.to_numpy(dtype=object), mapped, display, status, consensus, agreement
+    )
+
+
+def compare_workbooks(tables: List[Dict[str, pd.DataFrame]]) -> Dict[str, CodeMatrix]:
+    """Return a :class:`CodeMatrix` for every sheet found in any workbook."""
+    sheets = list(dict.fromkeys(sheet for table in tables for sheet in table))
+    matrices: Dict[str, CodeMatrix] = {}
+    for sheet in sheets:
+        matrix = build_code_matrix([table.get(sheet) for table in tables])
+        if matrix is not None:
+            matrices[sheet] = matrix
+    return matrices
@@ -0,0 +1,46 @@
+"""Content fingerprints identifying unchanged sheets."""
+
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+_CELL_SEP = "\x1f"
+_COLUMN_SEP = b"\x1e"
+
+
+def _default_index(index: pd.Index) -> bool:
+    """Return whether ``index`` labels the rows ``0..n-1``."""
+    if isinstance(index, pd.RangeIndex):
+        return index.start == 0 and index.step == 1
+    return index.dtype.kind in "iu" and np.array_equal(index.to_numpy(), np.arange(len(index)))
+
+
+def sheet_fingerprint(df: pd.DataFrame | None) -> str:
+    """Return a stable digest of the labels, row count, index and values of ``df``.
+
+    Equal fingerprints mean equal sheet contents, so results derived from one
+    sheet (validation errors, transformer entries, diffs) can be reused for
+    the other. Values are hashed through their string form, which is how
+    every sheet value is stored. Row numbers in messages come from the index,
+    so an index other than ``0..n-1`` is hashed too.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if df is None:
+        return digest.hexdigest()
+    digest.update(f"{len(df)}{_CELL_SEP}".encode("utf-8"))
+    digest.update(_CELL_SEP.join(map(str, df.columns)).encode("utf-8", "surrogatepass"))
+    if not _default_index(df.index):
+        digest.update(_COLUMN_SEP)
+        digest.update(_CELL_SEP.join(map(str, df.index)).encode("utf-8", "surrogatepass"))
+    for position in range(df.shape[1]):
+        values = df.iloc[:, position].tolist()
+        try:
+            text = _CELL_SEP.join(values)
+        except TypeError:
+            text = _CELL_SEP.join(map(str, values))
+        digest.update(_COLUMN_SEP)
+        digest.update(text.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
@@ -0,0 +1,161 @@
+"""Derivation of the mapping metadata of parsed codeset sheets.
+
+:func:`prepare_source_sheet` turns a freshly parsed sheet into the frame,
+mapping info, dropdown options and field note the editor works with. The
+module has no import-time side effects so it can be imported by the worker
+processes of :func:`map_sheets` without loading the Flask application.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from importlib import import_module
+from typing import Any, Dict
+
+import pandas as pd
+
+try:  # pragma: no cover - import resolution path tested indirectly
+    _plan_module = import_module("codeset_ui_app.components.column_plan")
+    resolve_columns = import_module("codeset_ui_app.components.column_roles").resolve_columns
+    extract_dropdown_options = import_module(
+        "codeset_ui_app.components.dropdown_logic"
+    ).extract_dropdown_options
+    extract_lookup_mappings = import_module(
+        "codeset_ui_app.components.formula_logic"
+    ).extract_lookup_mappings
+    sheet_fingerprint = import_module("codeset_ui_app.components.sheet_fingerprint").sheet_fingerprint
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    _plan_module = import_module("components.column_plan")
+    resolve_columns = import_module("components.column_roles").resolve_columns
+    extract_dropdown_options = import_module("components.dropdown_logic").extract_dropdown_options
+    extract_lookup_mappings = import_module("components.formula_logic").extract_lookup_mappings
+    sheet_fingerprint = import_module("components.sheet_fingerprint").sheet_fingerprint
+
+ColumnPlan = _plan_module.ColumnPlan
+column_plan = _plan_module.column_plan
+
+
+def _str_series(df: pd.DataFrame, col: str, plan: ColumnPlan) -> pd.Series:
+    """Return the visible ``col`` column of ``df`` as stripped strings."""
+    return plan.column(df, col).astype(str).str.strip()
+
+
+def prepare_sheet(
+    sheet: str,
+    df: pd.DataFrame,
+    sheet_opts: Dict[str, list],
+    lookup_sheet: Dict[str, Dict[str, str]],
+    ws,
+) -> tuple[pd.DataFrame, Dict[str, Any], str]:
+    """Detect key columns of ``sheet`` and derive its mapping metadata.
+
+    ``sheet_opts`` holds the sheet's dropdown options from Excel validations
+    and is extended in place with options for the mapped column. Returns the
+    updated DataFrame, the mapping info and the field note from the header
+    comment on ``ws``.
+    """
+    roles = resolve_columns(df.columns)
+    mapped_col = roles.mapped
+    mapped_type = roles.mapped_type  # "description" or "code"
+    sub_col = roles.sub_definition
+    std_col = roles.std_description
+    std_code_col = roles.std_code
+    code_col = roles.code
+    display_col = roles.display
+    definition_col = roles.definition
+    hidden_cols: list[str] = [definition_col] if definition_col else []
+
+    if mapped_col is None and std_col is None and std_code_col is None and definition_col:
+        mapped_col = definition_col
+        mapped_type = "description"
+        hidden_cols = [c for c in hidden_cols if c != mapped_col]
+
+    plan = column_plan(df)
+    if mapped_col:
+        source_col = std_col if mapped_type != "code" else std_code_col
+        if source_col is None:
+            source_col = mapped_col
+        options = sorted({v for v in _str_series(df, source_col, plan) if v})
+        if options and mapped_col not in sheet_opts:
+            sheet_opts[mapped_col] = options
+
+    sheet_map: Dict[str, str] = {}
+
+    if std_col and std_code_col:
+        std_series = _str_series(df, std_col, plan)
+        code_series = _str_series(df, std_code_col, plan)
+        mask = std_series != ""
+        if mapped_type == "code":
+            sheet_map.update({code: f"{code}^{desc}" for code, desc in zip(code_series[mask], std_series[mask])})
+        else:
+            sheet_map.update({desc: f"{code}^{desc}" for desc, code in zip(std_series[mask], code_series[mask])})
+
+    if mapped_col and not (std_col and std_code_col) and sub_col:
+        mapped_series = _str_series(df, mapped_col, plan)
+        sub_series = _str_series(df, sub_col, plan)
+        mask = mapped_series != ""
+        sheet_map.update({k: v for k, v in zip(mapped_series[mask], sub_series[mask])})
+
+    if sub_col and sub_col in lookup_sheet:
+        sheet_map = {**lookup_sheet[sub_col], **sheet_map}
+
+    if sub_col and mapped_col:
+        df[sub_col] = df[mapped_col].map(sheet_map).fillna(df[sub_col])
+
+    info = {
+        "map": sheet_map,
+        "sub_col": sub_col,
+        "mapped_col": mapped_col,
+        "code_col": code_col,
+        "display_col": display_col,
+        "std_col": std_col,
+        "std_code_col": std_code_col,
+        "hidden_cols": hidden_cols,
+    }
+
+    if code_col and display_col and mapped_col:
+        code_series = _str_series(df, code_col, plan)
+        display_series = _str_series(df, display_col, plan)
+        blank_mask = code_series.eq("") & display_series.eq("")
+        if blank_mask.any():
+            df.loc[blank_mask, mapped_col] = ""
+            if sub_col:
+                df.loc[blank_mask, sub_col] = ""
+
+    note = ""
+    if code_col:
+        for cell in ws[1]:
+            if (cell.value or "").strip() == code_col and cell.comment:
+                note = cell.comment.text.strip()
+                break
+    return df, info, note
+
+
+def source_fingerprint(ws, df: pd.DataFrame, sheet_opts: dict, lookup_sheet: dict) -> str:
+    """Return a digest of everything :func:`prepare_sheet` reads for a sheet.
+
+    Covers the parsed values, dropdown options, lookup maps and header
+    comments, so a sheet with an unchanged digest would be prepared the same.
+    Must be taken before :func:`prepare_sheet`, which updates ``df`` and
+    ``sheet_opts`` in place.
+    """
+    comments = [cell.comment.text for cell in ws[1] if cell.comment]
+    extra = json.dumps([sheet_opts, lookup_sheet, comments], sort_keys=True, default=str)
+    digest = hashlib.blake2b(sheet_fingerprint(df).encode("ascii"), digest_size=16)
+    digest.update(extra.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def prepare_source_sheet(source, sheet: str, df: pd.DataFrame) -> tuple:
+    """Return ``(df, info, dropdowns, note, lookups, source_fp)`` for ``sheet`` of ``source``.
+
+    ``source`` is an :class:`XlsxReader` or openpyxl workbook. This is the
+    function :func:`map_sheets` runs in worker processes.
+    """
+    sheet_opts = extract_dropdown_options(source, [sheet]).get(sheet, {})
+    lookup_sheet = extract_lookup_mappings(source, [sheet]).get(sheet, {})
+    ws = source[sheet]
+    source_fp = source_fingerprint(ws, df, sheet_opts, lookup_sheet)
+    df, info, note = prepare_sheet(sheet, df, sheet_opts, lookup_sheet, ws)
+    return df, info, sheet_opts, note, lookup_sheet, source_fp
@@ -0,0 +1,258 @@
+"""Keyed, column-wise comparison of two versions of a codeset sheet."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+DIFF_KINDS = ("added", "removed", "changed")
+
+
+def _row_keys(frame: pd.DataFrame, key_column: str | None) -> pd.DataFrame:
+    """Return the join keys of ``frame`` as ``key``/``occurrence`` columns.
+
+    Repeated key values are told apart by their occurrence number, so the
+    n-th ``A`` of one sheet is matched with the n-th ``A`` of the other. Rows
+    without a key value only match the row with the same number.
+    """
+    rows = np.arange(2, len(frame) + 2)  # account for header row in Excel
+    if key_column:
+        keys = frame[key_column].to_numpy(dtype=object)
+    else:
+        keys = np.full(len(frame), "", dtype=object)
+    occurrence = pd.Series(keys).groupby(keys, sort=False).cumcount().to_numpy()
+    blank = keys == ""
+    occurrence[blank] = -rows[blank]
+    return pd.DataFrame({"key": keys, "occurrence": occurrence, "row": rows})
+
+
+def align_rows(base_keys: List[np.ndarray], other_keys: List[np.ndarray]) -> np.ndarray:
+    """Return, for every base row, the position of its matching other row or -1.
+
+    Rows are matched on the first key pair, then rows left unmatched are
+    matched on the next pair, and so on. Blank keys never match and the n-th
+    occurrence of a key is matched with the n-th occurrence on the other side.
+    """
+    match = np.full(len(base_keys[0]) if base_keys else 0, -1, dtype=np.int64)
+    taken = np.zeros(len(other_keys[0]) if other_keys else 0, dtype=bool)
+    for base_key, other_key in zip(base_keys, other_keys):
+        sides = []
+        for keys, free in ((base_key, match == -1), (other_key, ~taken)):
+            positions = np.flatnonzero(free & (keys != ""))
+            frame = pd.DataFrame({"key": keys[positions], "position": positions})
+            frame["occurrence"] = frame.groupby("key", sort=False).cumcount()
+            sides.append(frame)
+        joined = sides[0].merge(sides[1], on=["key", "occurrence"], suffixes=("", "_other"))
+        other = joined["position_other"].to_numpy(dtype=np.int64)
+        match[joined["position"].to_numpy(dtype=np.int64)] = other
+        taken[other] = True
+    return match
+
+
+class SheetDiff:
+    """Differences between two versions of a sheet, kept as compact arrays.
+
+    Only the values and keys of reported rows are retained and JSON rows are
+    built on demand by :meth:`rows`, so a diff touching many rows can be paged
+    through without holding a dict per row.
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        key_column: str | None,
+        added: np.ndarray,
+        removed: np.ndarray,
+        changed_base: np.ndarray,
+        changed_new: np.ndarray,
+        patterns: np.ndarray,
+        base_rows: tuple[list, list],
+        new_rows: tuple[list, list],
+    ):
+        self.columns = columns
+        self.key_column = key_column
+        # 0-based row positions in the base and incoming sheets.
+        self._added = added
+        self._removed = removed
+        self._changed_base = changed_base
+        self._changed_new = changed_new
+        self._patterns = patterns
+        # ``(keys, values)`` of the removed then changed base rows and of the
+        # added then changed incoming rows.
+        self._base_rows = base_rows
+        self._new_rows = new_rows
+        self._changed_columns = {
+            code: [col for i, col in enumerate(columns) if code >> i & 1]
+            for code in np.unique(patterns).tolist()
+        }
+
+    def count(self, kind: str) -> int:
+        """Return the number of ``kind`` rows, one of :data:`DIFF_KINDS`."""
+        if kind == "added":
+            return len(self._added)
+        if kind == "removed":
+            return len(self._removed)
+        if kind == "changed":
+            return len(self._patterns)
+        raise ValueError(f"Unknown diff kind: {kind}")
+
+    def overview(self) -> Dict[str, Any]:
+        """Return the compared columns and the row count of each kind."""
+        return {
+            "columns": self.columns,
+            "key_column": self.key_column,
+            "added_count": self.count("added"),
+            "removed_count": self.count("removed"),
+            "changed_count": self.count("changed"),
+        }
+
+    def rows(self, kind: str, offset: int = 0, limit: int | None = None) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` ``kind`` rows starting at ``offset``.
+
+        Every row has an ``id``, its sheet row number in the incoming sheet
+        (in the base sheet for removed rows), which unlike ``key`` is unique
+        among the rows of a kind and selects the row for :meth:`locate`.
+        """
+        total = self.count(kind)
+        span = range(max(offset, 0), total if limit is None else min(total, offset + limit))
+        columns = self.columns
+        if kind != "changed":
+            positions = self._added if kind == "added" else self._removed
+            keys, values = self._new_rows if kind == "added" else self._base_rows
+            return [
+                {
+                    "id": int(positions[i]) + 2,
+                    "key": keys[i] or f"Row {positions[i] + 2}",
+                    "values": dict(zip(columns, values[i])),
+                    "row": int(positions[i]) + 2,
+                }
+                for i in span
+            ]
+        base_keys, base_values = self._base_rows
+        new_keys, new_values = self._new_rows
+        skip_base, skip_new = len(self._removed), len(self._added)
+        return [
+            {
+                "id": int(self._changed_new[i]) + 2,
+                "key": new_keys[skip_new + i] or f"Row {self._changed_new[i] + 2}",
+                "before": dict(zip(columns, base_values[skip_base + i])),
+                "after": dict(zip(columns, new_values[skip_new + i])),
+                "base_row": int(self._changed_base[i]) + 2,
+                "incoming_row": int(self._changed_new[i]) + 2,
+                "changed_columns": list(self._changed_columns[int(self._patterns[i])]),
+            }
+            for i in span
+        ]
+
+    def locate(
+        self, kind: str, ids: Iterable[int] | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the 0-based base and incoming row positions of ``kind`` rows.
+
+        With ``ids`` only rows whose ``id``, as reported by :meth:`rows`, is
+        listed are returned. Added rows have no base position and removed rows
+        no incoming one; those arrays are empty.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        if kind == "added":
+            base, new, positions = empty, self._added, self._added
+        elif kind == "removed":
+            base, new, positions = self._removed, empty, self._removed
+        elif kind == "changed":
+            base, new, positions = self._changed_base, self._changed_new, self._changed_new
+        else:
+            raise ValueError(f"Unknown diff kind: {kind}")
+        if ids is None:
+            return base, new
+        mask = np.isin(positions + 2, np.fromiter(ids, dtype=np.int64))
+        return (base[mask] if len(base) else base), (new[mask] if len(new) else new)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return every differing row along with the overview."""
+        result = self.overview()
+        for kind in DIFF_KINDS:
+            result[kind] = self.rows(kind)
+        return result
+
+
+def compare_sheets(
+    base: pd.DataFrame,
+    new: pd.DataFrame,
+    columns: List[str],
+    key_column: str | None,
+) -> SheetDiff | None:
+    """Return the added, removed and changed rows between two sheets.
+
+    ``base`` and ``new`` hold normalized string values for ``columns``.
+    Rows are aligned with a hash join on ``key_column`` and every column is
+    compared at once. ``None`` is returned when the sheets agree.
+    """
+    base_keys = _row_keys(base, key_column)
+    new_keys = _row_keys(new, key_column)
+    joined = base_keys.merge(
+        new_keys,
+        on=["key", "occurrence"],
+        how="outer",
+        suffixes=("_base", "_new"),
+        indicator=True,
+        sort=False,
+    )
+    side = joined["_merge"].to_numpy()
+
+    matched = joined[side == "both"]
+    base_pos = matched["row_base"].to_numpy(dtype=np.int64) - 2
+    new_pos = matched["row_new"].to_numpy(dtype=np.int64) - 2
+    base_values = base[columns].to_numpy(dtype=object)
+    new_values = new[columns].to_numpy(dtype=object)
+    change_mask = base_values[base_pos] != new_values[new_pos]
+    changed = change_mask.any(axis=1)
+    order = np.argsort(new_pos[changed], kind="stable")
+    base_pos, new_pos, change_mask = (
+        base_pos[changed][order],
+        new_pos[changed][order],
+        change_mask[changed][order],
+    )
+
+    added_pos = np.sort(
+        joined.loc[side == "right_only", "row_new"].to_numpy(dtype=np.int64) - 2
+    )
+    removed_pos = np.sort(
+        joined.loc[side == "left_only", "row_base"].to_numpy(dtype=np.int64) - 2
+    )
+    if not (len(added_pos) or len(removed_pos) or len(new_pos)):
+        return None
+
+    # Bit ``i`` of a row's pattern is set when ``columns[i]`` changed.
+    patterns = change_mask.astype(np.int64) @ (1 << np.arange(len(columns), dtype=np.int64))
+    base_take = np.concatenate([removed_pos, base_pos])
+    new_take = np.concatenate([added_pos, new_pos])
+    return SheetDiff(
+        columns,
+        key_column,
+        added_pos,
+        removed_pos,
+        base_pos,
+        new_pos,
+        patterns,
+        (
+            base_keys["key"].to_numpy()[base_take].tolist(),
+            base_values[base_take].tolist(),
+        ),
+        (
+            new_keys["key"].to_numpy()[new_take].tolist(),
+            new_values[new_take].tolist(),
+        ),
+    )
+
+
+def diff_sheet(
+    base: pd.DataFrame,
+    new: pd.DataFrame,
+    columns: List[str],
+    key_column: str | None,
+) -> Dict[str, Any] | None:
+    """Return every row of :func:`compare_sheets` as JSON-ready dicts."""
+    sheet_diff = compare_sheets(base, new, columns, key_column)
+    return None if sheet_diff is None else sheet_diff.to_dict()
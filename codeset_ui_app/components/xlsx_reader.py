@@ -0,0 +1,554 @@
+"""Streaming reader for the worksheets of an ``.xlsx`` workbook.
+
+:func:`openpyxl.load_workbook` builds a ``Cell`` object, with its style, for
+every cell of every worksheet before anything can be displayed. The
+:class:`XlsxReader` in this module instead streams a single worksheet's XML
+with an incremental parser and appends each cell value straight into a
+per-column list, so a sheet can be turned into a DataFrame without any
+intermediate cell objects and without touching the other worksheets.
+
+The data validations of a worksheet are collected during the same pass and
+the workbook's defined names are read from ``workbook.xml`` when the reader
+is opened. The reader exposes the small part of the :class:`openpyxl`
+workbook API used by :mod:`dropdown_logic` and :mod:`formula_logic` (``[]``
+lookup by title, ``cell``, ``iter_rows``, ``data_validations`` and
+``defined_names``), so those helpers work unchanged on either source.
+Cell values follow :mod:`openpyxl`'s formula workbook there (formula cells
+read as ``"=..."``), while :meth:`XlsxReader.columns` returns the values Excel
+cached for them, as displayed in the UI.
+
+Anything the reader cannot handle raises while the reader is opened so the
+caller can fall back to :mod:`openpyxl`.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import threading
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+from xml.etree.ElementTree import fromstring, iterparse
+from zipfile import ZipFile
+
+from openpyxl.comments import Comment
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string, coordinate_to_tuple, get_column_letter
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidationList
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_DOC_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+_ROW = f"{_MAIN_NS}row"
+_CELL = f"{_MAIN_NS}c"
+_VALUE = f"{_MAIN_NS}v"
+_FORMULA = f"{_MAIN_NS}f"
+_INLINE = f"{_MAIN_NS}is"
+_TEXT = f"{_MAIN_NS}t"
+_RUN = f"{_MAIN_NS}r"
+_VALIDATIONS = f"{_MAIN_NS}dataValidations"
+_COMMENT_TEXT = f"{_MAIN_NS}text"
+_DIGITS = "0123456789"
+# Rows kept by :meth:`StreamedSheet.release`: the header and the first data
+# row, which is where lookup formulas are looked for.
+_HEAD_ROWS = 2
+
+
+def cast_number(value: str) -> int | float:
+    """Return the numeric cell value ``value`` as an ``int`` or ``float``.
+
+    Same rule as :mod:`openpyxl`'s reader: values with a decimal point or an
+    exponent are floats.
+    """
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def _resolve_part(base: str, target: str) -> str:
+    """Return the archive member name for a relationship ``target``."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), target))
+
+
+def _read_rels(archive: ZipFile, part: str, kind: str | None = None) -> Dict[str, str]:
+    """Return relationship ids mapped to archive members for ``part``.
+
+    ``kind`` restricts the result to relationships whose type ends with it.
+    """
+    rels_path = posixpath.join(
+        posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels"
+    )
+    try:
+        src = archive.read(rels_path)
+    except KeyError:
+        return {}
+    rels: Dict[str, str] = {}
+    for _, el in iterparse(BytesIO(src)):
+        if el.tag != f"{_REL_NS}Relationship" or el.get("TargetMode") == "External":
+            continue
+        if kind is None or el.get("Type", "").endswith(kind):
+            rels[el.get("Id")] = _resolve_part(part, el.get("Target", ""))
+    return rels
+
+
+def _workbook_part(archive: ZipFile) -> str:
+    """Return the archive member holding the workbook definition."""
+    try:
+        src = archive.read("_rels/.rels")
+    except KeyError:
+        return "xl/workbook.xml"
+    for _, el in iterparse(BytesIO(src)):
+        if el.tag == f"{_REL_NS}Relationship" and el.get("Type", "").endswith("/officeDocument"):
+            return _resolve_part("", el.get("Target", ""))
+    return "xl/workbook.xml"
+
+
+def _sheet_parts(archive: ZipFile) -> Dict[str, str]:
+    """Return sheet titles mapped to their worksheet XML members."""
+    workbook_part = _workbook_part(archive)
+    rels = _read_rels(archive, workbook_part)
+    parts: Dict[str, str] = {}
+    for _, el in iterparse(BytesIO(archive.read(workbook_part))):
+        if el.tag == f"{_MAIN_NS}sheet":
+            target = rels.get(el.get(f"{_DOC_REL_NS}id"))
+            if target:
+                parts[el.get("name")] = target
+    return parts
+
+
+def _text_content(el) -> str:
+    """Return the plain text of a shared or inline string element.
+
+    Matches ``openpyxl.cell.text.Text.content``: the direct ``<t>`` followed
+    by the ``<t>`` of every rich-text run, ignoring phonetic runs.
+    """
+    snippets = []
+    for child in el:
+        if child.tag == _TEXT:
+            if child.text is not None:
+                snippets.append(child.text)
+        elif child.tag == _RUN:
+            text = child.findtext(_TEXT)
+            if text is not None:
+                snippets.append(text)
+    return "".join(snippets)
+
+
+class StreamedCell:
+    """Minimal stand-in for :class:`openpyxl.cell.Cell`."""
+
+    __slots__ = ("row", "column", "value", "data_type", "comment")
+
+    def __init__(self, row: int, column: int, value: Any, data_type: str, comment=None):
+        self.row = row
+        self.column = column
+        self.value = value
+        self.data_type = data_type
+        self.comment = comment
+
+
+class StreamedSheet:
+    """Values, formulas and validations of one streamed worksheet.
+
+    ``reload`` returns the per-column values again after :meth:`release`.
+    """
+
+    def __init__(
+        self,
+        title: str,
+        columns: List[List[Any]],
+        formulas: Dict[Tuple[int, int], str],
+        data_validations: DataValidationList,
+        comments: Dict[Tuple[int, int], Comment],
+        reload: Callable[[], List[List[Any]]] | None = None,
+    ):
+        self.title = title
+        self._columns: List[List[Any]] | None = columns
+        self._head: List[List[Any]] = []
+        self._shape = (len(columns[0]) if columns else 1, len(columns) or 1)
+        self._reload = reload
+        self.formulas = formulas
+        self.data_validations = data_validations
+        self.comments = comments
+
+    @property
+    def columns(self) -> List[List[Any]]:
+        if self._columns is None:
+            self._columns = self._reload()
+        return self._columns
+
+    @property
+    def released(self) -> bool:
+        return self._columns is None
+
+    def release(self) -> None:
+        """Drop the cell values below the first data row.
+
+        Formulas, validations and comments are kept; the other values are
+        streamed again by ``reload`` if a later lookup reaches them.
+        """
+        if self._reload is not None and self._columns is not None:
+            self._head = [column[:_HEAD_ROWS] for column in self._columns]
+            self._columns = None
+
+    @property
+    def max_row(self) -> int:
+        return self._shape[0]
+
+    @property
+    def max_column(self) -> int:
+        return self._shape[1]
+
+    @property
+    def values(self) -> Iterator[tuple]:
+        """Yield row tuples of cached values, like ``Worksheet.values``."""
+        return zip(*self.columns)
+
+    def cell(self, row: int, column: int) -> StreamedCell:
+        formula = self.formulas.get((row, column))
+        if formula is not None:
+            return StreamedCell(row, column, formula, "f", self.comments.get((row, column)))
+        columns = self._columns
+        if columns is None:
+            columns = self._head if row <= _HEAD_ROWS else self.columns
+        value = None
+        if column <= len(columns) and row <= len(columns[column - 1]):
+            value = columns[column - 1][row - 1]
+        data_type = "s" if isinstance(value, str) else "n"
+        return StreamedCell(row, column, value, data_type, self.comments.get((row, column)))
+
+    def iter_rows(
+        self,
+        min_row: int | None = None,
+        max_row: int | None = None,
+        min_col: int | None = None,
+        max_col: int | None = None,
+        values_only: bool = False,
+    ) -> Iterator[tuple]:
+        min_row = min_row or 1
+        min_col = min_col or 1
+        max_row = max_row or self.max_row
+        max_col = max_col or self.max_column
+        for row in range(min_row, max_row + 1):
+            cells = tuple(self.cell(row, col) for col in range(min_col, max_col + 1))
+            yield tuple(c.value for c in cells) if values_only else cells
+
+    def __getitem__(self, row: int) -> tuple:
+        return next(self.iter_rows(min_row=row, max_row=row))
+
+
+class XlsxReader:
+    """Read worksheets of an ``.xlsx`` file one at a time.
+
+    Opening the reader parses only the workbook definition, its relationships
+    and the cell styles. Worksheets and the shared string table are streamed
+    the first time they are needed and the result is kept for later lookups
+    until :meth:`release` drops a sheet's cell values.
+    """
+
+    def __init__(self, file_bytes: bytes):
+        self._archive = ZipFile(BytesIO(file_bytes))
+        self._lock = threading.RLock()
+        self._sheets: Dict[str, StreamedSheet] = {}
+        self._shared_strings: List[str] | None = None
+        self._parts = _sheet_parts(self._archive)
+        missing = [p for p in self._parts.values() if p not in self._archive.NameToInfo]
+        if not self._parts or missing:
+            raise ValueError("workbook has no readable worksheets")
+        self.sheetnames = list(self._parts)
+        self.defined_names: Dict[str, DefinedName] = {}
+        self.epoch = CALENDAR_WINDOWS_1900
+        self._active = 0
+        self._read_workbook()
+        self._date_styles, self._timedelta_styles = self._read_styles()
+
+    def _read_workbook(self) -> None:
+        root = fromstring(self._archive.read(_workbook_part(self._archive)))
+        props = root.find(f"{_MAIN_NS}workbookPr")
+        if props is not None and props.get("date1904") in ("1", "true"):
+            self.epoch = CALENDAR_MAC_1904
+        view = root.find(f"{_MAIN_NS}bookViews/{_MAIN_NS}workbookView")
+        if view is not None:
+            self._active = int(view.get("activeTab", 0))
+        for el in root.iterfind(f"{_MAIN_NS}definedNames/{_MAIN_NS}definedName"):
+            # Sheet-scoped names live on the worksheet in openpyxl and are not
+            # visible through ``wb.defined_names`` either.
+            if el.get("localSheetId") is None and el.text:
+                name = el.get("name")
+                self.defined_names[name] = DefinedName(name=name, attr_text=el.text)
+
+    def _read_styles(self) -> Tuple[set, set]:
+        """Return the cell style ids formatted as dates and as durations."""
+        rels = _read_rels(self._archive, _workbook_part(self._archive), "/styles")
+        part = next(iter(rels.values()), "xl/styles.xml")
+        try:
+            root = fromstring(self._archive.read(part))
+        except KeyError:
+            return set(), set()
+        custom = {
+            int(el.get("numFmtId")): el.get("formatCode", "")
+            for el in root.iterfind(f"{_MAIN_NS}numFmts/{_MAIN_NS}numFmt")
+        }
+        dates, durations = set(), set()
+        for idx, xf in enumerate(root.iterfind(f"{_MAIN_NS}cellXfs/{_MAIN_NS}xf")):
+            fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id, "General"))
+            if is_date_format(fmt):
+                dates.add(idx)
+                if is_timedelta_format(fmt):
+                    durations.add(idx)
+        return dates, durations
+
+    @property
+    def active(self) -> StreamedSheet:
+        return self[self.sheetnames[min(self._active, len(self.sheetnames) - 1)]]
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._parts
+
+    def __getitem__(self, title: str) -> StreamedSheet:
+        try:
+            return self._sheets[title]
+        except KeyError:
+            pass
+        if title not in self._parts:
+            raise KeyError(f"Worksheet {title} does not exist.")
+        with self._lock:
+            if title not in self._sheets:
+                self._sheets[title] = self._read_sheet(title)
+        return self._sheets[title]
+
+    def sheet_sizes(self) -> Dict[str, int]:
+        """Return the uncompressed size of each worksheet's XML in bytes."""
+        return {
+            title: self._archive.getinfo(part).file_size
+            for title, part in self._parts.items()
+        }
+
+    def columns(self, title: str) -> List[List[Any]]:
+        """Return the cached cell values of ``title`` as one list per column.
+
+        Every list spans rows ``1..max_row`` so ``columns[c][0]`` is the header.
+        """
+        return self[title].columns
+
+    def release(self, title: str) -> None:
+        """Drop the cached cell values of ``title`` once its DataFrame is built.
+
+        Only the header and first data row stay in memory; see
+        :meth:`StreamedSheet.release`.
+        """
+        sheet = self._sheets.get(title)
+        if sheet is not None:
+            sheet.release()
+
+    def project(
+        self, title: str, select: Callable[[List[Any]], Iterable[int]]
+    ) -> Dict[int, List[Any]]:
+        """Return the cached values of the columns of ``title`` chosen by ``select``.
+
+        ``select`` receives the header row as a list and returns the 0-based
+        positions of the columns to keep. Like :meth:`columns`, every returned
+        list starts with the header and spans the same rows. Cells of other
+        columns are skipped while streaming, formulas, validations and
+        comments are not collected and the sheet is not kept by the reader,
+        so a sheet with no chosen column costs little more than its first row.
+        """
+        sheet = self._sheets.get(title)
+        if sheet is not None and not sheet.released:
+            columns = sheet.columns
+            return {p: columns[p] for p in select([c[0] for c in columns])}
+        if title not in self._parts:
+            raise KeyError(f"Worksheet {title} does not exist.")
+        header: Dict[int, Any] = {}
+        chosen: Dict[int, List[Any]] | None = None
+        letter_columns: Dict[str, int] = {}
+        max_row = 1
+        row_counter = 0
+        with self._archive.open(self._parts[title]) as fh:
+            for _, el in iterparse(fh):
+                if el.tag != _ROW:
+                    continue
+                r = el.get("r")
+                row_counter = int(float(r)) if r else row_counter + 1
+                if chosen is None and row_counter > 1:
+                    chosen = self._chosen_columns(header, select)
+                    if not chosen:
+                        break
+                col_counter = 0
+                for c in el:
+                    if c.tag != _CELL:
+                        continue
+                    ref = c.get("r")
+                    if ref:
+                        # Only the column letters are looked at until the
+                        # cell turns out to be in a chosen column.
+                        letters = ref.rstrip(_DIGITS)
+                        col_counter = letter_columns.get(letters) or letter_columns.setdefault(
+                            letters, column_index_from_string(letters)
+                        )
+                    else:
+                        col_counter += 1
+                    if chosen is None:
+                        header[col_counter] = self._cell_value(c, int(c.get("s", 0)))
+                        continue
+                    column = chosen.get(col_counter)
+                    if column is None:
+                        continue
+                    row = int(ref[len(letters):]) if ref else row_counter
+                    value = self._cell_value(c, int(c.get("s", 0)))
+                    gap = row - 1 - len(column)
+                    if gap >= 0:
+                        if gap:
+                            column.extend([None] * gap)
+                        column.append(value)
+                    else:
+                        column[row - 1] = value
+                    if row > max_row:
+                        max_row = row
+                el.clear()
+        if chosen is None:
+            chosen = self._chosen_columns(header, select)
+        for column in chosen.values():
+            if len(column) < max_row:
+                column.extend([None] * (max_row - len(column)))
+        return {col - 1: column for col, column in chosen.items()}
+
+    @staticmethod
+    def _chosen_columns(
+        header: Dict[int, Any], select: Callable[[List[Any]], Iterable[int]]
+    ) -> Dict[int, List[Any]]:
+        """Return a list holding the header for every 1-based column ``select`` keeps."""
+        labels = [header.get(col) for col in range(1, max(header, default=0) + 1)]
+        return {p + 1: [labels[p]] for p in select(labels)}
+
+    def _strings(self) -> List[str]:
+        if self._shared_strings is None:
+            rels = _read_rels(self._archive, _workbook_part(self._archive), "/sharedStrings")
+            part = next(iter(rels.values()), "xl/sharedStrings.xml")
+            strings: List[str] = []
+            if part in self._archive.NameToInfo:
+                with self._archive.open(part) as fh:
+                    for _, el in iterparse(fh):
+                        if el.tag == f"{_MAIN_NS}si":
+                            strings.append(_text_content(el).replace("x005F_", ""))
+                            el.clear()
+            self._shared_strings = strings
+        return self._shared_strings
+
+    def _cell_value(self, el, style_id: int) -> Any:
+        """Convert cell element ``el`` the way ``openpyxl`` does with ``data_only``."""
+        data_type = el.get("t", "n")
+        if data_type == "inlineStr":
+            child = el.find(_INLINE)
+            return _text_content(child) if child is not None else None
+        value = el.findtext(_VALUE) or None
+        if value is None:
+            return None
+        if data_type == "n":
+            value = cast_number(value)
+            if style_id in self._date_styles:
+                try:
+                    value = from_excel(
+                        value, self.epoch, timedelta=style_id in self._timedelta_styles
+                    )
+                except (OverflowError, ValueError):
+                    value = "#VALUE!"
+            return value
+        if data_type == "s":
+            return self._strings()[int(value)]
+        if data_type == "b":
+            return bool(int(value))
+        if data_type == "d":
+            return from_ISO8601(value)
+        return value
+
+    def _read_sheet(self, title: str) -> StreamedSheet:
+        part = self._parts[title]
+        columns: List[List[Any]] = []
+        formulas: Dict[Tuple[int, int], str] = {}
+        shared_formulas: Dict[str, Translator] = {}
+        validations = DataValidationList()
+        max_row = 0
+        row_counter = 0
+        with self._archive.open(part) as fh:
+            for _, el in iterparse(fh):
+                tag = el.tag
+                if tag == _ROW:
+                    r = el.get("r")
+                    row_counter = int(float(r)) if r else row_counter + 1
+                    col_counter = 0
+                    for c in el:
+                        if c.tag != _CELL:
+                            continue
+                        ref = c.get("r")
+                        if ref:
+                            row, col_counter = coordinate_to_tuple(ref)
+                        else:
+                            row = row_counter
+                            col_counter += 1
+                        col = col_counter
+                        value = self._cell_value(c, int(c.get("s", 0)))
+                        f = c.find(_FORMULA)
+                        if f is not None:
+                            formula = "=" + (f.text or "")
+                            if f.get("t") == "shared":
+                                idx = f.get("si")
+                                coord = ref or f"{get_column_letter(col)}{row}"
+                                if idx in shared_formulas:
+                                    formula = shared_formulas[idx].translate_formula(coord)
+                                elif formula != "=":
+                                    shared_formulas[idx] = Translator(formula, coord)
+                            formulas[(row, col)] = formula
+                        while len(columns) < col:
+                            columns.append([])
+                        column = columns[col - 1]
+                        gap = row - 1 - len(column)
+                        if gap >= 0:
+                            if gap:
+                                column.extend([None] * gap)
+                            column.append(value)
+                        else:
+                            column[row - 1] = value
+                        if row > max_row:
+                            max_row = row
+                    el.clear()
+                elif tag == _VALIDATIONS:
+                    validations = DataValidationList.from_tree(el)
+                    el.clear()
+        for column in columns:
+            if len(column) < max_row:
+                column.extend([None] * (max_row - len(column)))
+        return StreamedSheet(
+            title,
+            columns,
+            formulas,
+            validations,
+            self._read_comments(part),
+            lambda: self._reload_columns(title),
+        )
+
+    def _reload_columns(self, title: str) -> List[List[Any]]:
+        with self._lock:
+            return self._read_sheet(title).columns
+
+    def _read_comments(self, part: str) -> Dict[Tuple[int, int], Comment]:
+        comments: Dict[Tuple[int, int], Comment] = {}
+        for member in _read_rels(self._archive, part, "/comments").values():
+            if member not in self._archive.NameToInfo:
+                continue
+            root = fromstring(self._archive.read(member))
+            authors = [a.text or "" for a in root.iterfind(f"{_MAIN_NS}authors/{_MAIN_NS}author")]
+            for el in root.iterfind(f"{_MAIN_NS}commentList/{_MAIN_NS}comment"):
+                text = el.find(_COMMENT_TEXT)
+                author_id = int(el.get("authorId", 0))
+                author = authors[author_id] if author_id < len(authors) else ""
+                comments[coordinate_to_tuple(el.get("ref"))] = Comment(
+                    _text_content(text) if text is not None else "", author
+                )
+        return comments
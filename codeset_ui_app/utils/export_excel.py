@@ -45,6 +45,19 @@ def export_workbook(
         ws = wb[sheet]
         headers = [cell.value for cell in ws[1]]
         col_map = {str(h): idx + 1 for idx, h in enumerate(headers)}
+        # Repeated headers are matched by occurrence: the n-th ``CODE`` column
+        # of the sheet receives the n-th ``CODE`` column of the frame, or the
+        # frame's last one when it has fewer.
+        df_positions: Dict[str, list] = {}
+        for position, col in enumerate(df.columns):
+            df_positions.setdefault(str(col), []).append(position)
+        seen: Dict[str, int] = {}
+        targets = []
+        for idx, h in enumerate(headers):
+            occurrence = seen[str(h)] = seen.get(str(h), -1) + 1
+            positions = df_positions.get(str(h))
+            source = positions[min(occurrence, len(positions) - 1)] if positions else None
+            targets.append((idx + 1, source))
 
         # Prepare template styles from the first data row (row 2) if it exists
         style_row = 2 if ws.max_row >= 2 else None
@@ -54,18 +67,19 @@ def export_workbook(
         } if style_row else {}
 
         # Write DataFrame rows
-        records = df.to_dict(orient="records")
+        records = df.to_numpy(dtype=object).tolist()
         for r_idx, row in enumerate(records, start=2):
-            for header, c_idx in col_map.items():
-                value = row.get(header, "")
+            for c_idx, source in targets:
+                value = row[source] if source is not None else ""
                 cell = ws.cell(row=r_idx, column=c_idx, value=value)
                 if r_idx > ws.max_row and c_idx in styles:
                     cell._style = styles[c_idx]
 
-        # Clear any remaining rows beyond the data frame length
+        # Clear any remaining rows beyond the data frame length. ``ws.cell``
+        # ignores ``value=None``, so the value is assigned explicitly.
         for r in range(len(records) + 2, ws.max_row + 1):
             for c_idx in col_map.values():
-                ws.cell(row=r, column=c_idx, value=None)
+                ws.cell(row=r, column=c_idx).value = None
 
     for ws in wb.worksheets:
         ws.protection.sheet = protected
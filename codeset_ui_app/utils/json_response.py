@@ -0,0 +1,137 @@
+"""Compact, conditional and compressed JSON responses.
+
+Sheet payloads can run to many megabytes. Bodies are encoded once without
+whitespace, tagged with a weak ``ETag`` derived from their bytes so a client
+revalidating an unchanged sheet gets ``304 Not Modified``, and compressed
+with brotli (when the optional :mod:`brotli` package is installed) or gzip
+according to the request's ``Accept-Encoding`` header. The tag is weak
+because the compressed and uncompressed bodies share it.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict
+
+from flask import Response, request
+
+try:
+    import brotli
+except ModuleNotFoundError:  # optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent as is; compressing them saves little.
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def encode_json(payload: Any) -> bytes:
+    """Return ``payload`` as compact UTF-8 JSON."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def body_etag(body: bytes) -> str:
+    """Return a weak ETag for ``body`` and every content-coding of it."""
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _encoding_weights() -> Dict[str, float]:
+    """Return the ``q`` value of every coding in ``Accept-Encoding``."""
+    weights: Dict[str, float] = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    return weights
+
+
+def _accepted_encoding() -> str | None:
+    """Return the supported coding the client prefers, ``None`` for identity.
+
+    Codings listed with ``q=0`` are refused and ``*`` stands for every coding
+    not listed. Brotli wins ties with gzip.
+    """
+    weights = _encoding_weights()
+    best, best_weight = None, 0.0
+    for coding in ("br", "gzip") if brotli is not None else ("gzip",):
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def _etag_matches(etag: str) -> bool:
+    """Return whether ``If-None-Match`` lists ``etag``, compared weakly."""
+    header = request.headers.get("If-None-Match", "")
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return opaque in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response: Response, variants: Dict[str, bytes] | None = None) -> Response:
+    """Compress ``response`` in place when the client accepts it.
+
+    ``variants`` may cache compressed bodies by encoding so a body that is
+    served repeatedly is only compressed once.
+    """
+    response.vary.add("Accept-Encoding")
+    if (
+        response.direct_passthrough
+        or response.status_code != 200
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    encoding = _accepted_encoding()
+    if encoding is None:
+        return response
+    body = variants.get(encoding) if variants is not None else None
+    if body is None:
+        raw = response.get_data()
+        if len(raw) < MIN_COMPRESS_BYTES:
+            return response
+        body = _compress(raw, encoding)
+        if variants is not None:
+            variants[encoding] = body
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def json_response(
+    body: bytes, etag: str | None = None, variants: Dict[str, bytes] | None = None
+) -> Response:
+    """Return encoded JSON ``body`` as a conditional, compressed response.
+
+    ``etag`` defaults to :func:`body_etag`. A request whose ``If-None-Match``
+    lists it, weak or strong, receives an empty ``304`` response.
+    """
+    etag = etag or body_etag(body)
+    if _etag_matches(etag):
+        response = Response(status=304)
+        response.headers["ETag"] = etag
+        response.vary.add("Accept-Encoding")
+        return response
+    response = Response(body, mimetype="application/json")
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return compress_response(response, variants)
@@ -0,0 +1,163 @@
+"""Persisted, incremental index of codeset workbooks below a repository base.
+
+Walking a large repository checkout, especially on a network share, with
+``Path.rglob`` lists and stats every file on every scan. The index instead
+records, for each directory, its modification time, the codeset workbooks it
+directly contains and its subdirectories. A rescan still stats every indexed
+directory, but only lists directories whose mtime changed, i.e. those where
+entries were added, removed or renamed. Hidden directories and
+:data:`PRUNE_DIRS` are never entered, and the directories of each level are
+scanned concurrently.
+
+The index is stored as JSON under :data:`INDEX_DIR`, one file per base. Like
+the parse cache, it lives in a per-user directory closed to other users, so
+nobody else can plant workbook paths in it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import posixpath
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List
+
+try:  # pragma: no cover - import resolution path tested indirectly
+    workbook_cache = import_module("codeset_ui_app.utils.workbook_cache")
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    workbook_cache = import_module("utils.workbook_cache")
+
+# Bump whenever the stored layout or the file selection rules change.
+INDEX_VERSION = 1
+
+INDEX_DIR = Path(os.environ.get("CODESET_INDEX_DIR") or workbook_cache.user_cache_dir() / "index")
+SCAN_WORKERS = int(os.environ.get("CODESET_SCAN_WORKERS", 8))
+
+# Directory names that never contain codeset workbooks.
+PRUNE_DIRS = {"__pycache__", "node_modules", "site-packages", "venv"}
+
+
+def _index_path(base: Path) -> Path:
+    digest = hashlib.sha1(str(base.resolve()).encode("utf-8")).hexdigest()[:16]
+    return INDEX_DIR / f"repository-index-{digest}.json"
+
+
+def is_codeset_workbook(name: str) -> bool:
+    """Return whether file ``name`` is a codeset workbook."""
+    return name.endswith(".xlsx") and "codeset" in name.lower()
+
+
+def is_pruned(name: str) -> bool:
+    """Return whether directory ``name`` is never scanned."""
+    return name.startswith(".") or name in PRUNE_DIRS
+
+
+def load_index(base: Path) -> Dict[str, Dict[str, Any]] | None:
+    """Return the stored directory entries for ``base`` or ``None``."""
+    if not workbook_cache.private_dir(INDEX_DIR):
+        return None
+    try:
+        payload = json.loads(_index_path(base).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != INDEX_VERSION or payload.get("base") != str(base.resolve()):
+        return None
+    return payload.get("dirs")
+
+
+def save_index(base: Path, dirs: Dict[str, Dict[str, Any]]) -> None:
+    """Persist ``dirs`` for ``base``; failures are ignored."""
+    if not workbook_cache.private_dir(INDEX_DIR, create=True):
+        return
+    path = _index_path(base)
+    payload = {"version": INDEX_VERSION, "base": str(base.resolve()), "dirs": dirs}
+    tmp_name = None
+    try:
+        # A unique temporary file keeps concurrent scans of one base apart.
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{path.name}.", suffix=".tmp", dir=INDEX_DIR)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp_name, path)
+    except OSError:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+
+def indexed_files(dirs: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Return workbook paths relative to the base, using ``/`` separators."""
+    return [
+        posixpath.join(rel, name) if rel else name
+        for rel, entry in dirs.items()
+        for name in entry["files"]
+    ]
+
+
+def _scan_dir(
+    base: Path, rel: str, previous: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any] | None:
+    """Return the index entry for directory ``rel``, listing it only if changed."""
+    path = base / rel if rel else base
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    entry = previous.get(rel)
+    if entry is not None and entry["mtime"] == mtime:
+        return entry
+    files: List[str] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for item in entries:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        if not is_pruned(item.name):
+                            subdirs.append(item.name)
+                    elif is_codeset_workbook(item.name) and item.is_file():
+                        files.append(item.name)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return {"mtime": mtime, "files": sorted(files), "subdirs": sorted(subdirs)}
+
+
+def scan_dirs(base: Path, workers: int | None = None) -> Dict[str, Dict[str, Any]]:
+    """Rescan ``base`` incrementally and return the directory entries.
+
+    Entries are keyed by directory path relative to ``base`` (``""`` for the
+    base itself). The refreshed index is persisted when anything changed.
+    """
+    previous = load_index(base) or {}
+    dirs: Dict[str, Dict[str, Any]] = {}
+    level = [""]
+    with ThreadPoolExecutor(max_workers=workers or SCAN_WORKERS) as pool:
+        while level:
+            entries = pool.map(lambda rel: _scan_dir(base, rel, previous), level)
+            next_level: List[str] = []
+            for rel, entry in zip(level, entries):
+                if entry is None:
+                    continue
+                dirs[rel] = entry
+                next_level.extend(
+                    posixpath.join(rel, name) if rel else name for name in entry["subdirs"]
+                )
+            level = next_level
+    if dirs != previous:
+        save_index(base, dirs)
+    return dirs
+
+
+def scan(base: Path, workers: int | None = None) -> List[str]:
+    """Rescan ``base`` incrementally and return its codeset workbook paths.
+
+    Paths are relative to ``base`` and use ``/`` separators.
+    """
+    return indexed_files(scan_dirs(base, workers))
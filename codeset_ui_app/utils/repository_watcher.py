@@ -0,0 +1,271 @@
+"""Background watcher reporting codeset workbooks added to or removed from a base.
+
+On Linux the watcher subscribes to inotify events for every indexed
+directory (through :mod:`ctypes`, so no extra dependency is needed) and turns
+them into added, removed and renamed workbook paths without rescanning.
+Elsewhere, or when inotify is unavailable, it falls back to polling the
+incremental :mod:`repository_index` every ``interval`` seconds, which only
+lists directories whose mtime changed. A queue overflow also triggers such a
+rescan.
+
+Changes are reported through ``on_change(added, removed, renamed)`` with
+paths relative to the base using ``/`` separators; ``renamed`` holds
+``(old, new)`` pairs.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import posixpath
+import select
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from . import repository_index
+
+ChangeCallback = Callable[[List[str], List[str], List[Tuple[str, str]]], None]
+
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Thin wrapper around the inotify system calls."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add(self, path: Path) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {path}")
+        return wd
+
+    def remove(self, wd: int) -> None:
+        self._rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Tuple[int, int, int, str]]:
+        """Return the events queued within ``timeout`` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _join(parent: str, name: str) -> str:
+    return posixpath.join(parent, name) if parent else name
+
+
+class RepositoryWatcher:
+    """Report workbook changes below ``base`` to ``on_change``.
+
+    Call :meth:`start` to watch in a daemon thread, or :meth:`prime` followed
+    by :meth:`check` to drive the watcher synchronously.
+    """
+
+    def __init__(
+        self,
+        base: Path,
+        on_change: ChangeCallback,
+        interval: float = 5.0,
+        use_inotify: bool = True,
+    ):
+        self.base = Path(base)
+        self.on_change = on_change
+        self.interval = interval
+        self._use_inotify = use_inotify
+        self._inotify: _Inotify | None = None
+        self._watches: Dict[int, str] = {}
+        self._files: Set[str] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "polling"
+
+    def prime(self) -> None:
+        """Record the current workbooks and subscribe to directory events."""
+        dirs = repository_index.scan_dirs(self.base)
+        self._files = set(repository_index.indexed_files(dirs))
+        if not self._use_inotify:
+            return
+        try:
+            self._inotify = _Inotify()
+            for rel in dirs:
+                self._watch(rel)
+        except (OSError, AttributeError):
+            # No inotify on this platform, or the watch limit was reached.
+            self._close_inotify()
+
+    def start(self) -> None:
+        """Prime and watch in a daemon thread until :meth:`stop` is called."""
+        def _run() -> None:
+            self.prime()
+            while not self._stop.is_set():
+                if self._inotify is None:
+                    if self._stop.wait(self.interval):
+                        break
+                    self.check()
+                else:
+                    self.check(timeout=1.0)
+            self._close_inotify()
+
+        self._thread = threading.Thread(target=_run, name="repository-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def check(self, timeout: float = 0.0) -> bool:
+        """Process pending changes and return whether any were reported."""
+        if self._inotify is None:
+            current = set(repository_index.scan(self.base))
+            return self._report(current, [])
+        events = self._inotify.read(timeout)
+        if not events:
+            return False
+        if any(mask & IN_Q_OVERFLOW for _, mask, _, _ in events):
+            return self._report(set(repository_index.scan(self.base)), [])
+        return self._apply_events(events)
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches.clear()
+
+    def _watch(self, rel: str) -> None:
+        wd = self._inotify.add(self.base / rel if rel else self.base)
+        self._watches[wd] = rel
+
+    def _unwatch(self, rel: str) -> None:
+        """Stop watching directory ``rel`` and everything below it."""
+        prefix = rel + "/"
+        for wd, path in list(self._watches.items()):
+            if path == rel or path.startswith(prefix):
+                self._inotify.remove(wd)
+                del self._watches[wd]
+
+    def _walk(self, rel: str) -> Set[str]:
+        """Watch directory ``rel`` and its subdirectories; return their workbooks."""
+        found: Set[str] = set()
+        for root, subdirs, files in os.walk(self.base / rel):
+            subdirs[:] = [d for d in subdirs if not repository_index.is_pruned(d)]
+            root_rel = Path(root).relative_to(self.base).as_posix()
+            root_rel = "" if root_rel == "." else root_rel
+            try:
+                self._watch(root_rel)
+            except OSError:
+                pass
+            found.update(
+                _join(root_rel, name)
+                for name in files
+                if repository_index.is_codeset_workbook(name)
+            )
+        return found
+
+    def _under(self, files: Iterable[str], rel: str) -> Set[str]:
+        prefix = rel + "/"
+        return {f for f in files if f.startswith(prefix)}
+
+    def _apply_events(self, events: List[Tuple[int, int, int, str]]) -> bool:
+        files = set(self._files)
+        renamed: List[Tuple[str, str]] = []
+        moved_from: Dict[int, Tuple[str, bool]] = {}
+        for wd, mask, cookie, name in events:
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            parent = self._watches.get(wd)
+            if parent is None or not name:
+                continue
+            rel = _join(parent, name)
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and repository_index.is_pruned(name):
+                continue
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = (rel, is_dir)
+                continue
+            if mask & IN_MOVED_TO and cookie in moved_from:
+                old, _ = moved_from.pop(cookie)
+                if is_dir:
+                    pairs = [(f, rel + f[len(old):]) for f in self._under(files, old)]
+                    files -= {o for o, _ in pairs}
+                    found = self._walk(rel)
+                    files |= found
+                    renamed.extend(p for p in pairs if p[1] in found)
+                elif old in files:
+                    files.discard(old)
+                    if repository_index.is_codeset_workbook(name):
+                        files.add(rel)
+                        renamed.append((old, rel))
+                elif repository_index.is_codeset_workbook(name):
+                    files.add(rel)
+                continue
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                if is_dir:
+                    files |= self._walk(rel)
+                elif repository_index.is_codeset_workbook(name):
+                    files.add(rel)
+            elif mask & IN_DELETE:
+                if is_dir:
+                    files -= self._under(files, rel)
+                else:
+                    files.discard(rel)
+        # Entries moved out of the base never get a matching IN_MOVED_TO.
+        for rel, is_dir in moved_from.values():
+            if is_dir:
+                files -= self._under(files, rel)
+                self._unwatch(rel)
+            else:
+                files.discard(rel)
+        return self._report(files, renamed)
+
+    def _report(self, files: Set[str], renamed: List[Tuple[str, str]]) -> bool:
+        renamed = [(o, n) for o, n in renamed if o in self._files and n in files]
+        old_names = {o for o, _ in renamed}
+        new_names = {n for _, n in renamed}
+        added = sorted(files - self._files - new_names)
+        removed = sorted(self._files - files - old_names)
+        self._files = files
+        if not (added or removed or renamed):
+            return False
+        self.on_change(added, removed, renamed)
+        return True
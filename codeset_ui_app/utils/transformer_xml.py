@@ -1,8 +1,14 @@
 from __future__ import annotations
+from importlib import import_module
 from typing import Dict, List
 import pandas as pd
 from xml.sax.saxutils import quoteattr
 
+try:  # pragma: no cover - import resolution path tested indirectly
+    resolve_columns = import_module("codeset_ui_app.components.column_roles").resolve_columns
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    resolve_columns = import_module("components.column_roles").resolve_columns
+
 
 def _str_series(df: pd.DataFrame, col: str) -> pd.Series:
     """Return a stripped string Series for ``col`` using the first column if duplicated."""
@@ -34,9 +40,151 @@ def _split_code_display(text: str) -> tuple[str, str]:
             return left.strip(), right.strip()
     return "", text.strip()
 
+def _codeset_info(sheet: str, df: pd.DataFrame) -> dict | None:
+    """Return the codeset entry for ``sheet`` or ``None`` without key columns."""
+    roles = resolve_columns(df.columns)
+    code_col = roles.code
+    display_col = roles.display
+    std_code_col = roles.mapped_code or roles.std_code
+    mapped_sd_col = roles.mapped_description
+    std_desc_col = roles.std_description
+    subdef_col = roles.sub_definition or roles.subsection
+    oid_col = roles.oid
+    url_col = roles.url
+    if (
+        code_col is None
+        and display_col is None
+        and std_code_col is None
+        and mapped_sd_col is None
+        and std_desc_col is None
+    ):
+        return None
+
+    codeset_info: dict = {"Name": sheet, "Codes": []}
+
+    if oid_col:
+        oid_val = next((v for v in _str_series(df, oid_col) if v), "")
+        if oid_val:
+            codeset_info["Oid"] = oid_val
+    if url_col:
+        url_val = next((v for v in _str_series(df, url_col) if v), "")
+        if url_val:
+            codeset_info["Url"] = url_val
+
+    code_series = _str_series(df, code_col) if code_col else pd.Series([""] * len(df))
+    display_series = _str_series(df, display_col) if display_col else pd.Series([""] * len(df))
+    std_code_series = _str_series(df, std_code_col) if std_code_col else pd.Series([""] * len(df))
+    mapped_sd_series = _str_series(df, mapped_sd_col) if mapped_sd_col else pd.Series([""] * len(df))
+    std_desc_series = _str_series(df, std_desc_col) if std_desc_col else pd.Series([""] * len(df))
+    subdef_series = _str_series(df, subdef_col) if subdef_col else pd.Series([""] * len(df))
+    def_col = roles.definition
+    def_series = _str_series(df, def_col) if def_col else pd.Series([""] * len(df))
+
+    if code_col:
+        dup_counts = code_series[code_series != ""].value_counts()
+        dup_codes = dup_counts[dup_counts > 1].index.tolist()
+        if dup_codes:
+            dup_msgs: List[str] = []
+            for dup_code in dup_codes:
+                rows = [str(idx + 2) for idx, val in code_series.items() if val == dup_code]
+                dup_msgs.append(
+                    f"{sheet} rows {', '.join(rows)} have duplicate CODE '{dup_code}'"
+                )
+            raise ValueError("; ".join(dup_msgs))
+
+    code_map: Dict[tuple[str, str], dict] = {}
+    code_order_keys: List[tuple[str, str]] = []
+    has_mapped_col = mapped_sd_col is not None
+    has_subdef_col = subdef_col is not None
+
+    for lc, ld, sc, mapped_sd, std_desc, subdef, definition in zip(
+        code_series,
+        display_series,
+        std_code_series,
+        mapped_sd_series,
+        std_desc_series,
+        subdef_series,
+        def_series,
+    ):
+        lc = (lc or "").strip()
+        ld = (ld or "").strip()
+        if not lc or not ld:
+            continue
+        sc = (sc or "").strip()
+        mapped_sd = (mapped_sd or "").strip()
+        std_desc = (std_desc or "").strip()
+        subdef = (subdef or "").strip()
+        definition = (definition or "").strip()
+        mapping_selected = False
+        if mapped_sd:
+            mapping_selected = True
+        elif subdef:
+            mapping_selected = True
+        elif not (has_mapped_col or has_subdef_col):
+            mapping_selected = bool(definition)
+        sd = ""
+        final_sc = ""
+        mapped_code = ""
+        def_code = ""
+        def_desc = ""
+        if mapping_selected:
+            if mapped_sd:
+                mapped_code, sd = _split_code_display(mapped_sd)
+            if not sd and std_desc:
+                sd = std_desc
+            if definition:
+                def_code, def_desc = _split_code_display(definition)
+                if not sd:
+                    sd = def_desc
+            if sd and std_desc == sd and sc:
+                final_sc = sc
+            elif sd and def_desc == sd and def_code:
+                final_sc = def_code
+            elif mapped_code:
+                final_sc = mapped_code
+            elif def_code:
+                final_sc = def_code
+            elif sc and not std_desc:
+                final_sc = sc
+            if (not final_sc or not sd) and subdef:
+                sc2, sd2 = _split_code_display(subdef)
+                if sd2 and not sd:
+                    sd = sd2
+                if sd2 == sd and sc2:
+                    final_sc = sc2
+                elif not final_sc and sc2:
+                    final_sc = sc2
+            if sd and not final_sc:
+                matches = std_desc_series[std_desc_series == sd]
+                if not matches.empty:
+                    idx = matches.index[0]
+                    sc_lookup = std_code_series.iloc[idx].strip()
+                    if sc_lookup:
+                        final_sc = sc_lookup
+        key = (lc, ld)
+        if key in code_map:
+            existing = code_map[key]
+            if final_sc and not existing.get("StandardCode"):
+                existing["StandardCode"] = final_sc
+            if sd and not existing.get("StandardDisplay"):
+                existing["StandardDisplay"] = sd
+        else:
+            code_map[key] = {
+                "LocalCode": lc,
+                "LocalDisplay": ld,
+                "StandardCode": final_sc,
+                "StandardDisplay": sd,
+            }
+            code_order_keys.append(key)
+    codeset_info["Codes"].extend(code_map[k] for k in code_order_keys)
+    return codeset_info
+
+
 def build_transformer_xml(
     data: Dict[str, pd.DataFrame],
     freetext: Dict[str, bool] | None = None,
+    fingerprints: Dict[str, str] | None = None,
+    cache: Dict[str, tuple] | None = None,
 ) -> str:
     """Return an indented XML string representing ``data`` as a codeset transformer.
 
@@ -49,6 +197,10 @@ def build_transformer_xml(
         field should allow free text.  The argument is retained for backwards
         compatibility but is currently ignored because the generated
         transformers omit the ``Fields`` section.
+    fingerprints, cache:
+        Optional sheet fingerprints and a dict in which the codeset entry of
+        each sheet is kept, so sheets whose fingerprint is unchanged since the
+        previous call are not processed again.
     """
 
     # Collect codeset information from workbook data
@@ -56,154 +208,15 @@ def build_transformer_xml(
     for sheet, df in data.items():
         if not isinstance(df, pd.DataFrame):
             continue
-        col_map = {c.strip().upper().replace(" ", "_"): c for c in df.columns}
-        code_col = col_map.get("CODE")
-        display_col = col_map.get("DISPLAY_VALUE") or col_map.get("DISPLAY")
-        std_code_col = (
-            col_map.get("MAPPED_STANDARD_CODE")
-            or col_map.get("MAPPED_STD_CODE")
-            or col_map.get("STANDARD_CODE")
-            or col_map.get("STD_CODE")
-        )
-        mapped_sd_col = (
-            col_map.get("MAPPED_STD_DESCRIPTION")
-            or col_map.get("MAPPED_STANDARD_DESCRIPTION")
-            or col_map.get("MAPPED_STD_DESC")
-        )
-        std_desc_col = (
-            col_map.get("STANDARD_DESCRIPTION")
-            or col_map.get("STD_DESCRIPTION")
-        )
-        subdef_col = col_map.get("SUBDEFINITION") or col_map.get("SUBSECTION")
-        oid_col = col_map.get("OID")
-        url_col = col_map.get("URL")
-        if (
-            code_col is None
-            and display_col is None
-            and std_code_col is None
-            and mapped_sd_col is None
-            and std_desc_col is None
-        ):
-            continue
-
-        codeset_info: dict = {"Name": sheet, "Codes": []}
-
-        if oid_col:
-            oid_val = next((v for v in _str_series(df, oid_col) if v), "")
-            if oid_val:
-                codeset_info["Oid"] = oid_val
-        if url_col:
-            url_val = next((v for v in _str_series(df, url_col) if v), "")
-            if url_val:
-                codeset_info["Url"] = url_val
-
-        code_series = _str_series(df, code_col) if code_col else pd.Series([""] * len(df))
-        display_series = _str_series(df, display_col) if display_col else pd.Series([""] * len(df))
-        std_code_series = _str_series(df, std_code_col) if std_code_col else pd.Series([""] * len(df))
-        mapped_sd_series = _str_series(df, mapped_sd_col) if mapped_sd_col else pd.Series([""] * len(df))
-        std_desc_series = _str_series(df, std_desc_col) if std_desc_col else pd.Series([""] * len(df))
-        subdef_series = _str_series(df, subdef_col) if subdef_col else pd.Series([""] * len(df))
-        def_col = col_map.get("DEFINITION")
-        def_series = _str_series(df, def_col) if def_col else pd.Series([""] * len(df))
-
-        if code_col:
-            dup_counts = code_series[code_series != ""].value_counts()
-            dup_codes = dup_counts[dup_counts > 1].index.tolist()
-            if dup_codes:
-                dup_msgs: List[str] = []
-                for dup_code in dup_codes:
-                    rows = [str(idx + 2) for idx, val in code_series.items() if val == dup_code]
-                    dup_msgs.append(
-                        f"{sheet} rows {', '.join(rows)} have duplicate CODE '{dup_code}'"
-                    )
-                raise ValueError("; ".join(dup_msgs))
-
-        code_map: Dict[tuple[str, str], dict] = {}
-        code_order_keys: List[tuple[str, str]] = []
-        has_mapped_col = mapped_sd_col is not None
-        has_subdef_col = subdef_col is not None
-
-        for lc, ld, sc, mapped_sd, std_desc, subdef, definition in zip(
-            code_series,
-            display_series,
-            std_code_series,
-            mapped_sd_series,
-            std_desc_series,
-            subdef_series,
-            def_series,
-        ):
-            lc = (lc or "").strip()
-            ld = (ld or "").strip()
-            if not lc or not ld:
-                continue
-            sc = (sc or "").strip()
-            mapped_sd = (mapped_sd or "").strip()
-            std_desc = (std_desc or "").strip()
-            subdef = (subdef or "").strip()
-            definition = (definition or "").strip()
-            mapping_selected = False
-            if mapped_sd:
-                mapping_selected = True
-            elif subdef:
-                mapping_selected = True
-            elif not (has_mapped_col or has_subdef_col):
-                mapping_selected = bool(definition)
-            sd = ""
-            final_sc = ""
-            mapped_code = ""
-            def_code = ""
-            def_desc = ""
-            if mapping_selected:
-                if mapped_sd:
-                    mapped_code, sd = _split_code_display(mapped_sd)
-                if not sd and std_desc:
-                    sd = std_desc
-                if definition:
-                    def_code, def_desc = _split_code_display(definition)
-                    if not sd:
-                        sd = def_desc
-                if sd and std_desc == sd and sc:
-                    final_sc = sc
-                elif sd and def_desc == sd and def_code:
-                    final_sc = def_code
-                elif mapped_code:
-                    final_sc = mapped_code
-                elif def_code:
-                    final_sc = def_code
-                elif sc and not std_desc:
-                    final_sc = sc
-                if (not final_sc or not sd) and subdef:
-                    sc2, sd2 = _split_code_display(subdef)
-                    if sd2 and not sd:
-                        sd = sd2
-                    if sd2 == sd and sc2:
-                        final_sc = sc2
-                    elif not final_sc and sc2:
-                        final_sc = sc2
-                if sd and not final_sc:
-                    matches = std_desc_series[std_desc_series == sd]
-                    if not matches.empty:
-                        idx = matches.index[0]
-                        sc_lookup = std_code_series.iloc[idx].strip()
-                        if sc_lookup:
-                            final_sc = sc_lookup
-            key = (lc, ld)
-            if key in code_map:
-                existing = code_map[key]
-                if final_sc and not existing.get("StandardCode"):
-                    existing["StandardCode"] = final_sc
-                if sd and not existing.get("StandardDisplay"):
-                    existing["StandardDisplay"] = sd
-            else:
-                code_map[key] = {
-                    "LocalCode": lc,
-                    "LocalDisplay": ld,
-                    "StandardCode": final_sc,
-                    "StandardDisplay": sd,
-                }
-                code_order_keys.append(key)
-        codeset_info["Codes"].extend(code_map[k] for k in code_order_keys)
-        codesets.append(codeset_info)
+        if fingerprints is None or cache is None or sheet not in fingerprints:
+            codeset_info = _codeset_info(sheet, df)
+        else:
+            cached = cache.get(sheet)
+            if cached is None or cached[0] != fingerprints[sheet]:
+                cached = cache[sheet] = (fingerprints[sheet], _codeset_info(sheet, df))
+            codeset_info = cached[1]
+        if codeset_info is not None:
+            codesets.append(codeset_info)
 
     # Build codeset XML lines with column widths calculated per codeset to
     # avoid excessive gaps between attributes when one codeset contains very
@@ -0,0 +1,182 @@
+"""Content-addressed on-disk cache of parsed workbooks.
+
+Parsing a codeset workbook with :mod:`openpyxl` and deriving its dropdowns,
+lookup maps and mapping metadata dominates the time it takes to open a
+workbook from the repository picker. Entries in this cache are keyed by the
+SHA-256 of the workbook bytes plus :data:`CACHE_VERSION`, so an unchanged file
+is restored without touching :mod:`openpyxl` while any edit to the file (or a
+change to the parsing logic) produces a new key.
+
+Entries are stored as pickles, which keep :class:`pandas.DataFrame` column
+blocks in binary form and load far faster than re-reading the XML. The cache
+directory is capped at :data:`MAX_CACHE_BYTES`; the least recently used
+entries are evicted first.
+
+Because loading a pickle can run arbitrary code, the cache lives in a
+per-user directory created with mode ``0700``. Entries are only read or
+written while that directory is owned by the current user and closed to
+everyone else.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import stat
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+# Bump whenever parsing or derived metadata changes shape so stale entries
+# written by an older version of the application are never reused.
+CACHE_VERSION = 3
+
+
+def user_cache_dir() -> Path:
+    """Return the application's per-user cache directory on this platform."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "codeset_ui"
+
+
+CACHE_DIR = Path(os.environ.get("CODESET_CACHE_DIR") or user_cache_dir() / "workbooks")
+MAX_CACHE_BYTES = int(os.environ.get("CODESET_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_SUFFIX = ".pkl"
+
+
+def workbook_key(file_bytes: bytes) -> str:
+    """Return the cache key for a workbook's raw bytes."""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return f"{digest}-v{CACHE_VERSION}"
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / f"{key}{_SUFFIX}"
+
+
+def private_dir(directory: Path, create: bool = False) -> bool:
+    """Return whether ``directory`` is safe to read and write cache files in.
+
+    With ``create`` the directory is made with mode ``0700`` when missing.
+    On POSIX it must be a real directory owned by the current user; group
+    and other permissions are removed when present.
+    """
+    try:
+        if create:
+            directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    if os.name != "posix":
+        return True
+    if info.st_uid != os.getuid():
+        return False
+    if info.st_mode & 0o077:
+        try:
+            os.chmod(directory, 0o700)
+        except OSError:
+            return False
+    return True
+
+
+def load_cached(key: str) -> Dict[str, Any] | None:
+    """Return the cached payload for ``key`` or ``None`` on a miss.
+
+    A hit refreshes the entry's modification time so eviction treats it as
+    recently used. Unreadable entries are discarded.
+    """
+    if not private_dir(CACHE_DIR):
+        return None
+    path = _entry_path(key)
+    try:
+        with path.open("rb") as fh:
+            payload = pickle.load(fh)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return payload
+
+
+def store_cached(key: str, payload: Dict[str, Any]) -> None:
+    """Persist ``payload`` under ``key`` and evict old entries over the cap.
+
+    Failures are ignored; the cache only ever speeds up loading.
+    """
+    if not private_dir(CACHE_DIR, create=True):
+        return
+    tmp_name = None
+    try:
+        # A unique temporary file keeps concurrent writers of one key apart.
+        fd, tmp_name = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=CACHE_DIR)
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, _entry_path(key))
+    except Exception:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+        return
+    _evict(MAX_CACHE_BYTES)
+
+
+def invalidate(key: str | None = None) -> int:
+    """Remove the entry for ``key``, or every entry when ``key`` is ``None``.
+
+    Returns the number of entries removed.
+    """
+    if key is not None:
+        paths = [_entry_path(key)]
+    elif CACHE_DIR.is_dir():
+        paths = list(CACHE_DIR.glob(f"*{_SUFFIX}"))
+    else:
+        paths = []
+    removed = 0
+    for path in paths:
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _evict(limit: int) -> None:
+    """Delete least recently used entries until the cache fits in ``limit`` bytes."""
+    if not CACHE_DIR.is_dir():
+        return
+    entries = []
+    for path in CACHE_DIR.glob(f"*{_SUFFIX}"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
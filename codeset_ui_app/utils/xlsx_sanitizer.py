@@ -1,24 +1,142 @@
+"""Detect and repair malformed parts of ``.xlsx`` packages.
+
+Each :class:`Repair` names the archive members it applies to, a cheap
+``detect`` check on a member's XML and the ``fix`` that rewrites it.
+:func:`scan_workbook` runs every registered check without parsing the
+workbook, and :func:`repair_workbook` fixes only the members that need it and
+copies the others into the new archive unchanged. Additional fixes are added
+with :func:`register_repair`.
+"""
+
 from __future__ import annotations
 
 import re
+from fnmatch import fnmatch
 from io import BytesIO
+from typing import Callable, Dict, Iterable, List, NamedTuple
 from zipfile import ZipFile
 
 
+class Repair(NamedTuple):
+    """A fix for one kind of malformed workbook XML."""
+
+    name: str
+    members: tuple[str, ...]
+    detect: Callable[[bytes], bool]
+    fix: Callable[[bytes], bytes]
+
+
+# Excel only defines font families 0-14; ``openpyxl`` raises ``ValueError``
+# for anything else, including non-numeric values.
+_FAMILY_RE = re.compile(rb'<(?:\w+:)?family\b[^>]*?\bval="([^"]*)"[^>]*/>')
+
+
+def _invalid_family(match: re.Match) -> bool:
+    value = match.group(1)
+    return not value.isdigit() or int(value) > 14
+
+
+def _has_invalid_family(data: bytes) -> bool:
+    return any(_invalid_family(m) for m in _FAMILY_RE.finditer(data))
+
+
+def _strip_invalid_family(data: bytes) -> bytes:
+    return _FAMILY_RE.sub(lambda m: b"" if _invalid_family(m) else m.group(0), data)
+
+
+FONT_FAMILY_REPAIR = Repair(
+    "font-family",
+    ("xl/sharedStrings.xml", "xl/styles.xml"),
+    _has_invalid_family,
+    _strip_invalid_family,
+)
+
+REPAIRS: List[Repair] = [FONT_FAMILY_REPAIR]
+
+# Any font family tag at all, whatever its value.
+_ANY_FAMILY_RE = re.compile(rb"<[^>]*family[^>]*/>")
+
+# Drops every font family tag. Too broad to run by default, it is the last
+# resort for workbooks ``openpyxl`` still rejects after :data:`REPAIRS`.
+ALL_FONT_FAMILIES_REPAIR = Repair(
+    "all-font-families",
+    ("xl/sharedStrings.xml", "xl/styles.xml"),
+    lambda data: _ANY_FAMILY_RE.search(data) is not None,
+    lambda data: _ANY_FAMILY_RE.sub(b"", data),
+)
+
+FALLBACK_REPAIRS: List[Repair] = [ALL_FONT_FAMILIES_REPAIR]
+
+
+def register_repair(repair: Repair) -> None:
+    """Add ``repair`` to the fixes applied by default."""
+    if repair not in REPAIRS:
+        REPAIRS.append(repair)
+
+
+def scan_workbook(
+    xlsx_bytes: bytes, repairs: Iterable[Repair] | None = None
+) -> Dict[str, List[Repair]]:
+    """Return the members of ``xlsx_bytes`` that need fixing and their repairs.
+
+    Only members named by a repair are decompressed. Returns an empty mapping
+    for healthy workbooks and for data that is not a zip archive at all.
+    """
+    repairs = list(REPAIRS if repairs is None else repairs)
+    found: Dict[str, List[Repair]] = {}
+    try:
+        archive = ZipFile(BytesIO(xlsx_bytes))
+    except Exception:
+        return found
+    with archive:
+        for name in archive.namelist():
+            wanted = [r for r in repairs if any(fnmatch(name, p) for p in r.members)]
+            if not wanted:
+                continue
+            data = archive.read(name)
+            hits = [r for r in wanted if r.detect(data)]
+            if hits:
+                found[name] = hits
+    return found
+
+
+def _rebuild(src: bytes, fixed: Dict[str, bytes]) -> bytes:
+    """Return archive ``src`` with the members in ``fixed`` replaced."""
+    out = BytesIO()
+    with ZipFile(BytesIO(src)) as zin, ZipFile(out, "w") as zout:
+        for info in zin.infolist():
+            data = fixed.get(info.filename)
+            zout.writestr(info, zin.read(info.filename) if data is None else data)
+    return out.getvalue()
+
+
+def repair_workbook(xlsx_bytes: bytes, repairs: Iterable[Repair] | None = None) -> bytes:
+    """Return ``xlsx_bytes`` with every detected problem fixed.
+
+    Healthy workbooks are returned as is. Otherwise the archive is rewritten
+    with the affected members fixed; every other member keeps its content,
+    compression method and metadata.
+    """
+    found = scan_workbook(xlsx_bytes, repairs)
+    if not found:
+        return xlsx_bytes
+    fixed: Dict[str, bytes] = {}
+    with ZipFile(BytesIO(xlsx_bytes)) as archive:
+        for name, hits in found.items():
+            data = archive.read(name)
+            for repair in hits:
+                data = repair.fix(data)
+            fixed[name] = data
+    return _rebuild(xlsx_bytes, fixed)
+
+
 def strip_invalid_font_families(xlsx_bytes: bytes) -> bytes:
     """Remove font family tags that exceed OpenXML limits.
 
     Older workbooks sometimes contain ``<family>`` elements with ``val``
     attributes greater than Excel's permitted range (0-14). ``openpyxl``
     raises ``ValueError`` when encountering these values. This helper strips
-    any ``family`` elements from ``xl/sharedStrings.xml`` and ``xl/styles.xml``
-    so the workbook can be parsed.
+    those ``family`` elements from ``xl/sharedStrings.xml`` and
+    ``xl/styles.xml`` so the workbook can be parsed.
     """
-    out = BytesIO()
-    with ZipFile(BytesIO(xlsx_bytes)) as zin, ZipFile(out, "w") as zout:
-        for info in zin.infolist():
-            data = zin.read(info.filename)
-            if info.filename in ("xl/sharedStrings.xml", "xl/styles.xml"):
-                data = re.sub(rb"<[^>]*family[^>]*/>", b"", data)
-            zout.writestr(info, data)
-    return out.getvalue()
+    return repair_workbook(xlsx_bytes, [FONT_FAMILY_REPAIR])
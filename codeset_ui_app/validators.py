@@ -1,7 +1,14 @@
 from __future__ import annotations
+from importlib import import_module
 from typing import Dict, List, Any, Iterable
+import numpy as np
 import pandas as pd
 
+try:  # pragma: no cover - import resolution path tested indirectly
+    column_plan = import_module("codeset_ui_app.components.column_plan").column_plan
+except ModuleNotFoundError:  # running as a script from the ``codeset_ui_app`` directory
+    column_plan = import_module("components.column_plan").column_plan
+
 
 _PLACEHOLDER_VALUES = {"NA", "N/A"}
 
@@ -24,109 +31,128 @@ def _label(name: str | None, fallback: str) -> str:
     return str(name).strip()
 
 
-def _norm(val: Any) -> str:
-    if val is None:
-        return ""
-    return str(val).strip()
-
-
-def _empty_if_placeholder(val: str) -> str:
-    if val and val.upper() in _PLACEHOLDER_VALUES:
-        return ""
-    return val
-
-
 def validate_workbook(
     sheets: Dict[str, pd.DataFrame],
     mapping: Dict[str, Dict[str, Any]],
     skip_mapped_requirement_sheets: Iterable[str] | None = None,
+    fingerprints: Dict[str, str] | None = None,
+    cache: Dict[str, tuple] | None = None,
 ) -> List[str]:
-    """Return a list of validation error messages for the workbook."""
+    """Return a list of validation error messages for the workbook.
+
+    When ``fingerprints`` and a ``cache`` dict are given, the errors of each
+    sheet are stored in ``cache`` and reused while the sheet's fingerprint and
+    key columns are unchanged.
+    """
     errors: List[str] = []
     skip_mapped_requirement = set(skip_mapped_requirement_sheets or [])
     for sheet, df in sheets.items():
         info = mapping.get(sheet, {})
-        code_col = info.get("code_col")
-        display_col = info.get("display_col")
-        mapped_col = info.get("mapped_col")
-        std_col = info.get("std_col")
-        std_code_col = info.get("std_code_col")
-        # Skip if no dataframe
-        if df is None or df.empty:
+        skip_mapped = sheet in skip_mapped_requirement
+        if fingerprints is None or cache is None or sheet not in fingerprints:
+            errors.extend(_validate_sheet(sheet, df, info, skip_mapped))
             continue
-        # Duplicate codes
-        code_label = _label(code_col, "CODE")
-        display_label = _label(display_col, "DISPLAY VALUE")
-        mapped_label = _label(mapped_col, "MAPPED_STD_DESCRIPTION")
-
-        if code_col and code_col in df.columns:
-            codes = df[code_col].astype(str).str.strip()
-            dup_vals = codes[codes != ""].value_counts()
-            dup_vals = dup_vals[dup_vals > 1]
+        key = (
+            fingerprints[sheet],
+            skip_mapped,
+            tuple(info.get(k) for k in ("code_col", "display_col", "mapped_col", "std_col", "std_code_col")),
+        )
+        cached = cache.get(sheet)
+        if cached is None or cached[0] != key:
+            cached = cache[sheet] = (key, _validate_sheet(sheet, df, info, skip_mapped))
+        errors.extend(cached[1])
+    return errors
+
+
+def _column(df: pd.DataFrame, col: str) -> pd.Series:
+    """Return column ``col``, picking the least empty one among duplicates."""
+    series = df[col]
+    if isinstance(series, pd.DataFrame):
+        series = column_plan(df).column(df, col)
+    return series
+
+
+def _cell_text(df: pd.DataFrame, col: str | None) -> pd.Series:
+    """Return ``col`` as stripped strings, all ``""`` when absent.
+
+    ``None`` becomes ``""``; other values go through ``str``.
+    """
+    if not col or col not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    values = _column(df, col)
+    text = values.astype(str).str.strip()
+    return text.mask(np.equal(values.to_numpy(dtype=object), None), "")
+
+
+def _without_placeholders(text: pd.Series) -> pd.Series:
+    """Blank out ``NA``/``N/A`` placeholder values, in any case."""
+    return text.mask(text.str.upper().isin(_PLACEHOLDER_VALUES), "")
+
+
+def _validate_sheet(
+    sheet: str,
+    df: pd.DataFrame | None,
+    info: Dict[str, Any],
+    skip_mapped: bool,
+) -> List[str]:
+    """Return the validation errors of a single sheet.
+
+    Duplicate codes are reported first, then the row rules in row order.
+    Each rule is evaluated as a mask over whole columns.
+    """
+    errors: List[str] = []
+    code_col = info.get("code_col")
+    display_col = info.get("display_col")
+    mapped_col = info.get("mapped_col")
+    std_col = info.get("std_col")
+    std_code_col = info.get("std_code_col")
+    # Skip if no dataframe
+    if df is None or df.empty:
+        return errors
+    # Duplicate codes
+    code_label = _label(code_col, "CODE")
+    display_label = _label(display_col, "DISPLAY VALUE")
+    mapped_label = _label(mapped_col, "MAPPED_STD_DESCRIPTION")
+    row_nums = [i + 2 for i in df.index.tolist()]  # account for header row
+
+    if code_col and code_col in df.columns:
+        codes = _column(df, code_col).astype(str).str.strip()
+        dup_vals = codes[codes != ""].value_counts()
+        dup_vals = dup_vals[dup_vals > 1]
+        if len(dup_vals):
+            # Row positions of every code value, found in one pass.
+            groups = codes.groupby(codes, sort=False).indices
             for code_val in dup_vals.index:
-                dup_rows = [i + 2 for i, v in codes.items() if v == code_val]
+                dup_rows = [row_nums[p] for p in groups[code_val]]
                 for row_num in dup_rows:
                     others = [str(r) for r in dup_rows if r != row_num]
                     if not others:
                         continue
                     others_list = ", ".join(others)
-                    if len(others) == 1:
-                        detail = (
-                            f"duplicate {code_label} '{code_val}' duplicates row {others_list}"
-                        )
-                    else:
-                        detail = (
-                            f"duplicate {code_label} '{code_val}' duplicates rows {others_list}"
-                        )
+                    plural = "row" if len(others) == 1 else "rows"
+                    detail = f"duplicate {code_label} '{code_val}' duplicates {plural} {others_list}"
                     errors.append(_format_error(sheet, row_num, detail))
-        # Row-wise validations
-        for idx, row in df.iterrows():
-            row_num = idx + 2  # account for header row
-            code = _norm(row.get(code_col)) if code_col else ""
-            display = _norm(row.get(display_col)) if display_col else ""
-            mapped = _norm(row.get(mapped_col)) if mapped_col else ""
-            std_code = _empty_if_placeholder(_norm(row.get(std_code_col))) if std_code_col else ""
-            std_desc = _empty_if_placeholder(_norm(row.get(std_col))) if std_col else ""
-            if code and not display:
-                errors.append(
-                    _format_error(
-                        sheet,
-                        row_num,
-                        f"{display_label} required when {code_label} is provided",
-                    )
-                )
-            if display and not code:
-                errors.append(
-                    _format_error(
-                        sheet,
-                        row_num,
-                        f"{code_label} required when {display_label} is provided",
-                    )
-                )
-            if (
-                sheet not in skip_mapped_requirement
-                and (code or display)
-                and (std_code or std_desc)
-                and not mapped
-            ):
-                detail = (
-                    f"{mapped_label} required when STANDARD_CODE/STANDARD_DESCRIPTION is provided"
-                )
-                errors.append(_format_error(sheet, row_num, detail))
-            if mapped and not code:
-                errors.append(
-                    _format_error(
-                        sheet,
-                        row_num,
-                        f"{code_label} required when {mapped_label} is provided",
-                    )
-                )
-            if mapped and not display:
-                errors.append(
-                    _format_error(
-                        sheet,
-                        row_num,
-                        f"{display_label} required when {mapped_label} is provided",
-                    )
-                )
+    # Row-wise validations
+    code = _cell_text(df, code_col).ne("").to_numpy()
+    display = _cell_text(df, display_col).ne("").to_numpy()
+    mapped = _cell_text(df, mapped_col).ne("").to_numpy()
+    std_code = _without_placeholders(_cell_text(df, std_code_col)).ne("").to_numpy()
+    std_desc = _without_placeholders(_cell_text(df, std_col)).ne("").to_numpy()
+    rules = [
+        (code & ~display, f"{display_label} required when {code_label} is provided"),
+        (display & ~code, f"{code_label} required when {display_label} is provided"),
+        (
+            (code | display) & (std_code | std_desc) & ~mapped & (not skip_mapped),
+            f"{mapped_label} required when STANDARD_CODE/STANDARD_DESCRIPTION is provided",
+        ),
+        (mapped & ~code, f"{code_label} required when {mapped_label} is provided"),
+        (mapped & ~display, f"{display_label} required when {mapped_label} is provided"),
+    ]
+    # ``nonzero`` walks the mask matrix row by row, keeping the per-row order
+    # of the rules.
+    rows, kinds = np.nonzero(np.column_stack([mask for mask, _ in rules]))
+    errors.extend(
+        _format_error(sheet, row_nums[row], rules[kind][1])
+        for row, kind in zip(rows.tolist(), kinds.tolist())
+    )
     return errors
@@ -6,7 +6,8 @@ from io import BytesIO
 
 import pandas as pd
 from openpyxl import load_workbook
-from codeset_ui_app.utils.xlsx_sanitizer import strip_invalid_font_families
+from codeset_ui_app.components.column_roles import resolve_columns
+from codeset_ui_app.utils.xlsx_sanitizer import repair_workbook
 
 DEFAULT_DEFINITION = Path(__file__).resolve().parents[1] / "spreadsheet_definitions" / "codex-spreadsheet-definition.md"
 
@@ -45,50 +46,22 @@ def validate_codeset_tab_logic(workbook_path: str | Path,
     definition_path = definition_path or DEFAULT_DEFINITION
     rules = _parse_definition_table(definition_path)
 
-    bytes_data = Path(workbook_path).read_bytes()
-    try:
-        xls = pd.ExcelFile(BytesIO(bytes_data), engine="openpyxl")
-        wb = load_workbook(BytesIO(bytes_data), data_only=False)
-    except ValueError:
-        bytes_data = strip_invalid_font_families(bytes_data)
-        xls = pd.ExcelFile(BytesIO(bytes_data), engine="openpyxl")
-        wb = load_workbook(BytesIO(bytes_data), data_only=False)
+    bytes_data = repair_workbook(Path(workbook_path).read_bytes())
+    xls = pd.ExcelFile(BytesIO(bytes_data), engine="openpyxl")
+    wb = load_workbook(BytesIO(bytes_data), data_only=False)
 
     results: List[Dict[str, Any]] = []
     for sheet in xls.sheet_names:
         df = pd.read_excel(xls, sheet_name=sheet, dtype=str).fillna("")
         ws = wb[sheet]
 
-        cols = [c.upper().replace(" ", "_") for c in df.columns]
-        std_code_col = None
-        std_desc_col = None
-        mapped_col = None
-        code_col = None
-        display_col = None
-        definition_col = None
-        for col, key in zip(df.columns, cols):
-            if key == "STANDARD_CODE":
-                std_code_col = col
-            if key in [
-                "STANDARD_DESCRIPTION",
-                "STADARD_DESCRIPTION",
-                "STANDARD_DESC",
-                "STADARD_DESC",
-            ]:
-                std_desc_col = col
-            if key in [
-                "MAPPED_STD_DESCRIPTION",
-                "MAPPED_STANDARD_DESCRIPTION",
-                "MAPPED_STD_CODE",
-                "MAPPED_STANDARD_CODE",
-            ]:
-                mapped_col = col
-            if key == "CODE":
-                code_col = col
-            if key in ["DISPLAY_VALUE", "DISPLAY"]:
-                display_col = col
-            if key == "DEFINITION":
-                definition_col = col
+        roles = resolve_columns(df.columns)
+        std_code_col = roles.std_code
+        std_desc_col = roles.std_description
+        mapped_col = roles.mapped
+        code_col = roles.code
+        display_col = roles.display
+        definition_col = roles.definition
 
         if mapped_col is None and std_code_col is None and std_desc_col is None and definition_col:
             mapped_col = definition_col
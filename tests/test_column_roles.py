@@ -0,0 +1,55 @@
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from codeset_ui_app.components import column_roles
+from codeset_ui_app.components.column_roles import ColumnRoles, resolve_columns
+
+
+def test_aliases_are_normalized():
+    roles = resolve_columns(
+        [" code", "Display Value", "Mapped Std Description", "STADARD_DESC", "std_code", None, 3]
+    )
+    assert roles.code == " code"
+    assert roles.display == "Display Value"
+    assert roles.mapped == "Mapped Std Description"
+    assert roles.mapped_type == "description"
+    assert roles.std_description == "STADARD_DESC"
+    assert roles.std_code == "std_code"
+    assert roles.positions == {
+        "code": 0,
+        "display": 1,
+        "mapped_description": 2,
+        "mapped": 2,
+        "std_description": 3,
+        "std_code": 4,
+    }
+
+
+def test_rightmost_match_wins():
+    roles = resolve_columns(["MAPPED_STD_DESCRIPTION", "CODE", "MAPPED_STD_CODE", "Code"])
+    assert roles.code == "Code"
+    assert roles.positions["code"] == 3
+    assert roles.mapped == "MAPPED_STD_CODE"
+    assert roles.mapped_type == "code"
+    assert roles.mapped_description == "MAPPED_STD_DESCRIPTION"
+
+
+def test_results_are_cached_per_header():
+    header = ["CODE", "DISPLAY", "DEFINITION", "cached-header-test"]
+    before = column_roles._resolve.cache_info().hits
+    first = resolve_columns(header)
+    second = resolve_columns(iter(header))
+    assert first is second
+    assert first.definition == "DEFINITION"
+    assert column_roles._resolve.cache_info().hits == before + 1
+
+
+def test_positions_are_read_only():
+    with pytest.raises(TypeError):
+        resolve_columns(["CODE"]).positions["code"] = 1
+    with pytest.raises(TypeError):
+        ColumnRoles().positions["code"] = 0
+    assert ColumnRoles().positions == {}
@@ -0,0 +1,124 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook
+
+
+def _save(path, rows):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE", "MAPPED_STD_DESCRIPTION"])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    _save(
+        repo / "Base.xlsx",
+        [
+            ["A", "Alpha", "Desc A"],
+            ["B", "Beta", "Desc B"],
+            [None, "Gamma", "Desc G"],
+            ["C", "Charlie", "Desc C"],
+        ],
+    )
+    _save(
+        repo / "Other.xlsx",
+        [
+            ["X", "Extra", "Desc X"],
+            ["A", "Alpha", "Other A"],
+            ["G", "Gamma", "Desc G"],
+            ["B", "Beta", "Desc B"],
+            ["Z", "Zulu", "Desc Z"],
+        ],
+    )
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo.name, "workbook_name": "Base.xlsx"})
+    client.post("/", data={"compare_repo": repo.name, "compare_workbook_name": "Other.xlsx"})
+    return client
+
+
+def test_rows_align_by_code_then_display(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    data = client.get("/sheet/Sheet1").get_json()
+    pairs = [(row["CODE"], row["CODE_COMPARE"]) for row in data]
+    # The inserted "X" row does not shift the matches; the code-less Gamma row
+    # falls back to its display value and unmatched rows come last.
+    assert pairs == [("A", "A"), ("B", "B"), ("", "G"), ("C", ""), ("", "X"), ("", "Z")]
+    assert data[0]["MAPPED_STD_DESCRIPTION_COMPARE"] == "Other A"
+    assert data[4]["DISPLAY VALUE"] == ""
+    assert data[4]["DISPLAY_VALUE_COMPARE"] == "Extra"
+    client.post("/", data={"end_compare": "1"})
+
+
+def test_meta_reports_unmatched_rows(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    meta = client.get("/sheet/Sheet1/meta").get_json()
+    assert meta["comparison"] == {
+        "key": "CODE",
+        "matched": 3,
+        "unmatched_base": 1,
+        "unmatched_compare": 2,
+    }
+    client.post("/", data={"end_compare": "1"})
+
+
+def test_combined_sheet_is_reused_until_invalidated(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    app_module = importlib.import_module("codeset_ui_app.app")
+    combined = app_module._combine_sheet("Sheet1")
+    assert app_module._combine_sheet("Sheet1") is combined
+    assert app_module._combined_columns("Sheet1") == combined.columns.tolist()
+
+    rows = app_module._records(app_module.workbook_data["Sheet1"])
+    rows[0]["DISPLAY VALUE"] = "Alpha 2"
+    client.post("/export", json={"Sheet1": rows})
+    data = client.get("/sheet/Sheet1").get_json()
+    assert data[0]["DISPLAY VALUE"] == "Alpha 2"
+    assert data[0]["CODE_COMPARE"] == "A"
+
+    client.post("/", data={"end_compare": "1"})
+    assert "CODE_COMPARE" not in client.get("/sheet/Sheet1").get_json()[0]
+
+
+def test_keyless_sheets_pair_rows_by_sheet_row(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    for name, rows in (
+        ("Base.xlsx", [["Desc 1", "n1"], ["Desc 2", "n2"], ["Desc 3", "n3"]]),
+        ("Other.xlsx", [["Other 1", "n1"], [None, "n2"], ["Other 3", "n3"]]),
+    ):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Sheet1"
+        ws.append(["MAPPED_STD_DESCRIPTION", "NOTES"])
+        for row in rows:
+            ws.append(row)
+        wb.save(repo / name)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo.name, "workbook_name": "Base.xlsx"})
+    client.post("/", data={"compare_repo": repo.name, "compare_workbook_name": "Other.xlsx"})
+
+    data = client.get("/sheet/Sheet1").get_json()
+    # The comparison row without a mapped value leaves a gap instead of
+    # pulling "Other 3" up next to "Desc 2".
+    assert [(row["MAPPED_STD_DESCRIPTION"], row["MAPPED_STD_DESCRIPTION_COMPARE"]) for row in data] == [
+        ("Desc 1", "Other 1"),
+        ("Desc 2", ""),
+        ("Desc 3", "Other 3"),
+    ]
+    client.post("/", data={"end_compare": "1"})
@@ -37,8 +37,12 @@ def test_comparison_columns(tmp_path, monkeypatch):
     assert resp.status_code == 200
     data = resp.get_json()
     assert "CODE_COMPARE" in data[0]
-    assert data[0]["CODE_COMPARE"] == "B"
-    assert data[0]["DISPLAY_VALUE_COMPARE"] == "Beta"
+    # Codes differ, so the comparison row is appended below the base row.
+    assert data[0]["CODE"] == "A"
+    assert data[0]["CODE_COMPARE"] == ""
+    assert data[1]["CODE"] == ""
+    assert data[1]["CODE_COMPARE"] == "B"
+    assert data[1]["DISPLAY_VALUE_COMPARE"] == "Beta"
     client.post("/", data={"end_compare": "1"})
     resp = client.get("/sheet/Sheet1")
     data = resp.get_json()
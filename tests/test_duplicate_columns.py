@@ -0,0 +1,82 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook, load_workbook
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from codeset_ui_app.components.column_plan import column_plan
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE", "NOTE", "NOTE"])
+    ws.append(["A", "Alpha", "old", "kept 1"])
+    ws.append(["B", "Beta", None, "kept 2"])
+    ws.append(["C", "Charlie", None, "kept 3"])
+    path = repo / "Codeset.xlsx"
+    wb.save(path)
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo.name, "workbook_name": "Codeset.xlsx"})
+    return client, path
+
+
+def test_plan_picks_densest_duplicate():
+    df = pd.DataFrame([["A", "", "x"], ["B", "y", "z"]], columns=["CODE", "NOTE", "NOTE"])
+    plan = column_plan(df)
+    assert plan.columns == ["CODE", "NOTE"]
+    assert plan.position("NOTE") == 2
+    assert plan.hidden == {"NOTE": [1]}
+    assert plan.unique(df)["NOTE"].tolist() == ["x", "z"]
+
+    expanded = plan.expand([{"CODE": "A", "NOTE": "new"}, {"CODE": "C"}], df)
+    assert expanded.columns.tolist() == ["CODE", "NOTE", "NOTE"]
+    assert expanded.values.tolist() == [["A", "", "new"], ["C", "y", ""]]
+
+
+def test_export_round_trips_hidden_duplicates(tmp_path, monkeypatch):
+    client, path = setup_app(tmp_path, monkeypatch)
+    rows = client.get("/sheet/Sheet1").get_json()
+    assert [row["NOTE"] for row in rows] == ["kept 1", "kept 2", "kept 3"]
+
+    rows[1]["NOTE"] = "edited"
+    assert client.post("/export", json={"Sheet1": rows}).status_code == 200
+    ws = load_workbook(path)["Sheet1"]
+    values = [[cell.value or "" for cell in row] for row in ws.iter_rows(min_row=2)]
+    assert values == [
+        ["A", "Alpha", "old", "kept 1"],
+        ["B", "Beta", "", "edited"],
+        ["C", "Charlie", "", "kept 3"],
+    ]
+    assert [row["NOTE"] for row in client.get("/sheet/Sheet1").get_json()] == [
+        "kept 1",
+        "edited",
+        "kept 3",
+    ]
+
+
+def test_chr_sample_with_duplicated_headers_exports(tmp_path, monkeypatch):
+    import shutil
+
+    samples = tmp_path / "Samples"
+    repo = samples / "chrRepository"
+    repo.mkdir(parents=True)
+    source = Path(__file__).resolve().parents[1] / "Samples" / "Generic Codeset V3" / "(Repository) CHR Codeset.xlsx"
+    shutil.copy(source, repo / source.name)
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo.name, "workbook_name": source.name})
+    rows = client.get("/sheet/CS_GENDER").get_json()
+    assert client.get("/transformer").status_code == 200
+    assert client.post("/export_errors", json={"CS_GENDER": rows}).status_code == 200
+    assert client.post("/export", json={"CS_GENDER": rows}).status_code == 200
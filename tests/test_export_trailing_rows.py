@@ -0,0 +1,22 @@
+"""Tests for rows dropped from a sheet before export."""
+
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from codeset_ui_app.utils.export_excel import export_workbook
+
+
+def test_export_workbook_clears_rows_past_the_data(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE"])
+    for code in ("A", "B", "C"):
+        ws.append([code, f"Display {code}"])
+
+    out = tmp_path / "out.xlsx"
+    export_workbook(wb, {"Sheet1": pd.DataFrame([{"CODE": "A", "DISPLAY VALUE": "Display A"}])}, out)
+
+    rows = list(load_workbook(out)["Sheet1"].iter_rows(min_row=2, values_only=True))
+    assert rows[0] == ("A", "Display A")
+    assert all(value is None for row in rows[1:] for value in row)
@@ -0,0 +1,56 @@
+import io
+import zipfile
+
+from openpyxl import Workbook
+
+from codeset_ui_app.components import file_parser
+
+
+def _workbook_with_cached_formula() -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE", "COUNT"])
+    ws.append(["a", "=UPPER(A2)", "=LEN(A2)"])
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    # openpyxl never writes formula results, so inject the values Excel would
+    # have cached when the workbook was last saved.
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zin, zipfile.ZipFile(out, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info.filename)
+            if info.filename == "xl/worksheets/sheet1.xml":
+                data = data.replace(
+                    b'<c r="B2"><f>UPPER(A2)</f><v /></c>',
+                    b'<c r="B2" t="str"><f>UPPER(A2)</f><v>A</v></c>',
+                )
+                data = data.replace(
+                    b'<c r="C2"><f>LEN(A2)</f><v /></c>',
+                    b'<c r="C2"><f>LEN(A2)</f><v>1</v></c>',
+                )
+            zout.writestr(info, data)
+    return out.getvalue()
+
+
+def test_load_workbook_reads_cached_formula_values():
+    data, wb = file_parser.load_workbook(io.BytesIO(_workbook_with_cached_formula()))
+    row = data["Sheet1"].iloc[0]
+    assert row["DISPLAY VALUE"] == "A"
+    assert row["COUNT"] == "1"
+    # the returned workbook keeps the formulas for export and lookup parsing
+    assert wb["Sheet1"]["B2"].value == "=UPPER(A2)"
+
+
+def test_load_workbook_parses_workbook_once(monkeypatch):
+    calls = []
+    original = file_parser._load_workbook
+
+    def _counting_load(*args, **kwargs):
+        calls.append(kwargs.get("data_only"))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(file_parser, "_load_workbook", _counting_load)
+    file_parser.load_workbook(io.BytesIO(_workbook_with_cached_formula()))
+    assert calls == [False]
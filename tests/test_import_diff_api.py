@@ -0,0 +1,325 @@
+from pathlib import Path
+import sys
+import importlib
+import io
+from openpyxl import Workbook
+
+
+def _workbook_bytes(rows, extra_sheets=()) -> io.BytesIO:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    for title in ("Sheet1", *extra_sheets):
+        ws = wb[title] if title == "Sheet1" else wb.create_sheet(title)
+        ws.append(["CODE", "DISPLAY VALUE"])
+        for row in rows:
+            ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb_path = repo / "CodesetSample.xlsx"
+    wb_path.write_bytes(_workbook_bytes([[f"C{i}", f"Code {i}"] for i in range(10)]).getvalue())
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    monkeypatch.setattr(app_module.workbook_cache, "CACHE_DIR", tmp_path / "cache")
+    app_module.refresh_repository_cache()
+    return app_module, repo.name, wb_path.name
+
+
+def test_staged_diff_is_paged(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    assert client.get("/import/diff").status_code == 404
+
+    rows = [[f"C{i}", f"Code {i}" if i % 2 else f"Renamed {i}"] for i in range(2, 10)]
+    rows += [[f"N{i}", f"New {i}"] for i in range(5)]
+    resp = client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows), fname)},
+        content_type="multipart/form-data",
+    )
+    staged = resp.get_json()
+    assert staged["status"] == "pending_changes"
+    assert staged["diff"]["summary"] == {"total_sheets": 1, "added": 5, "removed": 2, "changed": 4}
+    assert staged["diff"]["sheets"]["Sheet1"]["changed_count"] == 4
+    assert "changed" not in staged["diff"]["sheets"]["Sheet1"]
+    assert client.get("/import/diff").get_json() == staged["diff"]
+
+    page = client.get("/import/diff/Sheet1/added?offset=3&limit=10").get_json()
+    assert page["total"] == 5
+    assert [row["key"] for row in page["rows"]] == ["N3", "N4"]
+
+    page = client.get("/import/diff/Sheet1/changed?limit=1").get_json()
+    assert page["rows"] == [
+        {
+            "id": 2,
+            "key": "C2",
+            "before": {"CODE": "C2", "DISPLAY VALUE": "Code 2"},
+            "after": {"CODE": "C2", "DISPLAY VALUE": "Renamed 2"},
+            "base_row": 4,
+            "incoming_row": 2,
+            "changed_columns": ["DISPLAY VALUE"],
+        }
+    ]
+    removed = client.get("/import/diff/Sheet1/removed").get_json()["rows"]
+    assert [row["row"] for row in removed] == [2, 3]
+
+    assert client.get("/import/diff/Sheet1/bogus").status_code == 400
+    assert client.get("/import/diff/Missing/added").status_code == 404
+    assert b'id="import-diff-viewer"' in client.get("/").data
+
+
+def test_staging_parses_the_upload_once(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    calls = []
+    read_workbook = app_module.read_workbook
+
+    def _counting(*args, **kwargs):
+        calls.append(args)
+        return read_workbook(*args, **kwargs)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("staged workbook should not be parsed again")
+
+    monkeypatch.setattr(app_module, "read_workbook", _counting)
+    monkeypatch.setattr(app_module, "read_columns", _fail)
+    resp = client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes([["C0", "Zero"]]), fname)},
+        content_type="multipart/form-data",
+    )
+    assert resp.get_json()["status"] == "pending_changes"
+    assert len(calls) == 1
+    assert app_module.comparison_data["Sheet1"]["DISPLAY_VALUE_COMPARE"].tolist() == ["Zero"]
+    client.post("/import/confirm", json={"action": "cancel"})
+
+
+def test_confirm_promotes_staged_parse(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    wb = Workbook()
+    first = wb.active
+    first.title = "Sheet1"
+    first.append(["CODE", "DISPLAY VALUE"])
+    first.append(["C0", "Zero"])
+    second = wb.create_sheet("Sheet2")
+    second.append(["CODE", "DISPLAY VALUE"])
+    second.append(["S0", "Same"])
+    wb_path = tmp_path / "Samples" / repo / fname
+    wb.save(wb_path)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+    kept = app_module.workbook_data["Sheet2"]
+
+    first["B2"] = "Changed"
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (buf, fname)},
+        content_type="multipart/form-data",
+    )
+
+    prepared = []
+    prepare_sheet = app_module._prepare_sheet
+
+    def _counting(sheet, *args, **kwargs):
+        prepared.append(sheet)
+        return prepare_sheet(sheet, *args, **kwargs)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("confirmed import should not be parsed again")
+
+    monkeypatch.setattr(app_module, "_prepare_sheet", _counting)
+    monkeypatch.setattr(app_module, "read_workbook", _fail)
+    resp = client.post("/import/confirm", json={"action": "apply_all"})
+    assert resp.get_json() == {"status": "applied"}
+    assert prepared == ["Sheet1"]
+    assert app_module.workbook_data["Sheet1"]["DISPLAY VALUE"].tolist() == ["Changed"]
+    assert app_module.workbook_data["Sheet2"] is kept
+    assert app_module.mapping_data["Sheet1"]["code_col"] == "CODE"
+    assert not app_module.pending_import_active
+    assert client.get("/sheet/Sheet1").get_json()[0]["DISPLAY VALUE"] == "Changed"
+
+    # The promoted state is cached under the new file contents.
+    monkeypatch.setattr(app_module, "_prepare_sheet", _fail)
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+    assert app_module.workbook_data["Sheet1"]["DISPLAY VALUE"].tolist() == ["Changed"]
+
+
+def _row_ids(client, kind, keys):
+    rows = client.get(f"/import/diff/Sheet1/{kind}").get_json()["rows"]
+    return [row["id"] for row in rows if row["key"] in keys]
+
+
+def test_apply_selected_rows(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    rows = [[f"C{i}", f"Code {i}" if i % 2 else f"Renamed {i}"] for i in range(2, 10)]
+    rows += [["N0", "New 0"], ["N1", "New 1"]]
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows), fname)},
+        content_type="multipart/form-data",
+    )
+    resp = client.post(
+        "/import/confirm",
+        json={
+            "action": "apply_selected",
+            "selection": {
+                "Sheet1": {
+                    "added": _row_ids(client, "added", ["N1"]),
+                    "removed": True,
+                    "changed": _row_ids(client, "changed", ["C4"]),
+                }
+            },
+        },
+    )
+    result = resp.get_json()
+    assert result["status"] == "applied_selected"
+    assert result["applied"] == {"added": 1, "removed": 2, "changed": 1}
+    assert result["diff"]["summary"] == {"total_sheets": 1, "added": 1, "removed": 0, "changed": 3}
+    assert app_module.pending_import_active
+
+    from openpyxl import load_workbook as xl_load
+
+    saved = [
+        [cell.value for cell in row]
+        for row in xl_load(tmp_path / "Samples" / repo / fname)["Sheet1"].iter_rows(min_row=2)
+    ]
+    expected = [[f"C{i}", "Renamed 4" if i == 4 else f"Code {i}"] for i in range(2, 10)]
+    assert saved == expected + [["N1", "New 1"]]
+    sheet_rows = client.get("/sheet/Sheet1").get_json()
+    assert {"CODE": "N1", "CODE_COMPARE": "N1"}.items() <= sheet_rows[8].items()
+
+    bad = client.post(
+        "/import/confirm",
+        json={"action": "apply_selected", "selection": {"Missing": {"added": True}}},
+    )
+    assert bad.status_code == 400
+    client.post("/import/confirm", json={"action": "cancel"})
+
+
+def test_apply_selected_after_editing_the_sheet(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    rows = [[f"C{i}", "Renamed 4" if i == 4 else f"Code {i}"] for i in range(10)]
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows), fname)},
+        content_type="multipart/form-data",
+    )
+    # Dropping the first rows after staging shifts every base row position.
+    edited = [{"CODE": f"C{i}", "DISPLAY VALUE": f"Code {i}"} for i in range(2, 10)]
+    assert client.post("/export", json={"Sheet1": edited}).status_code == 200
+    assert client.get("/import/diff").get_json()["summary"]["added"] == 2
+
+    resp = client.post(
+        "/import/confirm",
+        json={
+            "action": "apply_selected",
+            "selection": {"Sheet1": {"changed": _row_ids(client, "changed", ["C4"])}},
+        },
+    )
+    assert resp.get_json()["applied"]["changed"] == 1
+    values = [row["DISPLAY VALUE"] for row in app_module._records(app_module.workbook_data["Sheet1"])]
+    assert values == ["Renamed 4" if i == 4 else f"Code {i}" for i in range(2, 10)]
+    client.post("/import/confirm", json={"action": "cancel"})
+
+
+def test_apply_one_of_several_rows_with_the_same_code(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    rows = [[f"C{i}", f"Code {i}"] for i in range(10)] + [["D", "First"], ["D", "Second"]]
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows), fname)},
+        content_type="multipart/form-data",
+    )
+    added = client.get("/import/diff/Sheet1/added").get_json()["rows"]
+    assert [(row["key"], row["id"]) for row in added] == [("D", 12), ("D", 13)]
+
+    resp = client.post(
+        "/import/confirm",
+        json={"action": "apply_selected", "selection": {"Sheet1": {"added": [13]}}},
+    )
+    assert resp.get_json()["applied"]["added"] == 1
+    assert app_module.workbook_data["Sheet1"]["DISPLAY VALUE"].tolist()[-1] == "Second"
+    assert len(app_module.workbook_data["Sheet1"]) == 11
+    bad = client.post(
+        "/import/confirm",
+        json={"action": "apply_selected", "selection": {"Sheet1": {"added": ["D"]}}},
+    )
+    assert bad.status_code == 400
+    client.post("/import/confirm", json={"action": "cancel"})
+
+
+def test_sheets_new_in_the_import_cannot_be_applied_by_row(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+
+    rows = [[f"C{i}", f"Code {i}"] for i in range(10)]
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows, ["Extra"]), fname)},
+        content_type="multipart/form-data",
+    )
+    assert "Extra" in client.get("/import/diff").get_json()["sheets"]
+    resp = client.post(
+        "/import/confirm",
+        json={"action": "apply_selected", "selection": {"Extra": {"added": True}}},
+    )
+    assert resp.status_code == 400
+    assert "Extra" not in app_module.workbook_data
+    assert app_module.pending_import_active
+    client.post("/import/confirm", json={"action": "cancel"})
+
+
+def test_failed_write_leaves_the_active_sheet_unchanged(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+    wb_path = tmp_path / "Samples" / repo / fname
+    original = wb_path.read_bytes()
+
+    rows = [[f"C{i}", f"Code {i}"] for i in range(10)] + [["N0", "New 0"]]
+    client.post(
+        "/import",
+        data={"stage_only": "1", "workbook": (_workbook_bytes(rows), fname)},
+        content_type="multipart/form-data",
+    )
+
+    def _fail(wb, data, stream, protected=False):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(app_module, "export_workbook", _fail)
+    resp = client.post(
+        "/import/confirm",
+        json={"action": "apply_selected", "selection": {"Sheet1": {"added": True}}},
+    )
+    assert resp.status_code == 500
+    assert len(app_module.workbook_data["Sheet1"]) == 10
+    assert client.get("/import/diff").get_json()["summary"]["added"] == 1
+    assert wb_path.read_bytes() == original
+    assert not wb_path.with_name(fname + ".tmp").exists()
+    client.post("/import/confirm", json={"action": "cancel"})
@@ -0,0 +1,77 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook, load_workbook
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb_path = repo / "CodesetSample.xlsx"
+    wb = Workbook()
+    for idx, title in enumerate(["Sheet1", "Sheet2", "Sheet3"]):
+        ws = wb.active if idx == 0 else wb.create_sheet()
+        ws.title = title
+        ws.append(["CODE", "DISPLAY VALUE", "STANDARD_CODE", "STANDARD_DESCRIPTION", "MAPPED_STD_DESCRIPTION"])
+        ws.append([f"C{idx}", f"Display {idx}", f"S{idx}", f"Standard {idx}", f"Standard {idx}"])
+    wb.save(wb_path)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    monkeypatch.setattr(app_module.workbook_cache, "CACHE_DIR", tmp_path / "cache")
+    app_module.refresh_repository_cache()
+    return app_module, repo.name, wb_path.name
+
+
+def test_index_materializes_only_initial_sheet(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    resp = client.post("/", data={"repo": repo, "workbook_name": fname})
+    assert resp.status_code == 200
+    data = app_module.workbook_data
+    assert list(data) == ["Sheet1", "Sheet2", "Sheet3"]
+    assert data.is_loaded("Sheet1")
+    assert not data.is_loaded("Sheet2")
+    assert not data.is_loaded("Sheet3")
+
+    meta = client.get("/sheet/Sheet2/meta").get_json()
+    assert meta["mapping"]["mapped_col"] == "MAPPED_STD_DESCRIPTION"
+    assert meta["mapping"]["map"] == {"Standard 1": "S1^Standard 1"}
+    assert meta["dropdowns"]["MAPPED_STD_DESCRIPTION"] == ["Standard 1"]
+    assert "STANDARD_CODE" in meta["render_headers"]
+    assert data.is_loaded("Sheet2")
+    assert not data.is_loaded("Sheet3")
+    assert not list((tmp_path / "cache").glob("*.pkl"))
+
+
+def test_validation_materializes_remaining_sheets_and_caches(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": fname})
+    resp = client.post("/export_errors", json={})
+    assert resp.get_json() == {"errors": []}
+    assert all(app_module.workbook_data.is_loaded(s) for s in app_module.workbook_data)
+    assert list((tmp_path / "cache").glob("*.pkl"))
+
+
+def test_errors_of_other_sheets_are_reported_after_first_paint(tmp_path, monkeypatch):
+    app_module, repo, fname = setup_app(tmp_path, monkeypatch)
+    wb_path = tmp_path / "Samples" / repo / fname
+    wb = load_workbook(wb_path)
+    wb["Sheet2"].append(["C1", "Display 9", "S9", "Standard 9", "Standard 9"])
+    wb.save(wb_path)
+    client = app_module.app.test_client()
+    page = client.post("/", data={"repo": repo, "workbook_name": fname})
+    html = page.get_data(as_text=True)
+    assert "duplicate CODE" not in html
+    assert "fetch('/validation')" in html
+    assert not app_module.workbook_data.is_loaded("Sheet2")
+
+    errors = client.get("/validation").get_json()["errors"]
+    assert errors == {
+        "Sheet2": [
+            "Sheet2 row 2: duplicate CODE 'C1' duplicates row 3",
+            "Sheet2 row 3: duplicate CODE 'C1' duplicates row 2",
+        ]
+    }
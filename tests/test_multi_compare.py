@@ -0,0 +1,88 @@
+from pathlib import Path
+import sys
+import importlib
+
+import pandas as pd
+from openpyxl import Workbook
+
+from codeset_ui_app.components.multi_compare import build_code_matrix, load_code_tables
+
+MAPPINGS = {
+    "Test1Repository": [["M", "Male", "Male"], ["F", "Female", "Female"], ["U", "Unknown", "Unknown"]],
+    "Test2Repository": [["M", "Male", "Male"], ["F", "Female", "Female"], ["U", "Unknown", "Other"]],
+    "Test3Repository": [["M", "Male", "Male"], ["F", "Female", ""], ["X", "Other", ""]],
+}
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    for repo, rows in MAPPINGS.items():
+        (samples / repo).mkdir(parents=True)
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "CS_GENDER"
+        ws.append(["CODE", "DISPLAY VALUE", "MAPPED_STD_DESCRIPTION"])
+        for row in rows:
+            ws.append(row)
+        wb.save(samples / repo / f"{repo} Codeset.xlsx")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    return app_module
+
+
+def test_code_matrix_statuses():
+    def frame(rows):
+        return pd.DataFrame(rows, columns=["code", "display", "mapped"])
+
+    matrix = build_code_matrix([frame(MAPPINGS[r]) for r in MAPPINGS] + [None])
+    total, rows = matrix.rows()
+    assert total == 4
+    assert {row["code"]: row["status"] for row in rows} == {
+        "M": "partial",
+        "F": "partial",
+        "U": "conflict",
+        "X": "unmapped",
+    }
+    assert rows[0]["mapped"] == ["Male", "Male", "Male", None]
+    assert matrix.summary()["agreeing"] == [3, 2, 1, 0]
+
+    full = build_code_matrix([frame(MAPPINGS["Test1Repository"])] * 2)
+    assert full.summary()["consensus"] == 3
+
+
+def test_multi_compare_endpoints(tmp_path, monkeypatch):
+    app_module = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    workbooks = [{"repo": repo, "workbook": f"{repo} Codeset.xlsx"} for repo in MAPPINGS]
+
+    assert client.post("/compare/multi", json={"workbooks": workbooks[:1]}).status_code == 400
+    missing = [{"repo": "Test1Repository", "workbook": "../../etc/passwd"}] + workbooks
+    assert client.post("/compare/multi", json={"workbooks": missing}).status_code == 404
+
+    resp = client.post("/compare/multi", json={"workbooks": workbooks})
+    assert resp.status_code == 200
+    summary = resp.get_json()["sheets"]["CS_GENDER"]
+    assert (summary["consensus"], summary["partial"], summary["conflict"], summary["unmapped"]) == (1, 1, 1, 1)
+    assert client.get("/compare/multi").get_json()["sources"] == workbooks
+
+    page = client.get("/compare/multi/CS_GENDER?status=conflict").get_json()
+    assert page["total"] == 1
+    assert page["rows"][0]["code"] == "U"
+    assert page["rows"][0]["mapped"] == ["Unknown", "Other", None]
+    assert client.get("/compare/multi/CS_GENDER?offset=1&limit=2").get_json()["rows"][0]["code"] == "F"
+    assert client.get("/compare/multi/CS_GENDER?status=bogus").status_code == 400
+
+    client.post("/compare/multi/clear")
+    assert client.get("/compare/multi").status_code == 404
+
+
+def test_compare_workers_are_opt_in(tmp_path, monkeypatch):
+    app_module = setup_app(tmp_path, monkeypatch)
+    assert app_module.COMPARE_WORKERS <= 1
+    paths = sorted((tmp_path / "Samples").glob("*/*.xlsx"))
+    serial = load_code_tables(paths)
+    pooled = load_code_tables(paths, workers=2)
+    for one, other in zip(serial, pooled):
+        assert one["CS_GENDER"].equals(other["CS_GENDER"])
@@ -0,0 +1,78 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook
+
+import subprocess
+
+from codeset_ui_app.components import file_parser, sheet_preparation
+from codeset_ui_app.components.lazy_workbook import LazySheets
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb_path = repo / "CodesetSample.xlsx"
+    wb = Workbook()
+    for idx, title in enumerate(["Sheet1", "Sheet2", "Sheet3"]):
+        ws = wb.active if idx == 0 else wb.create_sheet()
+        ws.title = title
+        ws.append(["CODE", "DISPLAY VALUE", "STANDARD_CODE", "STANDARD_DESCRIPTION", "MAPPED_STD_DESCRIPTION"])
+        for row in range(idx + 1):
+            ws.append([f"C{row}", f"Display {row}", f"S{row}", f"Standard {row}", f"Standard {row}"])
+    wb.save(wb_path)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    monkeypatch.setattr(app_module.workbook_cache, "CACHE_DIR", tmp_path / "cache")
+    app_module.refresh_repository_cache()
+    return app_module, repo.name, wb_path
+
+
+def test_map_sheets_parallel_matches_serial(tmp_path, monkeypatch):
+    _, _, wb_path = setup_app(tmp_path, monkeypatch)
+    raw = wb_path.read_bytes()
+    prepare = sheet_preparation.prepare_source_sheet
+    serial = file_parser.map_sheets(raw, prepare)
+    parallel = file_parser.map_sheets(raw, prepare, workers=2)
+    assert list(parallel) == ["Sheet1", "Sheet2", "Sheet3"]
+    for sheet in serial:
+        assert parallel[sheet][0].equals(serial[sheet][0])
+        assert parallel[sheet][1:] == serial[sheet][1:]
+
+
+def test_worker_modules_do_not_import_the_app():
+    # Spawned pool workers import these modules; loading the app there would
+    # start a repository scan in every worker.
+    code = (
+        "import sys, codeset_ui_app.components.sheet_preparation, "
+        "codeset_ui_app.components.multi_compare; "
+        "assert 'codeset_ui_app.app' not in sys.modules and 'flask' not in sys.modules"
+    )
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+def test_parallel_workers_load_large_workbooks_eagerly(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    monkeypatch.setattr(app_module, "PARALLEL_WORKERS", 2)
+    monkeypatch.setattr(app_module, "PARALLEL_MIN_SHEETS", 3)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    assert not isinstance(app_module.workbook_data, LazySheets)
+    assert len(app_module.workbook_data["Sheet3"]) == 3
+    assert app_module.mapping_data["Sheet2"]["map"] == {
+        "Standard 0": "S0^Standard 0",
+        "Standard 1": "S1^Standard 1",
+    }
+    assert list((tmp_path / "cache").glob("*.pkl"))
+
+
+def test_small_workbooks_stay_serial(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    monkeypatch.setattr(app_module, "PARALLEL_WORKERS", 2)
+    monkeypatch.setattr(app_module, "PARALLEL_MIN_SHEETS", 4)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    assert isinstance(app_module.workbook_data, LazySheets)
@@ -0,0 +1,90 @@
+from pathlib import Path
+import importlib
+import os
+import sys
+
+from codeset_ui_app.utils import repository_index
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def _counting_scandir(monkeypatch):
+    listed: list[str] = []
+    original = os.scandir
+
+    def _scandir(path):
+        listed.append(Path(path).name)
+        return original(path)
+
+    monkeypatch.setattr(repository_index.os, "scandir", _scandir)
+    return listed
+
+
+def test_scan_persists_and_only_lists_changed_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "base"
+    _touch(base / "aRepository" / "A Codeset.xlsx")
+    _touch(base / "bRepository" / "nested" / "B Codeset.xlsx")
+    _touch(base / "bRepository" / "notes.xlsx")
+    _touch(base / ".git" / "objects" / "Old Codeset.xlsx")
+    _touch(base / "node_modules" / "pkg" / "Codeset.xlsx")
+
+    assert sorted(repository_index.scan(base)) == [
+        "aRepository/A Codeset.xlsx",
+        "bRepository/nested/B Codeset.xlsx",
+    ]
+    assert list((tmp_path / "index").glob("repository-index-*.json"))
+
+    listed = _counting_scandir(monkeypatch)
+    assert len(repository_index.scan(base)) == 2
+    assert listed == []
+
+    _touch(base / "bRepository" / "nested" / "C Codeset.xlsx")
+    assert "bRepository/nested/C Codeset.xlsx" in repository_index.scan(base)
+    assert listed == ["nested"]
+
+
+def test_startup_uses_persisted_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "Samples"
+    _touch(base / "repo1Repository" / "Sample Codeset.xlsx")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", base)
+    app_module.refresh_repository_cache()
+    assert app_module.REPOSITORY_CACHE == {"repo1Repository": ["Sample Codeset.xlsx"]}
+
+    def _no_scan(*args, **kwargs):
+        raise OSError("share unavailable")
+
+    monkeypatch.setattr(repository_index, "scan", _no_scan)
+    app_module.REPOSITORY_CACHE = {}
+    app_module.refresh_repository_cache(background=True)
+    assert app_module.REPOSITORY_CACHE == {"repo1Repository": ["Sample Codeset.xlsx"]}
+
+
+def test_index_directory_is_private(tmp_path, monkeypatch):
+    import stat
+
+    if not os.environ.get("CODESET_INDEX_DIR"):
+        user_dir = repository_index.workbook_cache.user_cache_dir()
+        assert repository_index.INDEX_DIR == user_dir / "index"
+    index_dir = tmp_path / "index"
+    monkeypatch.setattr(repository_index, "INDEX_DIR", index_dir)
+    base = tmp_path / "base"
+    _touch(base / "aRepository" / "A Codeset.xlsx")
+    index_dir.mkdir(mode=0o777)
+    os.chmod(index_dir, 0o777)
+
+    repository_index.scan(base)
+    assert stat.S_IMODE(index_dir.stat().st_mode) == 0o700
+    # Only the index itself is left behind, no temporary files.
+    assert [p.suffix for p in index_dir.iterdir()] == [".json"]
+    assert repository_index.load_index(base) is not None
+
+    # An index in a directory owned by someone else is ignored.
+    monkeypatch.setattr(os, "getuid", lambda: index_dir.stat().st_uid + 1)
+    assert repository_index.load_index(base) is None
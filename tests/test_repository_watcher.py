@@ -0,0 +1,118 @@
+from pathlib import Path
+import importlib
+import sys
+
+import pytest
+
+from codeset_ui_app.utils import repository_index
+from codeset_ui_app.utils.repository_watcher import RepositoryWatcher
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+def _recorder():
+    changes = []
+    return changes, lambda added, removed, renamed: changes.append((added, removed, renamed))
+
+
+def test_polling_reports_added_and_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "base"
+    _touch(base / "aRepository" / "A Codeset.xlsx")
+    changes, callback = _recorder()
+    watcher = RepositoryWatcher(base, callback, use_inotify=False)
+    watcher.prime()
+    assert watcher.backend == "polling"
+    assert watcher.check() is False
+
+    _touch(base / "aRepository" / "B Codeset.xlsx")
+    (base / "aRepository" / "A Codeset.xlsx").unlink()
+    assert watcher.check() is True
+    assert changes == [(["aRepository/B Codeset.xlsx"], ["aRepository/A Codeset.xlsx"], [])]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+def test_inotify_reports_renames(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "base"
+    _touch(base / "aRepository" / "A Codeset.xlsx")
+    changes, callback = _recorder()
+    watcher = RepositoryWatcher(base, callback)
+    watcher.prime()
+    if watcher.backend != "inotify":
+        pytest.skip("inotify unavailable")
+
+    (base / "aRepository" / "A Codeset.xlsx").rename(base / "aRepository" / "Z Codeset.xlsx")
+    assert watcher.check(timeout=1.0) is True
+    assert changes[-1] == ([], [], [("aRepository/A Codeset.xlsx", "aRepository/Z Codeset.xlsx")])
+
+    (base / "aRepository").rename(base / "bRepository")
+    assert watcher.check(timeout=1.0) is True
+    assert changes[-1] == ([], [], [("aRepository/Z Codeset.xlsx", "bRepository/Z Codeset.xlsx")])
+
+    _touch(base / "bRepository" / "nested" / "N Codeset.xlsx")
+    while watcher.check(timeout=0.5):
+        pass
+    assert "bRepository/nested/N Codeset.xlsx" in [f for c in changes for f in c[0]]
+
+    (base / "bRepository" / "Z Codeset.xlsx").unlink()
+    assert watcher.check(timeout=1.0) is True
+    assert changes[-1] == ([], ["bRepository/Z Codeset.xlsx"], [])
+
+
+def test_app_applies_watcher_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "Samples"
+    _touch(base / "repo1Repository" / "Sample Codeset.xlsx")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", base)
+    app_module.refresh_repository_cache()
+    generation = app_module._repository_generation
+
+    app_module._apply_repository_changes(
+        base,
+        generation,
+        ["repo2Repository/New Codeset.xlsx", "Loose Codeset.xlsx"],
+        [],
+        [("repo1Repository/Sample Codeset.xlsx", "repo1Repository/Renamed Codeset.xlsx")],
+    )
+    assert app_module.REPOSITORY_CACHE == {
+        "repo1Repository": ["Renamed Codeset.xlsx"],
+        "repo2Repository": ["New Codeset.xlsx"],
+        "SharedRepositories": ["Loose Codeset.xlsx"],
+    }
+
+    app_module._apply_repository_changes(
+        base, generation, [], ["repo2Repository/New Codeset.xlsx"], []
+    )
+    assert "repo2Repository" not in app_module.REPOSITORY_CACHE
+
+
+def test_app_ignores_changes_from_a_stale_watcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository_index, "INDEX_DIR", tmp_path / "index")
+    base = tmp_path / "Samples"
+    workbook = base / "repo1Repository" / "Sample Codeset.xlsx"
+    _touch(workbook)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", base)
+    app_module.refresh_repository_cache()
+    stale = app_module._repository_generation
+    # Reselecting the base restarts the watcher; events of the old one that
+    # arrive afterwards must not touch the refreshed cache or open workbook.
+    app_module.refresh_repository_cache()
+    monkeypatch.setattr(app_module, "workbook_path", workbook)
+
+    app_module._apply_repository_changes(
+        base,
+        stale,
+        ["repo2Repository/New Codeset.xlsx"],
+        [],
+        [("repo1Repository/Sample Codeset.xlsx", "repo1Repository/Renamed Codeset.xlsx")],
+    )
+    assert app_module.REPOSITORY_CACHE == {"repo1Repository": ["Sample Codeset.xlsx"]}
+    assert app_module.workbook_path == workbook
@@ -0,0 +1,98 @@
+from pathlib import Path
+import sys
+import importlib
+
+import pandas as pd
+from openpyxl import Workbook
+
+from codeset_ui_app.components.sheet_fingerprint import sheet_fingerprint
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb_path = repo / "CodesetSample.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE"])
+    ws.append(["A", "Alpha"])
+    ws2 = wb.create_sheet("Sheet2")
+    ws2.append(["CODE", "DISPLAY VALUE"])
+    ws2.append(["B", "Beta"])
+    wb.save(wb_path)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    monkeypatch.setattr(app_module.workbook_cache, "CACHE_DIR", tmp_path / "cache")
+    app_module.refresh_repository_cache()
+    return app_module, repo.name, wb_path
+
+
+def test_fingerprint_tracks_content():
+    df = pd.DataFrame({"CODE": ["A", "B"], "DISPLAY VALUE": ["Alpha", "Beta"]})
+    assert sheet_fingerprint(df) == sheet_fingerprint(df.copy())
+    edited = df.copy()
+    edited.loc[1, "DISPLAY VALUE"] = "Beta 2"
+    assert sheet_fingerprint(edited) != sheet_fingerprint(df)
+    assert sheet_fingerprint(df.rename(columns={"CODE": "Code"})) != sheet_fingerprint(df)
+
+
+def test_fingerprint_tracks_row_numbers():
+    from codeset_ui_app.validators import validate_workbook
+
+    df = pd.DataFrame({"CODE": ["A", "B"], "DISPLAY VALUE": ["Alpha", ""]}, index=[0, 5])
+    reset = df.reset_index(drop=True)
+    assert sheet_fingerprint(df) != sheet_fingerprint(reset)
+    assert sheet_fingerprint(reset) == sheet_fingerprint(reset.set_axis(pd.Index([0, 1])))
+
+    mapping = {"S": {"code_col": "CODE", "display_col": "DISPLAY VALUE"}}
+    cache: dict = {}
+    first = validate_workbook({"S": df}, mapping, fingerprints={"S": sheet_fingerprint(df)}, cache=cache)
+    assert first == ["S row 7: DISPLAY VALUE required when CODE is provided"]
+    again = validate_workbook(
+        {"S": reset}, mapping, fingerprints={"S": sheet_fingerprint(reset)}, cache=cache
+    )
+    assert again == ["S row 3: DISPLAY VALUE required when CODE is provided"]
+
+
+def test_export_and_validation_skip_unchanged_sheets(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    validators = sys.modules[app_module.validate_workbook.__module__]
+
+    written: list[list[str]] = []
+    export_workbook = app_module.export_workbook
+
+    def _export(wb, data, stream, protected=False):
+        written.append(list(data))
+        export_workbook(wb, data, stream, protected)
+
+    validated: list[str] = []
+    validate_sheet = validators._validate_sheet
+
+    def _validate(sheet, *args):
+        validated.append(sheet)
+        return validate_sheet(sheet, *args)
+
+    monkeypatch.setattr(app_module, "export_workbook", _export)
+    monkeypatch.setattr(validators, "_validate_sheet", _validate)
+    rows = {
+        "Sheet1": [{"CODE": "A", "DISPLAY VALUE": "Alpha"}],
+        "Sheet2": [{"CODE": "B", "DISPLAY VALUE": "Beta"}],
+    }
+    assert client.post("/export", json={"data": rows}).status_code == 200
+    assert written == [["Sheet1", "Sheet2"]]
+
+    validated.clear()
+    rows["Sheet2"] = [{"CODE": "B", "DISPLAY VALUE": "Beta 2"}]
+    assert client.post("/export", json={"data": rows}).status_code == 200
+    assert written[-1] == ["Sheet2"]
+    assert validated == ["Sheet2"]
+    assert app_module.sheet_fingerprints["Sheet2"] == sheet_fingerprint(app_module.workbook_data["Sheet2"])
+
+    resp = client.get("/transformer")
+    assert resp.status_code == 200
+    assert b'LocalDisplay="Beta 2"' in resp.data
@@ -0,0 +1,119 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE", "MAPPED_STD_DESCRIPTION"])
+    for i in range(30):
+        ws.append([f"C{i:02d}", f"Value {i}", "" if i % 3 == 0 else f"Desc {i}"])
+    wb.save(repo / "Codeset.xlsx")
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    app_module.refresh_repository_cache()
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo.name, "workbook_name": "Codeset.xlsx"})
+    return client
+
+
+def test_plain_request_returns_every_row(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    data = client.get("/sheet/Sheet1").get_json()
+    assert isinstance(data, list)
+    assert len(data) == 30
+
+
+def test_window_pages_and_counts(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    data = client.get("/sheet/Sheet1?offset=10&limit=5").get_json()
+    assert data["total"] == 30
+    assert data["row_count"] == 30
+    assert data["positions"] == [10, 11, 12, 13, 14]
+    assert [row["CODE"] for row in data["rows"]] == ["C10", "C11", "C12", "C13", "C14"]
+
+
+def test_window_sorts_and_filters(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    data = client.get("/sheet/Sheet1?sort=CODE&order=desc&limit=3").get_json()
+    assert [row["CODE"] for row in data["rows"]] == ["C29", "C28", "C27"]
+    assert data["positions"] == [29, 28, 27]
+
+    data = client.get("/sheet/Sheet1?q=value 2&column=DISPLAY VALUE").get_json()
+    assert data["total"] == 11
+    assert data["rows"][0]["CODE"] == "C02"
+
+    data = client.get("/sheet/Sheet1?unmapped=1&sort=CODE&order=desc").get_json()
+    assert data["total"] == 10
+    assert data["rows"][0]["CODE"] == "C27"
+    assert all(row["MAPPED_STD_DESCRIPTION"] == "" for row in data["rows"])
+
+
+def test_window_rejects_unknown_columns(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    assert client.get("/sheet/Sheet1?sort=NOPE").status_code == 400
+    assert client.get("/sheet/Sheet1?q=x&column=NOPE").status_code == 400
+    assert client.get("/sheet/Sheet1?order=sideways").status_code == 400
+
+
+def test_unknown_sheets_are_not_cached(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    app_module = importlib.import_module("codeset_ui_app.app")
+    for i in range(3):
+        assert client.get(f"/sheet/Missing{i}").status_code == 404
+        assert client.get(f"/sheet/Missing{i}?offset=0&limit=5").status_code == 404
+    assert not any(name.startswith("Missing") for name in app_module._combined_cache)
+
+
+def test_table_formats(tmp_path, monkeypatch):
+    client = setup_app(tmp_path, monkeypatch)
+    data = client.get("/sheet/Sheet1?format=rows&limit=2").get_json()
+    assert data["rows"]["columns"] == ["CODE", "DISPLAY VALUE", "MAPPED_STD_DESCRIPTION"]
+    assert data["rows"]["rows"] == [["C00", "Value 0", ""], ["C01", "Value 1", "Desc 1"]]
+
+    data = client.get("/sheet/Sheet1?format=columns").get_json()
+    assert data["columns"][0] == "CODE"
+    assert data["data"][0][:2] == ["C00", "C01"]
+    assert len(data["data"][1]) == 30
+    assert client.get("/sheet/Sheet1?format=xml").status_code == 400
+
+
+def test_etag_and_compression(tmp_path, monkeypatch):
+    import gzip
+    import json
+
+    client = setup_app(tmp_path, monkeypatch)
+    first = client.get("/sheet/Sheet1")
+    etag = first.headers["ETag"]
+    # Shared by every content-coding of the body, so the tag must be weak.
+    assert etag.startswith('W/"')
+    assert client.get("/sheet/Sheet1", headers={"If-None-Match": etag}).status_code == 304
+    strong = etag.removeprefix("W/")
+    assert client.get("/sheet/Sheet1", headers={"If-None-Match": strong}).status_code == 304
+    assert client.get("/sheet/Sheet1", headers={"If-None-Match": '"other", ' + etag}).status_code == 304
+
+    compressed = client.get("/sheet/Sheet1", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"] == etag
+    assert json.loads(gzip.decompress(compressed.data)) == first.get_json()
+
+    for refused in ("gzip;q=0", "gzip; q=0.0, br;q=0", "*;q=0", "identity"):
+        plain = client.get("/sheet/Sheet1", headers={"Accept-Encoding": refused})
+        assert "Content-Encoding" not in plain.headers
+    wildcard = client.get("/sheet/Sheet1", headers={"Accept-Encoding": "*"})
+    assert wildcard.headers["Content-Encoding"] in ("gzip", "br")
+    preferred = client.get("/sheet/Sheet1", headers={"Accept-Encoding": "br;q=0.1, gzip;q=0.9"})
+    assert preferred.headers["Content-Encoding"] == "gzip"
+
+    # Editing the sheet replaces its frame, so the old tag no longer matches.
+    rows = first.get_json()
+    rows[0]["DISPLAY VALUE"] = "Changed"
+    assert client.post("/export", json={"Sheet1": rows}).status_code == 200
+    assert client.get("/sheet/Sheet1", headers={"If-None-Match": etag}).status_code == 200
@@ -1,3 +1,5 @@
+import time
+
 import pandas as pd
 from codeset_ui_app.validators import validate_workbook
 
@@ -156,3 +158,110 @@ def test_only_selected_sheets_require_mapped_values():
         skip_mapped_requirement_sheets={"OptionalSheet"},
     )
     assert skipped_errors == []
+
+
+def test_error_messages_and_order():
+    df = pd.DataFrame(
+        {
+            "CODE": ["A", " A", "B", "", "A", None],
+            "DISPLAY VALUE": ["Alpha", "", "Beta", "Gamma", "Alpha", ""],
+            "STANDARD_CODE": ["1", "", "n/a", "", "", ""],
+            "STANDARD_DESCRIPTION": ["", "", "", "", "", ""],
+            "MAPPED_STD_DESCRIPTION": ["", "", "", "Mapped", "", "Mapped"],
+        }
+    )
+    mapping = {
+        "S": {
+            "code_col": "CODE",
+            "display_col": "DISPLAY VALUE",
+            "mapped_col": "MAPPED_STD_DESCRIPTION",
+            "std_col": "STANDARD_DESCRIPTION",
+            "std_code_col": "STANDARD_CODE",
+        }
+    }
+    assert validate_workbook({"S": df}, mapping) == [
+        "S row 2: duplicate CODE 'A' duplicates rows 3, 6",
+        "S row 3: duplicate CODE 'A' duplicates rows 2, 6",
+        "S row 6: duplicate CODE 'A' duplicates rows 2, 3",
+        "S row 2: MAPPED_STD_DESCRIPTION required when STANDARD_CODE/STANDARD_DESCRIPTION is provided",
+        "S row 3: DISPLAY VALUE required when CODE is provided",
+        "S row 5: CODE required when DISPLAY VALUE is provided",
+        "S row 5: CODE required when MAPPED_STD_DESCRIPTION is provided",
+        "S row 7: CODE required when MAPPED_STD_DESCRIPTION is provided",
+        "S row 7: DISPLAY VALUE required when MAPPED_STD_DESCRIPTION is provided",
+    ]
+
+
+def test_validate_100k_rows():
+    rows = 100_000
+    df = pd.DataFrame(
+        {
+            "CODE": [f"C{i % 90_000}" if i % 7 else "" for i in range(rows)],
+            "DISPLAY VALUE": [f"Display {i}" if i % 5 else "" for i in range(rows)],
+            "STANDARD_CODE": [str(i) if i % 3 else "NA" for i in range(rows)],
+            "STANDARD_DESCRIPTION": ["Desc" if i % 4 else "" for i in range(rows)],
+            "MAPPED_STD_DESCRIPTION": ["Mapped" if i % 6 else "" for i in range(rows)],
+        }
+    )
+    mapping = {
+        "S": {
+            "code_col": "CODE",
+            "display_col": "DISPLAY VALUE",
+            "mapped_col": "MAPPED_STD_DESCRIPTION",
+            "std_col": "STANDARD_DESCRIPTION",
+            "std_code_col": "STANDARD_CODE",
+        }
+    }
+    start = time.perf_counter()
+    errors = validate_workbook({"S": df}, mapping)
+    elapsed = time.perf_counter() - start
+    print(f"validated {rows} rows in {elapsed:.2f}s")
+    duplicates = [e for e in errors if "duplicate CODE" in e]
+    # Codes C0..C9999 appear twice, apart from the blanked multiples of 7.
+    assert len(duplicates) == 2 * sum(1 for i in range(10_000) if i % 7 and (i + 90_000) % 7)
+    assert "S row 3: duplicate CODE 'C1' duplicates row 90003" in duplicates
+
+
+def test_duplicated_headers_use_densest_column():
+    # Like CS_GENDER in the CHR sample: STANDARD_CODE and DEFINITION repeat.
+    df = pd.DataFrame(
+        [
+            ["A", "Alpha", "", "1", "", "Def", ""],
+            ["B", "", "", "2", "Mapped", "", "Def"],
+            ["", "Gamma", "", "3", "", "Def", ""],
+            ["D", "Delta", "", "", "Mapped", "", ""],
+        ],
+        columns=[
+            "CODE",
+            "DISPLAY VALUE",
+            "STANDARD_CODE",
+            "STANDARD_CODE",
+            "MAPPED_STD_DESCRIPTION",
+            "DEFINITION",
+            "DEFINITION",
+        ],
+    )
+    mapping = {
+        "S": {
+            "code_col": "CODE",
+            "display_col": "DISPLAY VALUE",
+            "mapped_col": "MAPPED_STD_DESCRIPTION",
+            "std_code_col": "STANDARD_CODE",
+        }
+    }
+    # The messages the row-by-row implementation produced for this sheet.
+    assert validate_workbook({"S": df}, mapping) == [
+        "S row 2: MAPPED_STD_DESCRIPTION required when STANDARD_CODE/STANDARD_DESCRIPTION is provided",
+        "S row 3: DISPLAY VALUE required when CODE is provided",
+        "S row 3: DISPLAY VALUE required when MAPPED_STD_DESCRIPTION is provided",
+        "S row 4: CODE required when DISPLAY VALUE is provided",
+        "S row 4: MAPPED_STD_DESCRIPTION required when STANDARD_CODE/STANDARD_DESCRIPTION is provided",
+    ]
+
+    codes = pd.DataFrame([["A", ""], ["", "B"], ["", "B"]], columns=["CODE", "CODE"])
+    assert validate_workbook({"S": codes}, {"S": {"code_col": "CODE"}}) == [
+        "S row 3: duplicate CODE 'B' duplicates row 4",
+        "S row 4: duplicate CODE 'B' duplicates row 3",
+        "S row 3: DISPLAY VALUE required when CODE is provided",
+        "S row 4: DISPLAY VALUE required when CODE is provided",
+    ]
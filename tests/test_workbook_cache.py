@@ -0,0 +1,192 @@
+from pathlib import Path
+import sys
+import importlib
+from openpyxl import Workbook
+
+
+def setup_app(tmp_path, monkeypatch):
+    samples = tmp_path / "Samples"
+    repo = samples / "repo1Repository"
+    repo.mkdir(parents=True)
+    wb_path = repo / "CodesetSample.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Sheet1"
+    ws.append(["CODE", "DISPLAY VALUE", "MAPPED_STD_DESCRIPTION"])
+    ws.append(["A", "Alpha", "Desc"])
+    wb.save(wb_path)
+    sys.path.append(str(Path(__file__).resolve().parents[1]))
+    app_module = importlib.import_module("codeset_ui_app.app")
+    monkeypatch.setattr(app_module, "SAMPLES_DIR", samples)
+    monkeypatch.setattr(app_module.workbook_cache, "CACHE_DIR", tmp_path / "cache")
+    app_module.refresh_repository_cache()
+    return app_module, repo.name, wb_path
+
+
+def test_repeat_open_skips_parser(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    assert list((tmp_path / "cache").glob("*.pkl"))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("workbook should be served from the cache")
+
+    monkeypatch.setattr(app_module, "read_workbook", _fail)
+    resp = client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    assert resp.status_code == 200
+    assert app_module.workbook_obj is None
+    assert app_module.mapping_data["Sheet1"]["mapped_col"] == "MAPPED_STD_DESCRIPTION"
+    assert client.get("/sheet/Sheet1").get_json()[0]["CODE"] == "A"
+
+    # export loads the openpyxl workbook on demand
+    resp = client.post("/export", json={"Sheet1": [{"CODE": "B", "DISPLAY VALUE": "Beta"}]})
+    assert resp.status_code == 200
+    from openpyxl import load_workbook as xl_load
+    assert xl_load(wb_path)["Sheet1"]["A2"].value == "B"
+
+
+def test_repeat_compare_skips_parser(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    compare = {"compare_repo": repo, "compare_workbook_name": wb_path.name}
+    client.post("/", data=compare)
+    assert list(app_module.comparison_data["Sheet1"].columns) == [
+        "CODE_COMPARE",
+        "DISPLAY_VALUE_COMPARE",
+        "MAPPED_STD_DESCRIPTION_COMPARE",
+    ]
+    client.post("/", data={"end_compare": "1"})
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("comparison should be served from the cache")
+
+    monkeypatch.setattr(app_module, "read_columns", _fail)
+    client.post("/", data=compare)
+    assert client.get("/sheet/Sheet1").get_json()[0]["CODE_COMPARE"] == "A"
+    client.post("/", data={"end_compare": "1"})
+
+
+def test_cache_clear_endpoint(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    resp = client.post("/cache/clear")
+    assert resp.get_json() == {"status": "cleared", "removed": 1}
+    assert not list((tmp_path / "cache").glob("*.pkl"))
+
+
+def test_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    from codeset_ui_app.utils import workbook_cache
+    import os
+
+    monkeypatch.setattr(workbook_cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(workbook_cache, "MAX_CACHE_BYTES", 10**9)
+    workbook_cache.store_cached("old", {"payload": "x" * 1000})
+    workbook_cache.store_cached("new", {"payload": "y" * 1000})
+    os.utime(tmp_path / "old.pkl", (1, 1))
+    os.utime(tmp_path / "new.pkl", (2, 2))
+
+    size = (tmp_path / "new.pkl").stat().st_size
+    monkeypatch.setattr(workbook_cache, "MAX_CACHE_BYTES", size)
+    workbook_cache.store_cached("newest", {"payload": "z"})
+    assert workbook_cache.load_cached("old") is None
+    assert workbook_cache.load_cached("newest") == {"payload": "z"}
+
+
+def test_comparison_lru_reuses_unchanged_workbooks(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    monkeypatch.setattr(app_module, "_comparison_lru", app_module.OrderedDict())
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    compare = {"compare_repo": repo, "compare_workbook_name": wb_path.name}
+    client.post("/", data=compare)
+    assert len(app_module._comparison_lru) == 1
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("comparison should be served from memory")
+
+    monkeypatch.setattr(app_module.workbook_cache, "load_cached", _fail)
+    client.post("/", data={"end_compare": "1"})
+    client.post("/", data=compare)
+    assert client.get("/sheet/Sheet1").get_json()[0]["CODE_COMPARE"] == "A"
+    client.post("/", data={"end_compare": "1"})
+
+
+def test_comparison_lru_evicts_least_recently_used(tmp_path, monkeypatch):
+    app_module, _, _ = setup_app(tmp_path, monkeypatch)
+    monkeypatch.setattr(app_module, "_comparison_lru", app_module.OrderedDict())
+    data = {"Sheet1": app_module.pd.DataFrame({"CODE_COMPARE": ["A"] * 100})}
+    size = int(data["Sheet1"].memory_usage(index=True, deep=True).sum())
+    monkeypatch.setattr(app_module, "COMPARE_CACHE_BYTES", 2 * size)
+    app_module._remember_comparison(("a", 1, 1), data)
+    app_module._remember_comparison(("b", 1, 1), data)
+    assert app_module._recall_comparison(("a", 1, 1)) is data
+    app_module._remember_comparison(("c", 1, 1), data)
+    assert list(app_module._comparison_lru) == [("a", 1, 1), ("c", 1, 1)]
+
+
+def test_cache_entry_fingerprints_match_pristine_frames(tmp_path, monkeypatch):
+    import pickle
+    from openpyxl import load_workbook as xl_load
+
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    wb = xl_load(wb_path)
+    wb.create_sheet("Sheet2").append(["CODE", "DISPLAY VALUE"])
+    wb.save(wb_path)
+    client = app_module.app.test_client()
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    assert not list((tmp_path / "cache").glob("*.pkl"))
+
+    # Editing Sheet1 materializes Sheet2 during validation, which stores the entry.
+    rows = [{"CODE": "B", "DISPLAY VALUE": "Beta", "MAPPED_STD_DESCRIPTION": ""}]
+    assert client.post("/export", json={"Sheet1": rows}).status_code == 200
+    (entry,) = (tmp_path / "cache").glob("*.pkl")
+    payload = pickle.loads(entry.read_bytes())
+    assert payload["sheets"]["Sheet1"]["CODE"].tolist() == ["A"]
+    for sheet, df in payload["sheets"].items():
+        assert payload["fingerprints"][sheet] == app_module.sheet_fingerprint(df)
+
+
+def test_cache_directory_is_private(tmp_path, monkeypatch):
+    import os
+    import stat
+
+    app_module, _, _ = setup_app(tmp_path, monkeypatch)
+    cache = app_module.workbook_cache
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir(mode=0o777)
+    os.chmod(cache_dir, 0o777)
+    cache.store_cached("entry", {"value": 1})
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+    assert [p.name for p in cache_dir.iterdir()] == ["entry.pkl"]
+    assert cache.load_cached("entry") == {"value": 1}
+
+    # Entries in a directory owned by someone else are never unpickled.
+    monkeypatch.setattr(os, "getuid", lambda: cache_dir.stat().st_uid + 1)
+    assert cache.load_cached("entry") is None
+    cache.store_cached("other", {"value": 2})
+    assert not (cache_dir / "other.pkl").exists()
+
+
+def test_removed_workbooks_drop_their_comparison_entries(tmp_path, monkeypatch):
+    app_module, repo, wb_path = setup_app(tmp_path, monkeypatch)
+    client = app_module.app.test_client()
+    client.post("/", data={"compare_repo": repo, "compare_workbook_name": wb_path.name})
+    client.post("/", data={"end_compare": "1"})
+    client.post("/", data={"repo": repo, "workbook_name": wb_path.name})
+    client.get("/sheet/Sheet1")
+    entries = sorted(p.name for p in (tmp_path / "cache").glob("*.pkl"))
+    assert any(name.endswith("-compare.pkl") for name in entries)
+    assert len(entries) == 2
+
+    wb_path.unlink()
+    app_module._apply_repository_changes(
+        app_module.SAMPLES_DIR,
+        app_module._repository_generation,
+        [],
+        [f"{repo}/{wb_path.name}"],
+        [],
+    )
+    assert not list((tmp_path / "cache").glob("*.pkl"))
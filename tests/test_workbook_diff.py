@@ -0,0 +1,65 @@
+from pathlib import Path
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from codeset_ui_app.components.workbook_diff import compare_sheets, diff_sheet
+
+COLUMNS = ["CODE", "DISPLAY VALUE"]
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_diff_matches_duplicate_and_blank_keys():
+    base = _frame([["A", "Alpha"], ["A", "Alpha 2"], ["", "Loose"], ["B", "Beta"]])
+    new = _frame([["A", "Alpha"], ["A", "Alpha two"], ["", "Loose"], ["C", "Gamma"]])
+    diff = diff_sheet(base, new, COLUMNS, "CODE")
+
+    assert diff["added"] == [{"id": 5, "key": "C", "values": {"CODE": "C", "DISPLAY VALUE": "Gamma"}, "row": 5}]
+    assert diff["removed"] == [{"id": 5, "key": "B", "values": {"CODE": "B", "DISPLAY VALUE": "Beta"}, "row": 5}]
+    assert diff["changed"] == [
+        {
+            "id": 3,
+            "key": "A",
+            "before": {"CODE": "A", "DISPLAY VALUE": "Alpha 2"},
+            "after": {"CODE": "A", "DISPLAY VALUE": "Alpha two"},
+            "base_row": 3,
+            "incoming_row": 3,
+            "changed_columns": ["DISPLAY VALUE"],
+        }
+    ]
+    assert (diff["added_count"], diff["removed_count"], diff["changed_count"]) == (1, 1, 1)
+
+    sheet_diff = compare_sheets(base, new, COLUMNS, "CODE")
+    assert [p.tolist() for p in sheet_diff.locate("changed", [3])] == [[1], [1]]
+    assert [p.tolist() for p in sheet_diff.locate("changed", [2])] == [[], []]
+
+
+def test_identical_sheets_have_no_diff():
+    base = _frame([["A", "Alpha"], ["", "Loose"]])
+    assert diff_sheet(base, base.copy(), COLUMNS, "CODE") is None
+    assert diff_sheet(_frame([]), _frame([]), COLUMNS, None) is None
+
+
+def _benchmark_frames(rows: int):
+    base = _frame([[f"C{i}", f"Display {i}"] for i in range(rows)])
+    new = base.copy()
+    new.loc[::10, "DISPLAY VALUE"] = "changed"
+    new = pd.concat([new.iloc[rows // 100:], _frame([["NEW", "New"]])], ignore_index=True)
+    return base, new
+
+
+def test_diff_100k_rows():
+    rows = 100_000
+    base, new = _benchmark_frames(rows)
+    start = time.perf_counter()
+    diff = diff_sheet(base, new, COLUMNS, "CODE")
+    elapsed = time.perf_counter() - start
+    print(f"diffed {rows} rows in {elapsed:.2f}s")
+    assert diff["added_count"] == 1
+    assert diff["removed_count"] == rows // 100
+    assert diff["changed_count"] == (rows - rows // 100) // 10
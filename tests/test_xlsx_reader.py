@@ -0,0 +1,132 @@
+import datetime
+import io
+
+from openpyxl import Workbook
+from openpyxl.comments import Comment
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
+
+from codeset_ui_app.components import file_parser
+from codeset_ui_app.components.dropdown_logic import extract_dropdown_options
+from codeset_ui_app.components.formula_logic import extract_lookup_mappings
+from codeset_ui_app.components.xlsx_reader import XlsxReader, cast_number
+
+
+def _sample_workbook() -> bytes:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Codes"
+    ws.append(["CODE", "DISPLAY VALUE", "COUNT", "ADDED", "MAPPED_STD_DESCRIPTION", "SUB_DEFINITION"])
+    ws.append(["A", "Alpha", 1, datetime.datetime(2024, 1, 2), "Std A", "=VLOOKUP(E2,Lookup!$A$1:$B$2,2,FALSE)"])
+    ws.append(["B", "Beta", 2.5, datetime.datetime(2024, 2, 3, 4, 5), "Std B", "=VLOOKUP(E3,Lookup!$A$1:$B$2,2,FALSE)"])
+    ws["A1"].comment = Comment("Unique code", "author")
+    dv = DataValidation(type="list", formula1="=StdList")
+    dv.add("E2:E100")
+    ws.add_data_validation(dv)
+    lookup = wb.create_sheet("Lookup")
+    lookup.append(["Std A", "SA"])
+    lookup.append(["Std B", "SB"])
+    wb.defined_names["StdList"] = DefinedName("StdList", attr_text="Lookup!$A$1:$A$2")
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_read_workbook_matches_openpyxl_path():
+    raw = _sample_workbook()
+    expected, wb = file_parser.load_workbook(io.BytesIO(raw))
+    data, reader = file_parser.read_workbook(io.BytesIO(raw))
+    assert isinstance(reader, XlsxReader)
+    assert list(data) == list(expected)
+    for sheet in expected:
+        assert data[sheet].equals(expected[sheet])
+    assert data["Codes"]["ADDED"].tolist() == ["2024-01-02 00:00:00", "2024-02-03 04:05:00"]
+    assert extract_dropdown_options(reader) == extract_dropdown_options(wb)
+    assert extract_dropdown_options(reader)["Codes"]["MAPPED_STD_DESCRIPTION"] == ["Std A", "Std B"]
+    assert extract_lookup_mappings(reader) == extract_lookup_mappings(wb)
+    assert reader["Codes"][1][0].comment.text == "Unique code"
+
+
+def test_lazy_reader_streams_only_requested_sheets():
+    data, reader = file_parser.read_workbook(io.BytesIO(_sample_workbook()), lazy=True)
+    assert list(data) == ["Codes", "Lookup"]
+    assert data["Lookup"]["Std A"].tolist() == ["Std B"]
+    assert list(reader._sheets) == ["Lookup"]
+    assert extract_dropdown_options(reader, ["Codes"]) == {
+        "Codes": {"MAPPED_STD_DESCRIPTION": ["Std A", "Std B"]}
+    }
+
+
+def test_built_sheets_release_their_columns():
+    data, reader = file_parser.read_workbook(io.BytesIO(_sample_workbook()))
+    sheet = reader["Codes"]
+    assert sheet.released
+    assert [len(column) for column in sheet._head] == [2] * 6
+    assert (sheet.max_row, sheet.max_column) == (3, 6)
+    assert sheet.cell(2, 1).value == "A"
+    assert sheet.cell(2, 6).value.startswith("=VLOOKUP(E2")
+    assert sheet.released
+    # Rows below the first data row are streamed again on demand.
+    assert sheet.cell(3, 2).value == "Beta"
+    assert not sheet.released
+    assert reader.project("Lookup", lambda header: [1]) == {1: ["SA", "SB"]}
+
+    data, reader = file_parser.read_workbook(io.BytesIO(_sample_workbook()), lazy=True)
+    assert data["Codes"]["CODE"].tolist() == ["A", "B"]
+    assert reader["Codes"].released
+
+
+def test_read_workbook_falls_back_to_openpyxl(monkeypatch):
+    def _fail(_bytes):
+        raise ValueError("unsupported")
+
+    monkeypatch.setattr(file_parser, "XlsxReader", _fail)
+    data, wb = file_parser.read_workbook(io.BytesIO(_sample_workbook()))
+    assert isinstance(wb, Workbook)
+    assert data["Codes"]["CODE"].tolist() == ["A", "B"]
+
+
+def test_columns_frame_matches_row_normalization():
+    columns = [
+        ["CODE", "A", None, "C", None],
+        ["COUNT", 1, None, 3, None],
+        [None, None, None, None, "only unnamed"],
+        ["Unnamed: 3", "x", None, None, None],
+        ["FLAG", True, None, False, None],
+    ]
+    header, *content = list(zip(*columns))
+    expected = file_parser._normalize_frame(file_parser.pd.DataFrame(content, columns=header))
+    df = file_parser._columns_frame(columns)
+    assert df.equals(expected)
+    assert list(df.columns) == ["CODE", "COUNT", "FLAG"]
+    assert df.index.tolist() == [0, 2, 3]
+    assert df["COUNT"].tolist() == ["1.0", "3.0", ""]
+
+    categorical = file_parser._columns_frame(columns, string_dtype="category")
+    assert str(categorical["CODE"].dtype) == "category"
+    assert categorical.astype(str).equals(expected)
+
+
+def test_read_columns_projects_chosen_columns():
+    raw = _sample_workbook()
+    full, _ = file_parser.read_workbook(io.BytesIO(raw))
+
+    def _select(header):
+        return [i for i, col in enumerate(header) if col in ("CODE", "MAPPED_STD_DESCRIPTION")]
+
+    data = file_parser.read_columns(io.BytesIO(raw), _select)
+    assert list(data) == ["Codes"]
+    assert data["Codes"].equals(full["Codes"][["CODE", "MAPPED_STD_DESCRIPTION"]])
+
+    reader = XlsxReader(raw)
+    assert reader.project("Lookup", _select) == {}
+    assert reader.project("Codes", lambda header: [1]) == {1: ["DISPLAY VALUE", "Alpha", "Beta"]}
+    assert not reader._sheets
+
+
+def test_cast_number_follows_openpyxl():
+    assert cast_number("42") == 42 and isinstance(cast_number("42"), int)
+    assert cast_number("-7") == -7
+    assert cast_number("1.5") == 1.5
+    assert cast_number("1E3") == 1000.0 and isinstance(cast_number("1E3"), float)
+    assert cast_number("2.5e-1") == 0.25
@@ -0,0 +1,114 @@
+import io
+import zipfile
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from codeset_ui_app.utils import xlsx_sanitizer
+
+
+def _workbook_with_bad_family() -> bytes:
+    wb = Workbook()
+    wb.active.append(["CODE", "DISPLAY VALUE"])
+    wb.active.append(["A", "Alpha"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zin, zipfile.ZipFile(out, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info.filename)
+            if info.filename == "xl/styles.xml":
+                data = data.replace(b'<family val="2"', b'<family val="34"', 1)
+            zout.writestr(info, data)
+    return out.getvalue()
+
+
+def test_scan_detects_only_affected_members():
+    raw = _workbook_with_bad_family()
+    found = xlsx_sanitizer.scan_workbook(raw)
+    assert list(found) == ["xl/styles.xml"]
+    assert found["xl/styles.xml"] == [xlsx_sanitizer.FONT_FAMILY_REPAIR]
+
+
+def test_repair_rewrites_only_affected_members():
+    raw = _workbook_with_bad_family()
+    fixed = xlsx_sanitizer.repair_workbook(raw)
+    with zipfile.ZipFile(io.BytesIO(raw)) as before, zipfile.ZipFile(io.BytesIO(fixed)) as after:
+        assert after.testzip() is None
+        assert before.namelist() == after.namelist()
+        for info in before.infolist():
+            if info.filename == "xl/styles.xml":
+                assert b'val="34"' not in after.read(info.filename)
+                continue
+            copied = after.getinfo(info.filename)
+            assert (copied.CRC, copied.compress_type) == (info.CRC, info.compress_type)
+    assert load_workbook(io.BytesIO(fixed)).active["A2"].value == "A"
+
+
+def test_healthy_workbook_is_returned_unchanged():
+    buf = io.BytesIO()
+    Workbook().save(buf)
+    raw = buf.getvalue()
+    assert xlsx_sanitizer.repair_workbook(raw) is raw
+
+
+def test_registered_repairs_are_applied(monkeypatch):
+    monkeypatch.setattr(xlsx_sanitizer, "REPAIRS", list(xlsx_sanitizer.REPAIRS))
+    repair = xlsx_sanitizer.Repair(
+        "alpha-to-omega",
+        ("xl/worksheets/*.xml",),
+        lambda data: b"Alpha" in data,
+        lambda data: data.replace(b"Alpha", b"Omega"),
+    )
+    xlsx_sanitizer.register_repair(repair)
+    raw = _workbook_with_bad_family()
+    found = xlsx_sanitizer.scan_workbook(raw)
+    assert found["xl/worksheets/sheet1.xml"] == [repair]
+    fixed = xlsx_sanitizer.repair_workbook(raw)
+    assert load_workbook(io.BytesIO(fixed)).active["B2"].value == "Omega"
+
+
+class _UnseekableBuffer(io.BytesIO):
+    """A stream ``zipfile`` cannot seek back in, so it writes data descriptors."""
+
+    def seek(self, *args):
+        raise OSError("not seekable")
+
+
+def test_repair_keeps_streamed_and_stored_members():
+    raw = _UnseekableBuffer()
+    with zipfile.ZipFile(io.BytesIO(_workbook_with_bad_family())) as zin, zipfile.ZipFile(raw, "w") as zout:
+        for info in zin.infolist():
+            data = zin.read(info.filename)
+            if info.filename.startswith("xl/worksheets/"):
+                with zout.open(info.filename, "w", force_zip64=True) as fh:
+                    fh.write(data)
+            else:
+                zout.writestr(zipfile.ZipInfo(info.filename, info.date_time), data)
+    raw = raw.getvalue()
+    with zipfile.ZipFile(io.BytesIO(raw)) as before:
+        sheet = before.getinfo("xl/worksheets/sheet1.xml")
+        assert sheet.flag_bits & 0x08
+        assert before.getinfo("xl/styles.xml").compress_type == zipfile.ZIP_STORED
+
+    fixed = xlsx_sanitizer.repair_workbook(raw)
+    with zipfile.ZipFile(io.BytesIO(raw)) as before, zipfile.ZipFile(io.BytesIO(fixed)) as after:
+        assert after.testzip() is None
+        for info in before.infolist():
+            if info.filename != "xl/styles.xml":
+                assert after.read(info.filename) == before.read(info.filename)
+                assert after.getinfo(info.filename).compress_type == info.compress_type
+    assert load_workbook(io.BytesIO(fixed)).active["B2"].value == "Alpha"
+
+
+def test_formula_workbook_load_retries_with_fallback_repairs(monkeypatch):
+    from codeset_ui_app.components import file_parser
+
+    # A malformation none of the default repairs detect.
+    monkeypatch.setattr(xlsx_sanitizer, "REPAIRS", [])
+    wb = file_parser.load_formula_workbook(io.BytesIO(_workbook_with_bad_family()))
+    assert wb.active["A2"].value == "A"
+
+    monkeypatch.setattr(xlsx_sanitizer, "FALLBACK_REPAIRS", [])
+    with pytest.raises(ValueError):
+        file_parser.load_formula_workbook(io.BytesIO(_workbook_with_bad_family()))